@@ -0,0 +1,171 @@
+import re
+import time
+import asyncio
+import logging
+from collections import Counter
+from datetime import datetime
+from pathlib import Path
+from typing import Optional, Set
+from starlette.concurrency import run_in_threadpool
+from file_upload import (
+    INGEST_REENCODE, INGEST_JPEG_QUALITY, UPLOAD_DIR, get_file_extension, image_asset_for, is_allowed_image,
+    storage, upload_path
+)
+from image_processing import IMAGE_WORKERS, create_executor, recompress_upload
+from upload_gc import ASSET_FIELDS, ASSET_LIST_FIELDS, UPLOAD_REFERENCE_COLLECTIONS, iter_upload_filenames
+from upload_layout import DERIVATIVE_SUFFIX_RE
+
+logger = logging.getLogger(__name__)
+
+# One filename per line for every upload the backfill has finished with
+BACKFILL_CHECKPOINT = UPLOAD_DIR / ".backfill-checkpoint"
+
+# Content-addressed uploads are named after their bytes and must keep them
+CONTENT_NAME_RE = re.compile(r"^[0-9a-f]{64}$")
+
+class IOThrottle:
+    """Spaces out work so the average disk throughput stays under a cap"""
+
+    def __init__(self, max_mb_per_sec: float):
+        self.max_bytes_per_sec = max_mb_per_sec * 1024 * 1024
+        self.started = time.monotonic()
+        self.bytes = 0
+
+    def add(self, size: int):
+        self.bytes += size
+
+    async def wait(self):
+        if self.max_bytes_per_sec <= 0:
+            return
+        ahead = self.bytes / self.max_bytes_per_sec - (time.monotonic() - self.started)
+        if ahead > 0:
+            await asyncio.sleep(ahead)
+
+def load_checkpoint(path: Path = BACKFILL_CHECKPOINT) -> Set[str]:
+    if not path.exists():
+        return set()
+    return {line.strip() for line in path.read_text().splitlines() if line.strip()}
+
+async def reference_counts(db) -> Counter:
+    """How many documents point at each upload"""
+    counts = Counter()
+    for name in UPLOAD_REFERENCE_COLLECTIONS:
+        async for document in db[name].find({}, {"_id": 0}):
+            counts.update(set(iter_upload_filenames(document)))
+    return counts
+
+async def find_backfill_candidates(db, references: Counter, done: Set[str]) -> list:
+    """
+    Referenced originals without recorded derivatives. Unreferenced files are
+    left to the orphan collector.
+    """
+    names = await run_in_threadpool(lambda: [stored.name for stored in storage.list_files()])
+    candidates = []
+    for name in sorted(names):
+        if name in done or not references[name] or not is_allowed_image(name):
+            continue
+        if DERIVATIVE_SUFFIX_RE.search(Path(name).stem):
+            continue
+        ref = await db.upload_refs.find_one({"filename": name}, {"derivatives": 1})
+        if ref and ref.get("derivatives"):
+            continue
+        candidates.append(name)
+    return candidates
+
+async def record_backfill(db, filename: str, result: dict, refs: int):
+    """Track the upload like a fresh one and attach its asset wherever it is used"""
+    built = {key: result[key] for key in ("width", "height", "placeholder", "derivatives")}
+    await db.upload_refs.update_one(
+        {"filename": filename},
+        {
+            "$set": {"sha256": result["sha256"], **built},
+            "$setOnInsert": {"refs": refs, "createdAt": datetime.utcnow()}
+        },
+        upsert=True
+    )
+
+    file_url = f"/api/uploads/{filename}"
+    asset = image_asset_for(file_url, built)
+    for collection, url_field, asset_field in ASSET_FIELDS:
+        await db[collection].update_many({url_field: file_url}, {"$set": {asset_field: asset}})
+    for collection, urls_field, assets_field in ASSET_LIST_FIELDS:
+        projection = {"_id": 0, "id": 1, urls_field: 1, assets_field: 1}
+        async for document in db[collection].find({urls_field: file_url}, projection):
+            # Keep the assets in gallery order
+            by_url = {item.get("url"): item for item in document.get(assets_field, [])}
+            by_url[file_url] = asset
+            assets = [by_url[url] for url in document[urls_field] if url in by_url]
+            await db[collection].update_one({"id": document["id"]}, {"$set": {assets_field: assets}})
+
+async def run_backfill(
+    db,
+    workers: int = IMAGE_WORKERS,
+    max_mb_per_sec: float = 10.0,
+    checkpoint: Path = BACKFILL_CHECKPOINT,
+    dry_run: bool = False,
+    limit: Optional[int] = None
+) -> dict:
+    """
+    Recompress legacy uploads and generate their derivatives in a process
+    pool. Each file is swapped atomically under its existing name, so URLs
+    stay valid while the API serves them. Finished files are appended to the
+    checkpoint, which a later run skips.
+    """
+    references = await reference_counts(db)
+    candidates = await find_backfill_candidates(db, references, load_checkpoint(checkpoint))
+    if limit is not None:
+        candidates = candidates[:limit]
+    report = {"candidates": len(candidates), "processed": 0, "failed": 0, "bytesBefore": 0, "bytesAfter": 0}
+    if dry_run or not candidates:
+        return report
+
+    loop = asyncio.get_running_loop()
+    throttle = IOThrottle(max_mb_per_sec)
+    semaphore = asyncio.Semaphore(workers)
+
+    async def backfill(name: str, log):
+        try:
+            if not await storage.fetch(name):
+                raise FileNotFoundError(name)
+            path = upload_path(name)
+            reencode = (
+                INGEST_REENCODE
+                and get_file_extension(name) in (".jpg", ".jpeg")
+                and not CONTENT_NAME_RE.match(Path(name).stem)
+            )
+            try:
+                result = await loop.run_in_executor(
+                    pool, recompress_upload, str(path), INGEST_JPEG_QUALITY, reencode
+                )
+            except (OSError, ValueError) as e:
+                # Undecodable image: checkpointed so it is not retried forever
+                logger.error(f"Skipping {name}: {e}")
+                report["failed"] += 1
+                log.write(f"{name}\n")
+                return
+            await storage.publish([name, *(derivative["filename"] for derivative in result["derivatives"])])
+            await record_backfill(db, name, result, references[name])
+        except Exception as e:
+            # Left out of the checkpoint so the next run retries it
+            logger.error(f"Backfill of {name} failed: {e}")
+            report["failed"] += 1
+            return
+        finally:
+            semaphore.release()
+
+        throttle.add(result["bytesBefore"] + result["bytesWritten"])
+        report["processed"] += 1
+        report["bytesBefore"] += result["bytesBefore"]
+        report["bytesAfter"] += result["bytesAfter"]
+        log.write(f"{name}\n")
+        if report["processed"] % 50 == 0:
+            logger.info(f"Backfilled {report['processed']} of {len(candidates)} uploads")
+
+    with create_executor(workers) as pool, open(checkpoint, "a", buffering=1) as log:
+        tasks = []
+        for name in candidates:
+            await semaphore.acquire()
+            await throttle.wait()
+            tasks.append(asyncio.create_task(backfill(name, log)))
+        await asyncio.gather(*tasks)
+    return report
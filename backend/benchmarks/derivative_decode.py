@@ -0,0 +1,111 @@
+"""
+Throughput and peak memory of derivative generation for large JPEGs, with
+full-size decoding versus DCT-scaled (draft) decoding.
+
+Each mode runs in a fresh interpreter with IMAGE_DRAFT_DECODE set, builds the
+derivatives of a set of generated photos one after another, and reports its
+own peak RSS (VmHWM), next to the RSS it started the batch with. ru_maxrss
+is not used because it survives exec and would report the parent's peak.
+
+Linux only.
+
+    cd backend
+    python benchmarks/derivative_decode.py --files 5 --megapixels 24
+"""
+import argparse
+import json
+import os
+import shutil
+import subprocess
+import sys
+import tempfile
+import time
+from pathlib import Path
+
+BACKEND_DIR = Path(__file__).resolve().parent.parent
+
+def create_photos(photo_dir: Path, count: int, megapixels: float) -> list:
+    from PIL import Image
+
+    width = int((megapixels * 1e6 * 3 / 2) ** 0.5)
+    height = int(width * 2 / 3)
+    # Noise compresses like a real photo, unlike a flat colour
+    noise = Image.effect_noise((width // 4, height // 4), 60).resize((width, height))
+    image = Image.merge("RGB", (noise, noise.rotate(90, expand=False), noise.transpose(Image.FLIP_LEFT_RIGHT)))
+    paths = []
+    for index in range(count):
+        path = photo_dir / f"photo_{index}.jpg"
+        image.save(path, "JPEG", quality=92)
+        paths.append(str(path))
+    return paths
+
+def memory_kb(field: str) -> int:
+    with open("/proc/self/status") as f:
+        for line in f:
+            if line.startswith(f"{field}:"):
+                return int(line.split()[1])
+    raise RuntimeError(f"{field} missing from /proc/self/status")
+
+def run_worker(paths: list, out_dir: str):
+    """Runs in the child interpreter; prints its measurements as JSON"""
+    sys.path.insert(0, str(BACKEND_DIR))
+    from image_processing import generate_derivatives
+
+    baseline = memory_kb("VmRSS")
+    started = time.perf_counter()
+    for path in paths:
+        generate_derivatives(path, out_dir)
+    elapsed = time.perf_counter() - started
+    peak = memory_kb("VmHWM")
+    print(json.dumps({"elapsed": elapsed, "baseline_kb": baseline, "peak_kb": peak}))
+
+def run_mode(paths: list, out_dir: Path, draft: bool) -> dict:
+    env = {**os.environ, "IMAGE_DRAFT_DECODE": "true" if draft else "false"}
+    output = subprocess.run(
+        [sys.executable, __file__, "--worker", str(out_dir), *paths],
+        cwd=BACKEND_DIR,
+        env=env,
+        capture_output=True,
+        text=True,
+        check=True
+    ).stdout
+    result = json.loads(output.strip().splitlines()[-1])
+    return {
+        "mode": "draft" if draft else "full",
+        "images_per_sec": len(paths) / result["elapsed"],
+        "baseline_mb": result["baseline_kb"] / 1024,
+        "peak_mb": result["peak_kb"] / 1024,
+        "elapsed": result["elapsed"],
+    }
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--files", type=int, default=5)
+    parser.add_argument("--megapixels", type=float, default=24)
+    parser.add_argument("--worker", help=argparse.SUPPRESS)
+    parser.add_argument("paths", nargs="*", help=argparse.SUPPRESS)
+    args = parser.parse_args()
+
+    if args.worker:
+        run_worker(args.paths, args.worker)
+        return
+
+    work_dir = Path(tempfile.mkdtemp(prefix="decode-bench-"))
+    try:
+        paths = create_photos(work_dir, args.files, args.megapixels)
+        out_dir = work_dir / "derivatives"
+        out_dir.mkdir()
+        results = [run_mode(paths, out_dir, draft) for draft in (False, True)]
+    finally:
+        shutil.rmtree(work_dir, ignore_errors=True)
+
+    print(f"{args.files} x {args.megapixels:g} MP JPEG")
+    print(f"{'mode':<8} {'images/s':>9} {'start RSS MB':>13} {'peak RSS MB':>12} {'wall s':>8}")
+    for result in results:
+        print(
+            f"{result['mode']:<8} {result['images_per_sec']:>9.2f} {result['baseline_mb']:>13.1f} "
+            f"{result['peak_mb']:>12.1f} {result['elapsed']:>8.2f}"
+        )
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,120 @@
+"""
+Worker CPU per MB served through /api/uploads/{filename}, with the worker
+streaming the bytes itself versus handing them to nginx via X-Accel-Redirect.
+
+For each mode the API is started under uvicorn in a subprocess, a set of
+generated files is downloaded repeatedly, and the worker's CPU time is read
+from /proc. In offload mode nothing sits in front of uvicorn, so the numbers
+are exactly what the worker pays before nginx takes over the transfer.
+
+Linux only. Needs the same MONGO_URL / DB_NAME environment as the server.
+
+    cd backend
+    python benchmarks/serve_offload.py --files 20 --size-mb 4 --rounds 5
+"""
+import argparse
+import os
+import shutil
+import subprocess
+import sys
+import tempfile
+import time
+import uuid
+from pathlib import Path
+
+import requests
+
+BACKEND_DIR = Path(__file__).resolve().parent.parent
+MB = 1024 * 1024
+
+def worker_cpu_seconds(pid: int) -> float:
+    """User + system CPU time of a process, from /proc/<pid>/stat"""
+    with open(f"/proc/{pid}/stat") as f:
+        fields = f.read().rsplit(")", 1)[1].split()
+    # utime and stime are fields 14 and 15; the split starts at field 3
+    ticks = int(fields[11]) + int(fields[12])
+    return ticks / os.sysconf("SC_CLK_TCK")
+
+def create_files(upload_dir: Path, count: int, size_mb: float) -> list:
+    names = []
+    for _ in range(count):
+        name = f"bench_{uuid.uuid4()}.jpg"
+        (upload_dir / name).write_bytes(os.urandom(int(size_mb * MB)))
+        names.append(name)
+    return names
+
+def start_server(upload_dir: Path, port: int, offload_mode: str) -> subprocess.Popen:
+    env = {**os.environ, "UPLOAD_DIR": str(upload_dir), "UPLOAD_OFFLOAD_MODE": offload_mode}
+    process = subprocess.Popen(
+        [sys.executable, "-m", "uvicorn", "server:app", "--port", str(port), "--log-level", "warning"],
+        cwd=BACKEND_DIR,
+        env=env
+    )
+    deadline = time.time() + 30
+    while time.time() < deadline:
+        try:
+            requests.get(f"http://127.0.0.1:{port}/api/", timeout=1)
+            return process
+        except requests.ConnectionError:
+            time.sleep(0.2)
+    process.terminate()
+    raise RuntimeError("Server did not start")
+
+def run_mode(upload_dir: Path, names: list, port: int, offload_mode: str, rounds: int) -> dict:
+    process = start_server(upload_dir, port, offload_mode)
+    session = requests.Session()
+    base_url = f"http://127.0.0.1:{port}/api/uploads"
+    try:
+        # Warm up imports, digest lookups and the connection
+        for name in names:
+            session.get(f"{base_url}/{name}").content
+
+        served = 0
+        cpu_before = worker_cpu_seconds(process.pid)
+        started = time.perf_counter()
+        for _ in range(rounds):
+            for name in names:
+                response = session.get(f"{base_url}/{name}")
+                response.raise_for_status()
+                served += (upload_dir / name).stat().st_size
+        elapsed = time.perf_counter() - started
+        cpu = worker_cpu_seconds(process.pid) - cpu_before
+    finally:
+        process.terminate()
+        process.wait()
+
+    return {
+        "mode": offload_mode or "direct",
+        "mb": served / MB,
+        "cpu": cpu,
+        "cpu_ms_per_mb": cpu * 1000 / (served / MB),
+        "elapsed": elapsed,
+    }
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--files", type=int, default=20)
+    parser.add_argument("--size-mb", type=float, default=4)
+    parser.add_argument("--rounds", type=int, default=5)
+    parser.add_argument("--port", type=int, default=8765)
+    args = parser.parse_args()
+
+    upload_dir = Path(tempfile.mkdtemp(prefix="offload-bench-"))
+    try:
+        names = create_files(upload_dir, args.files, args.size_mb)
+        results = [
+            run_mode(upload_dir, names, args.port, mode, args.rounds)
+            for mode in ("", "nginx")
+        ]
+    finally:
+        shutil.rmtree(upload_dir, ignore_errors=True)
+
+    print(f"{'mode':<8} {'MB served':>10} {'worker CPU s':>13} {'CPU ms/MB':>10} {'wall s':>8}")
+    for result in results:
+        print(
+            f"{result['mode']:<8} {result['mb']:>10.1f} {result['cpu']:>13.3f} "
+            f"{result['cpu_ms_per_mb']:>10.3f} {result['elapsed']:>8.2f}"
+        )
+
+if __name__ == "__main__":
+    main()
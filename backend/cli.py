@@ -0,0 +1,201 @@
+"""
+Maintenance commands for the photography backend.
+
+    cd backend
+    python cli.py --help
+"""
+import os
+import time
+import asyncio
+import logging
+from pathlib import Path
+import typer
+from dotenv import load_dotenv
+from motor.motor_asyncio import AsyncIOMotorClient
+from file_upload import UPLOAD_DIR
+from backfill import BACKFILL_CHECKPOINT, run_backfill
+from upload_layout import (
+    SHARD_DIR_RE, UPLOAD_VOLUMES, SHARDED, iter_layout_files, layout_path, move_file, placement_path, volume_for,
+    volume_roots
+)
+
+app = typer.Typer(help="Photography portfolio maintenance commands")
+
+@app.callback()
+def main():
+    """Photography portfolio maintenance commands"""
+    logging.basicConfig(level=logging.INFO, format='%(asctime)s - %(levelname)s - %(message)s')
+
+def connect_db():
+    load_dotenv(Path(__file__).parent / '.env')
+    client = AsyncIOMotorClient(os.environ['MONGO_URL'])
+    return client, client[os.environ['DB_NAME']]
+
+def remove_empty_shards(root: Path):
+    for first in root.iterdir():
+        if not first.is_dir() or not SHARD_DIR_RE.match(first.name):
+            continue
+        for second in first.iterdir():
+            if second.is_dir() and SHARD_DIR_RE.match(second.name) and not any(second.iterdir()):
+                second.rmdir()
+        if not any(first.iterdir()):
+            first.rmdir()
+
+@app.command("migrate-layout")
+def migrate_layout(
+    to: str = typer.Option("sharded", help="Target layout: sharded or flat"),
+    batch_size: int = typer.Option(500, help="Files moved between pauses"),
+    pause: float = typer.Option(0.5, help="Seconds to sleep after each batch"),
+    dry_run: bool = typer.Option(False, help="Only count the files that would move")
+):
+    """
+    Move uploads between the flat and sharded layouts while the API keeps
+    serving. Set UPLOAD_LAYOUT to the target layout and restart the API
+    first: it then writes new files in the target layout and still finds
+    files that have not been moved yet. URLs do not contain the shard, so no
+    database documents change.
+    """
+    if to not in ("sharded", "flat"):
+        raise typer.BadParameter("Layout must be 'sharded' or 'flat'")
+    sharded = to == "sharded"
+
+    moved = 0
+    duplicates = 0
+    started = time.monotonic()
+    while True:
+        # Entries are moved out of the directory being scanned, so repeat
+        # until a pass finds nothing left
+        moved_this_pass = 0
+        for volume in volume_roots(UPLOAD_DIR):
+            for entry in iter_layout_files(volume, not sharded):
+                moved_this_pass += 1
+                if dry_run:
+                    continue
+                source = Path(entry.path)
+                dest = layout_path(volume, entry.name, sharded)
+                dest.parent.mkdir(parents=True, exist_ok=True)
+                if dest.exists():
+                    # Content-addressed upload re-written in the new layout already
+                    source.unlink(missing_ok=True)
+                    duplicates += 1
+                else:
+                    os.replace(source, dest)
+                if moved_this_pass % batch_size == 0:
+                    typer.echo(f"Moved {moved + moved_this_pass} files")
+                    time.sleep(pause)
+        moved += moved_this_pass
+        if dry_run or moved_this_pass == 0:
+            break
+
+    if dry_run:
+        typer.echo(f"{moved} files would move to the {to} layout")
+        return
+    if not sharded:
+        for volume in volume_roots(UPLOAD_DIR):
+            remove_empty_shards(volume)
+    typer.echo(
+        f"Moved {moved} files to the {to} layout in {time.monotonic() - started:.1f}s"
+        f" ({duplicates} duplicates removed)"
+    )
+
+@app.command("rebalance")
+def rebalance(
+    batch_size: int = typer.Option(200, help="Files moved between pauses"),
+    pause: float = typer.Option(1.0, help="Seconds to sleep after each batch"),
+    max_mb_per_sec: float = typer.Option(20.0, help="Copy rate limit across devices; 0 disables"),
+    dry_run: bool = typer.Option(False, help="Only count the files that would move")
+):
+    """
+    Move uploads onto the volume consistent hashing assigns them after
+    UPLOAD_VOLUMES changed. Only files whose volume changed are touched:
+    adding a volume moves roughly its share of the files. Restart the API
+    with the new UPLOAD_VOLUMES first; it finds files on any volume, so this
+    can run in the background while it serves.
+    """
+    if not UPLOAD_VOLUMES:
+        raise typer.BadParameter("UPLOAD_VOLUMES is not set; there is nothing to rebalance")
+
+    moved = 0
+    moved_bytes = 0
+    duplicates = 0
+    started = time.monotonic()
+    # UPLOAD_DIR is scanned too, for uploads stored there before volumes existed
+    for volume in dict.fromkeys([*volume_roots(UPLOAD_DIR), UPLOAD_DIR]):
+        for sharded in (SHARDED, not SHARDED):
+            # Collect first: files are moved out of the directories being scanned
+            misplaced = [
+                entry for entry in iter_layout_files(volume, sharded)
+                if volume_for(UPLOAD_DIR, entry.name) != volume
+            ]
+            for entry in misplaced:
+                source = Path(entry.path)
+                dest = placement_path(UPLOAD_DIR, entry.name)
+                moved += 1
+                if dry_run:
+                    continue
+                try:
+                    size = source.stat().st_size
+                except FileNotFoundError:
+                    # Deleted by the API since the scan
+                    continue
+                if dest.exists():
+                    source.unlink(missing_ok=True)
+                    duplicates += 1
+                else:
+                    move_file(source, dest)
+                    moved_bytes += size
+                if max_mb_per_sec > 0:
+                    ahead = moved_bytes / (max_mb_per_sec * 1024 * 1024) - (time.monotonic() - started)
+                    if ahead > 0:
+                        time.sleep(ahead)
+                if moved % batch_size == 0:
+                    typer.echo(f"Moved {moved} files ({moved_bytes / 1024 / 1024:.1f} MB)")
+                    time.sleep(pause)
+
+    if dry_run:
+        typer.echo(f"{moved} files would move to another volume")
+        return
+    typer.echo(
+        f"Moved {moved} files ({moved_bytes / 1024 / 1024:.1f} MB) in {time.monotonic() - started:.1f}s"
+        f" ({duplicates} duplicates removed)"
+    )
+
+@app.command("backfill")
+def backfill(
+    workers: int = typer.Option(2, help="Image processes; leave cores for the API"),
+    max_mb_per_sec: float = typer.Option(10.0, help="Disk throughput cap (read + written); 0 disables"),
+    limit: int = typer.Option(0, help="Stop after this many files; 0 processes all"),
+    restart: bool = typer.Option(False, help="Ignore the checkpoint and start over"),
+    dry_run: bool = typer.Option(False, help="Only count the files that would be processed")
+):
+    """
+    Recompress uploads that predate the optimized ingest pipeline and build
+    their derivatives, then attach the new assets to every document using
+    them. Interrupted runs resume from the checkpoint; the API can keep
+    serving throughout.
+    """
+    if restart and not dry_run:
+        BACKFILL_CHECKPOINT.unlink(missing_ok=True)
+
+    async def run():
+        client, db = connect_db()
+        try:
+            return await run_backfill(
+                db, workers=workers, max_mb_per_sec=max_mb_per_sec, dry_run=dry_run, limit=limit or None
+            )
+        finally:
+            client.close()
+
+    started = time.monotonic()
+    report = asyncio.run(run())
+    if dry_run:
+        typer.echo(f"{report['candidates']} uploads would be backfilled")
+        return
+    saved = report["bytesBefore"] - report["bytesAfter"]
+    typer.echo(
+        f"Backfilled {report['processed']} uploads ({report['failed']} failed) in {time.monotonic() - started:.1f}s,"
+        f" originals {saved / 1024 / 1024:.1f} MB smaller"
+    )
+
+if __name__ == "__main__":
+    app()
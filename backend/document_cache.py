@@ -0,0 +1,77 @@
+import os
+import copy
+import time
+import asyncio
+from dataclasses import dataclass
+from typing import Awaitable, Callable, Dict, Optional
+
+# Writes invalidate the worker that handled them at once; other workers pick
+# the change up when their copy expires
+DOCUMENT_CACHE_TTL_SECONDS = float(os.environ.get('DOCUMENT_CACHE_TTL_SECONDS', '30'))
+
+@dataclass
+class CachedDocument:
+    document: Optional[dict]
+    loaded: float
+
+class DocumentCache:
+    """
+    In-memory copies of the singleton CMS documents (site settings, about,
+    featured film, ...), keyed by name. Concurrent misses share one load, and
+    a load that races an invalidation is not stored.
+    """
+
+    def __init__(self, ttl_seconds: float = DOCUMENT_CACHE_TTL_SECONDS):
+        self.ttl_seconds = ttl_seconds
+        self._entries: Dict[str, CachedDocument] = {}
+        self._generations: Dict[str, int] = {}
+        self._locks: Dict[str, asyncio.Lock] = {}
+        self._hits: Dict[str, int] = {}
+        self._misses: Dict[str, int] = {}
+
+    def _fresh(self, key: str) -> Optional[CachedDocument]:
+        entry = self._entries.get(key)
+        if entry is not None and time.monotonic() - entry.loaded <= self.ttl_seconds:
+            return entry
+        return None
+
+    async def get(self, key: str, load: Callable[[], Awaitable[Optional[dict]]]) -> Optional[dict]:
+        """The cached document, or the result of load(); callers get their own copy"""
+        entry = self._fresh(key)
+        if entry is None:
+            self._misses[key] = self._misses.get(key, 0) + 1
+            async with self._locks.setdefault(key, asyncio.Lock()):
+                entry = self._fresh(key)
+                if entry is None:
+                    generation = self._generations.get(key, 0)
+                    entry = CachedDocument(document=await load(), loaded=time.monotonic())
+                    if self._generations.get(key, 0) == generation:
+                        self._entries[key] = entry
+        else:
+            self._hits[key] = self._hits.get(key, 0) + 1
+        return copy.deepcopy(entry.document)
+
+    def invalidate(self, key: str):
+        self._entries.pop(key, None)
+        self._generations[key] = self._generations.get(key, 0) + 1
+
+    def stats(self) -> dict:
+        keys = sorted(set(self._hits) | set(self._misses))
+        documents = {
+            key: {
+                "hits": self._hits.get(key, 0),
+                "misses": self._misses.get(key, 0),
+                "hitRate": self._hits.get(key, 0) / (self._hits.get(key, 0) + self._misses.get(key, 0)),
+                "cached": self._fresh(key) is not None
+            }
+            for key in keys
+        }
+        hits = sum(self._hits.values())
+        lookups = hits + sum(self._misses.values())
+        return {
+            "hits": hits,
+            "misses": lookups - hits,
+            "hitRate": hits / lookups if lookups else 0.0,
+            "ttlSeconds": self.ttl_seconds,
+            "documents": documents
+        }
@@ -0,0 +1,110 @@
+import os
+import time
+import asyncio
+import logging
+from dataclasses import dataclass
+from typing import Any, Awaitable, Callable, Dict, Hashable
+
+logger = logging.getLogger(__name__)
+
+FACEBOOK_POSTS_FRESH_SECONDS = float(os.environ.get('FACEBOOK_POSTS_FRESH_SECONDS', '300'))
+FACEBOOK_POSTS_STALE_SECONDS = float(os.environ.get('FACEBOOK_POSTS_STALE_SECONDS', '3600'))
+# After a failed fetch, callers get the fallback instead of retrying at once
+FEED_RETRY_SECONDS = float(os.environ.get('FEED_RETRY_SECONDS', '60'))
+
+@dataclass
+class FeedEntry:
+    value: Any
+    fetched: float
+
+class FeedCache:
+    """
+    Last good result of an external feed. It is served as is while fresh,
+    then for a stale window while a background refresh replaces it; only a
+    missing or expired entry makes the caller wait, unless it passes
+    wait=False. Concurrent refreshes of a key share one fetch.
+    """
+
+    def __init__(
+        self,
+        fresh_seconds: float,
+        stale_seconds: float,
+        retry_seconds: float = FEED_RETRY_SECONDS
+    ):
+        self.fresh_seconds = fresh_seconds
+        self.stale_seconds = stale_seconds
+        self.retry_seconds = retry_seconds
+        self._entries: Dict[Hashable, FeedEntry] = {}
+        self._refreshes: Dict[Hashable, asyncio.Task] = {}
+        self._failed: Dict[Hashable, float] = {}
+        self._generation = 0
+
+    def _retry_pending(self, key: Hashable) -> bool:
+        failed = self._failed.get(key)
+        return failed is not None and time.monotonic() - failed < self.retry_seconds
+
+    async def get(
+        self,
+        key: Hashable,
+        fetch: Callable[[], Awaitable[Any]],
+        fallback: Any = None,
+        wait: bool = True
+    ) -> Any:
+        entry = self._entries.get(key)
+        age = time.monotonic() - entry.fetched if entry is not None else None
+        if age is not None and age <= self.fresh_seconds:
+            return entry.value
+        if age is not None and age <= self.fresh_seconds + self.stale_seconds:
+            if not self._retry_pending(key):
+                self.refresh(key, fetch)
+            return entry.value
+
+        if self._retry_pending(key):
+            return fallback
+        if not wait:
+            # The fallback now, the fetched value to a later caller
+            self.refresh(key, fetch)
+            return fallback
+        try:
+            # Shielded so one client going away does not cancel everyone's fetch
+            return await asyncio.shield(self.refresh(key, fetch))
+        except Exception:
+            return fallback
+
+    def refresh(self, key: Hashable, fetch: Callable[[], Awaitable[Any]]) -> asyncio.Task:
+        """Start fetching a key in the background, or join the fetch already running"""
+        task = self._refreshes.get(key)
+        if task is None:
+            task = asyncio.create_task(self._fetch(key, fetch, self._generation))
+            self._refreshes[key] = task
+            task.add_done_callback(lambda done: self._finished(key, done))
+        return task
+
+    async def _fetch(self, key: Hashable, fetch: Callable[[], Awaitable[Any]], generation: int) -> Any:
+        try:
+            value = await fetch()
+        except Exception as e:
+            logger.error(f"Feed refresh failed: {e}")
+            if generation == self._generation:
+                self._failed[key] = time.monotonic()
+            raise
+        # A fetch started before invalidate() must not bring old settings back
+        if generation == self._generation:
+            self._entries[key] = FeedEntry(value=value, fetched=time.monotonic())
+            self._failed.pop(key, None)
+        return value
+
+    def _finished(self, key: Hashable, task: asyncio.Task):
+        if self._refreshes.get(key) is task:
+            del self._refreshes[key]
+        if not task.cancelled():
+            # Background refreshes have no awaiting caller; errors are logged above
+            task.exception()
+
+    def invalidate(self):
+        """Forget every entry, e.g. when the feed's account changes"""
+        self._entries.clear()
+        self._failed.clear()
+        self._refreshes.clear()
+        self._generation += 1
+
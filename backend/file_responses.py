@@ -0,0 +1,218 @@
+import os
+import re
+import anyio
+from email.utils import formatdate, parsedate_to_datetime
+from mimetypes import guess_type
+from pathlib import Path
+from typing import Optional, Tuple
+from fastapi.responses import FileResponse, JSONResponse, Response
+from starlette.datastructures import Headers
+from upload_layout import relative_location
+
+# Hand the byte transfer to the front proxy: "nginx" sends X-Accel-Redirect,
+# "sendfile" sends X-Sendfile (Apache mod_xsendfile, lighttpd). Empty disables.
+UPLOAD_OFFLOAD_MODE = os.environ.get('UPLOAD_OFFLOAD_MODE', '').lower()
+# nginx "internal" location that aliases UPLOAD_DIR; with UPLOAD_VOLUMES,
+# volume N is expected under <prefix>/vN/
+UPLOAD_OFFLOAD_PREFIX = os.environ.get('UPLOAD_OFFLOAD_PREFIX', '/protected-uploads/')
+
+# UUID- and content-named uploads never change once written
+IMMUTABLE_CACHE_CONTROL = "public, max-age=31536000, immutable"
+DEFAULT_CACHE_CONTROL = "public, max-age=3600"
+
+IMMUTABLE_UPLOAD_RE = re.compile(
+    r"^(?:[a-z]+_)?"
+    r"(?:[0-9a-f]{8}-[0-9a-f]{4}-[0-9a-f]{4}-[0-9a-f]{4}-[0-9a-f]{12}|[0-9a-f]{64})"
+    r"(?:_w\d+)?\.[a-z0-9]+$"
+)
+
+def cache_control_for(filename: str) -> str:
+    if IMMUTABLE_UPLOAD_RE.match(filename):
+        return IMMUTABLE_CACHE_CONTROL
+    return DEFAULT_CACHE_CONTROL
+
+def quote_etag(tag: str) -> str:
+    return f'"{tag}"'
+
+def stat_etag(stat_result: os.stat_result) -> str:
+    """Validator for files without a recorded digest; needs a stat, not a hash"""
+    return quote_etag(f"{stat_result.st_mtime_ns:x}-{stat_result.st_size:x}")
+
+def http_date(timestamp: float) -> str:
+    return formatdate(timestamp, usegmt=True)
+
+def etag_matches(if_none_match: str, etag: str) -> bool:
+    """Weak comparison of an If-None-Match header against our ETag"""
+    if if_none_match.strip() == "*":
+        return True
+    candidates = [tag.strip() for tag in if_none_match.split(",")]
+    return any(tag.removeprefix("W/") == etag for tag in candidates)
+
+def is_not_modified(request_headers: Headers, etag: str, last_modified: float) -> bool:
+    """
+    Evaluate If-None-Match / If-Modified-Since. If-None-Match takes precedence,
+    as required by RFC 9110, and uses weak comparison.
+    """
+    if_none_match = request_headers.get("if-none-match")
+    if if_none_match is not None:
+        return etag_matches(if_none_match, etag)
+
+    if_modified_since = request_headers.get("if-modified-since")
+    if if_modified_since:
+        try:
+            since = parsedate_to_datetime(if_modified_since).timestamp()
+        except (TypeError, ValueError):
+            return False
+        return int(last_modified) <= since
+
+    return False
+
+def validator_headers(etag: str, last_modified: float, filename: str) -> dict:
+    return {
+        "ETag": etag,
+        "Last-Modified": http_date(last_modified),
+        "Cache-Control": cache_control_for(filename),
+    }
+
+RANGE_RE = re.compile(r"^bytes=(\d*)-(\d*)$")
+
+def parse_range(range_header: str, size: int) -> Optional[Tuple[int, int]]:
+    """
+    Parse a single-range Range header into an inclusive (start, end) pair.
+    Returns None when the header should be ignored (multi-range or malformed)
+    and raises ValueError when the range cannot be satisfied.
+    """
+    match = RANGE_RE.match(range_header.strip())
+    if not match:
+        return None
+    first, last = match.groups()
+    if not first and not last:
+        return None
+
+    if not first:
+        # Suffix range: the final N bytes
+        length = int(last)
+        if length == 0:
+            raise ValueError("Empty suffix range")
+        return max(0, size - length), size - 1
+
+    start = int(first)
+    end = int(last) if last else size - 1
+    if start >= size or end < start:
+        raise ValueError("Range not satisfiable")
+    return start, min(end, size - 1)
+
+def if_range_matches(request_headers: Headers, etag: str, last_modified: float) -> bool:
+    """A Range request is only honored when If-Range still matches the representation"""
+    if_range = request_headers.get("if-range")
+    if if_range is None:
+        return True
+    if_range = if_range.strip()
+    if if_range.startswith('"') or if_range.startswith("W/"):
+        # Strong comparison: weak tags never match
+        return if_range == etag
+    return if_range == http_date(last_modified)
+
+class UploadFileResponse(FileResponse):
+    """
+    FileResponse with single byte-range (206) support. The body goes out through
+    the server's zero-copy sendfile extension when it offers one, otherwise it is
+    streamed in chunks from a worker thread.
+    """
+
+    def __init__(self, path, request_headers: Headers, stat_result: os.stat_result, **kwargs):
+        super().__init__(path, stat_result=stat_result, **kwargs)
+        self.headers["accept-ranges"] = "bytes"
+        self.range = None
+
+        size = stat_result.st_size
+        range_header = request_headers.get("range")
+        if range_header is None or not if_range_matches(
+            request_headers, self.headers.get("etag", ""), stat_result.st_mtime
+        ):
+            return
+
+        try:
+            self.range = parse_range(range_header, size)
+        except ValueError:
+            self.status_code = 416
+            self.headers["content-range"] = f"bytes */{size}"
+            self.headers["content-length"] = "0"
+            return
+
+        if self.range is not None:
+            start, end = self.range
+            self.status_code = 206
+            self.headers["content-range"] = f"bytes {start}-{end}/{size}"
+            self.headers["content-length"] = str(end - start + 1)
+
+    async def __call__(self, scope, receive, send):
+        # Opened before the status goes out, so a file deleted since the
+        # caller's stat() is still answered with a 404
+        try:
+            file = await anyio.open_file(self.path, mode="rb")
+        except OSError:
+            await JSONResponse({"detail": "File not found"}, status_code=404)(scope, receive, send)
+            return
+
+        async with file:
+            await send({
+                "type": "http.response.start",
+                "status": self.status_code,
+                "headers": self.raw_headers,
+            })
+
+            extensions = scope.get("extensions") or {}
+            if scope["method"].upper() == "HEAD" or self.status_code == 416:
+                await send({"type": "http.response.body", "body": b"", "more_body": False})
+                return
+
+            if self.range is None:
+                start, count = 0, self.stat_result.st_size
+            else:
+                start, count = self.range[0], self.range[1] - self.range[0] + 1
+
+            if self.range is None and "http.response.pathsend" in extensions:
+                await send({"type": "http.response.pathsend", "path": str(self.path)})
+            elif "http.response.zerocopysend" in extensions:
+                await send({
+                    "type": "http.response.zerocopysend",
+                    "file": file.wrapped,
+                    "offset": start,
+                    "count": count,
+                    "more_body": False,
+                })
+            else:
+                await file.seek(start)
+                remaining = count
+                more_body = True
+                while more_body:
+                    chunk = await file.read(min(self.chunk_size, remaining))
+                    remaining -= len(chunk)
+                    more_body = bool(chunk) and remaining > 0
+                    await send({
+                        "type": "http.response.body",
+                        "body": chunk,
+                        "more_body": more_body,
+                    })
+
+        if self.background is not None:
+            await self.background()
+
+def offload_response(file_path: Path, root: Path, headers: dict) -> Optional[Response]:
+    """
+    Build a bodiless response telling the front proxy which file to send, or
+    None when offloading is disabled. Lookups, validation and conditional
+    requests have already been handled by the caller; the proxy takes care of
+    ranges and the actual transfer.
+    """
+    if UPLOAD_OFFLOAD_MODE == "nginx":
+        relative = relative_location(root, file_path)
+        offload_header = {"X-Accel-Redirect": UPLOAD_OFFLOAD_PREFIX.rstrip("/") + "/" + relative}
+    elif UPLOAD_OFFLOAD_MODE == "sendfile":
+        offload_header = {"X-Sendfile": str(file_path.resolve())}
+    else:
+        return None
+
+    media_type = guess_type(file_path.name)[0] or "application/octet-stream"
+    return Response(headers={**headers, **offload_header}, media_type=media_type)
@@ -1,14 +1,87 @@
 import os
 import uuid
+import shutil
+import asyncio
+import hashlib
+from collections import OrderedDict
+from datetime import datetime
 from pathlib import Path
+from typing import Callable, List, Optional, Tuple
 from fastapi import UploadFile, HTTPException
-import shutil
+from fastapi.responses import JSONResponse
+from starlette.concurrency import run_in_threadpool
+from starlette.datastructures import Headers
+from pymongo import ReturnDocument
+from image_processing import build_derivatives, build_normalized_original, derivative_glob
+from file_responses import cache_control_for
+from storage import create_storage
+from upload_layout import move_file, placement_path, resolve_path
 
 UPLOAD_DIR = Path(os.environ.get('UPLOAD_DIR', '/app/backend/uploads'))
 UPLOAD_DIR.mkdir(exist_ok=True)
 
 ALLOWED_IMAGE_EXTENSIONS = {".jpg", ".jpeg", ".png", ".webp"}
 MAX_FILE_SIZE = 10 * 1024 * 1024  # 10MB
+UPLOAD_CHUNK_SIZE = 1024 * 1024  # 1MB
+
+# Request-level limits, checked before the multipart body is spooled
+MAX_FILES_PER_REQUEST = int(os.environ.get('MAX_FILES_PER_REQUEST', '50'))
+MULTIPART_OVERHEAD = 64 * 1024  # form fields and part headers
+MAX_SINGLE_UPLOAD_REQUEST_SIZE = MAX_FILE_SIZE + MULTIPART_OVERHEAD
+MAX_BATCH_UPLOAD_REQUEST_SIZE = MAX_FILE_SIZE * MAX_FILES_PER_REQUEST + MULTIPART_OVERHEAD
+BATCH_UPLOAD_PATH_SUFFIXES = ("/images", "/images/batch")
+
+# How many images of one gallery batch are ingested at the same time
+UPLOAD_CONCURRENCY = int(os.environ.get('UPLOAD_CONCURRENCY', '4'))
+
+# Storage mode: "uuid" names every upload uniquely, "content" keys files by
+# SHA-256 so identical uploads share one file, reference-counted in Mongo
+UPLOAD_STORAGE_MODE = os.environ.get('UPLOAD_STORAGE_MODE', 'uuid').lower()
+CONTENT_ADDRESSED = UPLOAD_STORAGE_MODE == "content"
+
+# Ingest stage for JPEG originals: re-encode as progressive JPEG without
+# camera metadata. The untouched upload is kept in .originals/ only when
+# archiving is enabled.
+INGEST_REENCODE = os.environ.get('INGEST_REENCODE', 'true').lower() in ('1', 'true', 'yes')
+INGEST_JPEG_QUALITY = int(os.environ.get('INGEST_JPEG_QUALITY', '85'))
+ARCHIVE_ORIGINALS = os.environ.get('UPLOAD_ARCHIVE_ORIGINALS', 'false').lower() in ('1', 'true', 'yes')
+ORIGINALS_DIR = UPLOAD_DIR / ".originals"
+if ARCHIVE_ORIGINALS:
+    ORIGINALS_DIR.mkdir(exist_ok=True)
+
+# Deep Zoom tile pyramids, one directory per original stem, built on request
+TILES_DIR = UPLOAD_DIR / ".tiles"
+
+# Where uploads are kept for good; UPLOAD_DIR is always the working copy
+storage = create_storage(UPLOAD_DIR, cache_control_for)
+
+# Collection holding one {filename, refs, sha256, derivatives, width, height,
+# placeholder} document per stored upload; set by the app at startup
+_upload_refs = None
+
+# Content digests recorded at upload time, memoized for serving validators,
+# and each original's width and derivatives, memoized for negotiation
+DIGEST_CACHE_SIZE = 10000
+_digest_cache: "OrderedDict[str, str]" = OrderedDict()
+_variants_cache: "OrderedDict[str, Tuple[Optional[int], List[dict]]]" = OrderedDict()
+
+# Callbacks run with the filename whenever an upload is removed from disk
+_delete_hooks: List[Callable[[str], None]] = []
+
+def upload_path(filename: str) -> Path:
+    """Location of a stored upload under UPLOAD_DIR, whatever the layout"""
+    return resolve_path(UPLOAD_DIR, filename)
+
+def _move_into_place(temp_path: Path, filename: str):
+    # Temp files live in UPLOAD_DIR, which may be another device than the volume
+    move_file(temp_path, placement_path(UPLOAD_DIR, filename))
+
+def tiles_name(filename: str) -> str:
+    """Storage name of an upload's tile pyramid directory"""
+    return f"{TILES_DIR.name}/{Path(filename).stem}"
+
+def deep_zoom_url(filename: str) -> str:
+    return f"/api/tiles/{Path(filename).stem}.dzi"
 
 def get_file_extension(filename: str) -> str:
     return Path(filename).suffix.lower()
@@ -16,42 +89,406 @@ def get_file_extension(filename: str) -> str:
 def is_allowed_image(filename: str) -> bool:
     return get_file_extension(filename) in ALLOWED_IMAGE_EXTENSIONS
 
-async def save_upload_file(upload_file: UploadFile, prefix: str = "") -> str:
+def content_filename(digest: str, extension: str) -> str:
+    # .jpg and .jpeg uploads of the same bytes must map to one file
+    if extension == ".jpeg":
+        extension = ".jpg"
+    return f"{digest}{extension}"
+
+def configure_upload_refs(collection):
+    """Register the collection used to track and reference-count stored uploads"""
+    global _upload_refs
+    _upload_refs = collection
+
+def register_delete_hook(hook: Callable[[str], None]):
+    """Get notified when an upload is deleted, e.g. to drop cached copies"""
+    _delete_hooks.append(hook)
+
+def file_too_large() -> HTTPException:
+    return HTTPException(
+        status_code=413,
+        detail=f"File too large. Maximum size is {MAX_FILE_SIZE // (1024 * 1024)}MB"
+    )
+
+async def add_upload_ref(filename: str, digest: str):
+    """Record one more document referencing a stored file, with its content digest"""
+    await _upload_refs.update_one(
+        {"filename": filename},
+        {
+            "$inc": {"refs": 1},
+            "$set": {"sha256": digest},
+            "$setOnInsert": {"createdAt": datetime.utcnow()}
+        },
+        upsert=True
+    )
+
+async def get_upload_ref(filename: str) -> Optional[dict]:
+    if _upload_refs is None:
+        return None
+    return await _upload_refs.find_one({"filename": filename})
+
+def _remember(cache: OrderedDict, key: str, value):
+    cache[key] = value
+    cache.move_to_end(key)
+    if len(cache) > DIGEST_CACHE_SIZE:
+        cache.popitem(last=False)
+
+async def _lookup_upload(filename: str):
+    """Fill the digest and variant caches for a file from its upload_refs entry"""
+    ref = None
+    if _upload_refs is not None:
+        ref = await _upload_refs.find_one(
+            {"$or": [{"filename": filename}, {"derivatives.filename": filename}]},
+            {"filename": 1, "sha256": 1, "width": 1, "derivatives": 1}
+        )
+    digest = ""
+    variants = (None, [])
+    if ref and ref["filename"] == filename:
+        digest = ref.get("sha256") or ""
+        variants = (ref.get("width"), ref.get("derivatives") or [])
+    elif ref:
+        for derivative in ref.get("derivatives", []):
+            if derivative["filename"] == filename:
+                digest = derivative.get("sha256") or ""
+    
+    _remember(_digest_cache, filename, digest)
+    _remember(_variants_cache, filename, variants)
+
+async def get_upload_digest(filename: str) -> Optional[str]:
     """
-    Save uploaded file and return the URL path
+    SHA-256 recorded for an original or derivative when it was stored, used as
+    a strong validator without hashing at serve time. None for legacy files.
+    """
+    if filename in _digest_cache:
+        _digest_cache.move_to_end(filename)
+    else:
+        await _lookup_upload(filename)
+    return _digest_cache[filename] or None
+
+async def get_upload_variants(filename: str) -> Tuple[Optional[int], List[dict]]:
     """
-    if not is_allowed_image(upload_file.filename):
+    Recorded width of an original and its derivatives ({filename, width,
+    format}). Derivatives and legacy files have none.
+    """
+    if filename in _variants_cache:
+        _variants_cache.move_to_end(filename)
+    else:
+        await _lookup_upload(filename)
+    return _variants_cache[filename]
+
+async def release_upload_ref(filename: str) -> bool:
+    """
+    Drop one reference to a file. Returns True when nothing references it
+    any more; files that were never tracked (legacy uploads) count as unreferenced.
+    """
+    if _upload_refs is None:
+        return True
+    
+    ref = await _upload_refs.find_one_and_update(
+        {"filename": filename},
+        {"$inc": {"refs": -1}},
+        return_document=ReturnDocument.AFTER
+    )
+    if ref is None:
+        return True
+    if ref["refs"] > 0:
+        return False
+    
+    result = await _upload_refs.delete_one({"filename": filename, "refs": {"$lte": 0}})
+    return result.deleted_count == 1
+
+def _write_chunk(buffer, digest, chunk: bytes):
+    digest.update(chunk)
+    buffer.write(chunk)
+
+async def write_upload_stream(upload_file: UploadFile, temp_path: Path) -> Tuple[int, str]:
+    """
+    Stream an upload to temp_path in chunks without blocking the event loop.
+    Aborts as soon as MAX_FILE_SIZE is exceeded. Returns the byte count and
+    the SHA-256 hex digest of the content.
+    """
+    written = 0
+    digest = hashlib.sha256()
+    buffer = await run_in_threadpool(open, temp_path, "wb")
+    try:
+        while chunk := await upload_file.read(UPLOAD_CHUNK_SIZE):
+            written += len(chunk)
+            if written > MAX_FILE_SIZE:
+                raise file_too_large()
+            await run_in_threadpool(_write_chunk, buffer, digest, chunk)
+        await run_in_threadpool(buffer.close)
+    except BaseException:
+        await run_in_threadpool(buffer.close)
+        temp_path.unlink(missing_ok=True)
+        raise
+    return written, digest.hexdigest()
+
+def validate_image_filename(filename: str):
+    if not is_allowed_image(filename):
         raise HTTPException(
             status_code=400,
             detail=f"File type not allowed. Allowed types: {', '.join(ALLOWED_IMAGE_EXTENSIONS)}"
         )
+
+def hash_file(file_path: Path) -> str:
+    digest = hashlib.sha256()
+    with open(file_path, "rb") as f:
+        while chunk := f.read(UPLOAD_CHUNK_SIZE):
+            digest.update(chunk)
+    return digest.hexdigest()
+
+async def reencode_jpeg_upload(temp_path: Path) -> Optional[Path]:
+    """
+    Replace a JPEG temp file with its normalized re-encode. An upload without
+    metadata, rotation or colour conversion to undo is only replaced when the
+    re-encode is smaller, as in backfill. Returns where the untouched upload
+    was set aside when archiving, otherwise None.
+    """
+    encoded_path = temp_path.with_name(f"{temp_path.name}.jpg")
+    try:
+        changed = await build_normalized_original(temp_path, encoded_path, INGEST_JPEG_QUALITY)
+    except Exception:
+        encoded_path.unlink(missing_ok=True)
+        raise HTTPException(status_code=400, detail="Invalid image file")
     
-    # Generate unique filename
-    file_extension = get_file_extension(upload_file.filename)
-    unique_filename = f"{prefix}_{uuid.uuid4()}{file_extension}"
-    file_path = UPLOAD_DIR / unique_filename
+    if not changed and encoded_path.stat().st_size >= temp_path.stat().st_size:
+        encoded_path.unlink()
+        return None
     
-    # Save file
+    original_path = None
+    if ARCHIVE_ORIGINALS:
+        original_path = temp_path.with_name(f"{temp_path.name}.original")
+        await run_in_threadpool(os.replace, temp_path, original_path)
+    await run_in_threadpool(os.replace, encoded_path, temp_path)
+    return original_path
+
+async def store_upload_file(temp_path: Path, original_filename: str, prefix: str = "", digest: Optional[str] = None) -> str:
+    """
+    Move a fully written temp file into UPLOAD_DIR under its final name and
+    return the URL path. Shared by direct and resumable uploads.
+    """
+    file_extension = get_file_extension(original_filename)
+    original_path = None
     try:
-        with open(file_path, "wb") as buffer:
-            shutil.copyfileobj(upload_file.file, buffer)
+        if INGEST_REENCODE and file_extension in (".jpg", ".jpeg"):
+            original_path = await reencode_jpeg_upload(temp_path)
+            digest = None
+        if digest is None:
+            digest = await run_in_threadpool(hash_file, temp_path)
+        if CONTENT_ADDRESSED:
+            unique_filename = content_filename(digest, file_extension)
+        else:
+            unique_filename = f"{prefix}_{uuid.uuid4()}{file_extension}"
+        await add_upload_ref(unique_filename, digest)
+        # Identical content simply replaces the existing copy atomically
+        await run_in_threadpool(_move_into_place, temp_path, unique_filename)
+        stored = [unique_filename]
+        if original_path is not None:
+            await run_in_threadpool(os.replace, original_path, ORIGINALS_DIR / unique_filename)
+            stored.append(f"{ORIGINALS_DIR.name}/{unique_filename}")
+        await storage.publish(stored)
     except Exception as e:
+        temp_path.unlink(missing_ok=True)
+        if original_path is not None:
+            original_path.unlink(missing_ok=True)
+        if isinstance(e, HTTPException):
+            raise
         raise HTTPException(status_code=500, detail=f"Failed to save file: {str(e)}")
     
     # Return URL path
     return f"/api/uploads/{unique_filename}"
 
-def delete_file(file_url: str) -> bool:
+async def save_upload_file(upload_file: UploadFile, prefix: str = "") -> str:
     """
-    Delete file from uploads directory
+    Save uploaded file and return the URL path
+    """
+    validate_image_filename(upload_file.filename)
+    
+    # Reject early when the multipart parser already knows the size
+    if upload_file.size is not None and upload_file.size > MAX_FILE_SIZE:
+        raise file_too_large()
+    
+    # Save file; the final name is only known once the content is hashed
+    temp_path = UPLOAD_DIR / f".{uuid.uuid4()}.part"
+    try:
+        _, digest = await write_upload_stream(upload_file, temp_path)
+    except HTTPException:
+        raise
+    except Exception as e:
+        raise HTTPException(status_code=500, detail=f"Failed to save file: {str(e)}")
+    
+    return await store_upload_file(temp_path, upload_file.filename, prefix, digest)
+
+async def save_image_upload(upload_file: UploadFile, prefix: str = "") -> dict:
+    """
+    Save an uploaded image and generate its responsive derivatives.
+    Returns the original URL together with the derivative variants.
+    """
+    file_url = await save_upload_file(upload_file, prefix)
+    return await build_image_asset(file_url)
+
+async def build_image_asset(file_url: str) -> dict:
+    """
+    Generate derivatives for a stored original and describe them as an ImageAsset.
+    The original is deleted again when it turns out not to be a valid image.
+    """
+    filename = file_url.split("/")[-1]
+    
+    # Deduplicated content already has its derivatives on disk
+    ref = await get_upload_ref(filename) if CONTENT_ADDRESSED else None
+    if ref and ref.get("derivatives"):
+        built = ref
+    else:
+        try:
+            built = await build_derivatives(upload_path(filename))
+        except Exception:
+            await delete_file(file_url)
+            raise HTTPException(status_code=400, detail="Invalid image file")
+        await storage.publish([derivative["filename"] for derivative in built["derivatives"]])
+        await _upload_refs.update_one({"filename": filename}, {"$set": built})
+        _variants_cache.pop(filename, None)
+    
+    return image_asset_for(file_url, built)
+
+def image_asset_for(file_url: str, built: dict) -> dict:
+    """ImageAsset for an original from its recorded dimensions and derivatives"""
+    return {
+        "url": file_url,
+        "width": built.get("width"),
+        "height": built.get("height"),
+        "placeholder": built.get("placeholder"),
+        "deepZoomUrl": deep_zoom_url(file_url) if built.get("tiles") else None,
+        "variants": [
+            {
+                "url": f"/api/uploads/{derivative['filename']}",
+                "width": derivative["width"],
+                "format": derivative["format"]
+            }
+            for derivative in built["derivatives"]
+        ]
+    }
+
+async def save_image_uploads(
+    upload_files: List[UploadFile],
+    prefix: str = "",
+    concurrency: int = UPLOAD_CONCURRENCY
+) -> List[dict]:
+    """
+    Save several images with bounded concurrency. A failing file does not
+    affect the others; one result per file is returned in input order.
+    """
+    semaphore = asyncio.Semaphore(concurrency)
+    
+    async def ingest(upload_file: UploadFile) -> dict:
+        async with semaphore:
+            try:
+                asset = await save_image_upload(upload_file, prefix)
+                return {"filename": upload_file.filename, "success": True, "asset": asset}
+            except HTTPException as e:
+                return {"filename": upload_file.filename, "success": False, "error": e.detail}
+            except Exception as e:
+                return {"filename": upload_file.filename, "success": False, "error": str(e)}
+    
+    return await asyncio.gather(*(ingest(upload_file) for upload_file in upload_files))
+
+def _upload_paths(filename: str) -> List[Path]:
+    """Every file belonging to an upload: derivatives, archived original, itself"""
+    file_path = upload_path(filename)
+    return [*file_path.parent.glob(derivative_glob(file_path.stem)), ORIGINALS_DIR / filename, file_path]
+
+def _unlink_paths(paths: List[Path]) -> int:
+    """Unlink files and return how many bytes that freed"""
+    reclaimed = 0
+    for path in paths:
+        try:
+            size = path.stat().st_size
+            path.unlink()
+        except FileNotFoundError:
+            continue
+        reclaimed += size
+    return reclaimed
+
+async def remove_upload(filename: str) -> int:
+    """
+    Drop everything cached about an upload and delete its files, locally and
+    in object storage. Caches are touched on the event loop, disk I/O in a
+    worker thread. Returns the number of bytes reclaimed.
+    """
+    paths = await run_in_threadpool(_upload_paths, filename)
+    for path in paths:
+        _digest_cache.pop(path.name, None)
+    _variants_cache.pop(filename, None)
+    for hook in _delete_hooks:
+        hook(filename)
+    reclaimed = await run_in_threadpool(_unlink_paths, paths)
+    await run_in_threadpool(shutil.rmtree, UPLOAD_DIR / tiles_name(filename), True)
+    if storage.remote:
+        # The local files were only a cache; count what the bucket frees.
+        # Other nodes may have built derivatives this one never saw.
+        names = await storage.list_prefix(derivative_glob(Path(filename).stem).rstrip("*"))
+        names += await storage.list_prefix(f"{tiles_name(filename)}/")
+        names += [f"{ORIGINALS_DIR.name}/{filename}", filename]
+        reclaimed = await storage.delete(names)
+    return reclaimed
+
+async def delete_file(file_url: str) -> bool:
+    """
+    Delete file from uploads directory. Content-addressed files are only
+    unlinked once their last reference has been released.
     """
     try:
         if file_url and file_url.startswith("/api/uploads/"):
             filename = file_url.split("/")[-1]
-            file_path = UPLOAD_DIR / filename
-            if file_path.exists():
-                file_path.unlink()
-                return True
+            if not await release_upload_ref(filename):
+                return False
+            return await remove_upload(filename) > 0
     except Exception:
         pass
-    return False
\ No newline at end of file
+    return False
+
+async def purge_upload(filename: str) -> int:
+    """Remove an unreferenced upload regardless of its reference count"""
+    await _upload_refs.delete_one({"filename": filename})
+    return await remove_upload(filename)
+
+class UploadSizeLimitMiddleware:
+    """
+    Reject oversize multipart uploads before Starlette spools them to disk.
+    Checks Content-Length up front and counts streamed bytes for chunked bodies.
+    """
+    def __init__(self, app):
+        self.app = app
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http" or scope["method"] not in ("POST", "PUT"):
+            await self.app(scope, receive, send)
+            return
+
+        headers = Headers(scope=scope)
+        if not headers.get("content-type", "").startswith("multipart/form-data"):
+            await self.app(scope, receive, send)
+            return
+
+        if scope["path"].endswith(BATCH_UPLOAD_PATH_SUFFIXES):
+            limit = MAX_BATCH_UPLOAD_REQUEST_SIZE
+        else:
+            limit = MAX_SINGLE_UPLOAD_REQUEST_SIZE
+
+        content_length = headers.get("content-length", "")
+        if content_length.isdigit() and int(content_length) > limit:
+            response = JSONResponse({"detail": "Upload too large"}, status_code=413)
+            await response(scope, receive, send)
+            return
+
+        received = 0
+
+        async def limited_receive():
+            nonlocal received
+            message = await receive()
+            if message["type"] == "http.request":
+                received += len(message.get("body", b""))
+                if received > limit:
+                    raise HTTPException(status_code=413, detail="Upload too large")
+            return message
+
+        await self.app(scope, limited_receive, send)
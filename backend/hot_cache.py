@@ -0,0 +1,131 @@
+import os
+import errno
+import time
+from collections import OrderedDict
+from dataclasses import dataclass
+from mimetypes import guess_type
+from pathlib import Path
+from typing import Optional
+from fastapi.responses import Response
+from starlette.concurrency import run_in_threadpool
+
+HOT_CACHE_MAX_BYTES = int(os.environ.get('HOT_CACHE_MAX_MB', '64')) * 1024 * 1024
+HOT_CACHE_MAX_FILE_BYTES = int(os.environ.get('HOT_CACHE_MAX_FILE_KB', '2048')) * 1024
+# Entries are re-checked against the file this often, which bounds how long
+# a worker can keep serving a file another worker deleted
+HOT_CACHE_REVALIDATE_SECONDS = float(os.environ.get('HOT_CACHE_REVALIDATE_SECONDS', '10'))
+
+@dataclass
+class HotFile:
+    path: Path
+    body: bytes
+    headers: dict
+    media_type: str
+    last_modified: float
+    mtime_ns: int
+    checked: float
+
+    def response(self, extra_headers: Optional[dict] = None) -> Response:
+        return Response(
+            self.body,
+            media_type=self.media_type,
+            headers={**self.headers, **(extra_headers or {}), "Accept-Ranges": "bytes"}
+        )
+
+def read_unchanged(path: Path, stat_result: os.stat_result) -> bytes:
+    """Bytes of a file, checked against stat_result through the same descriptor"""
+    with open(path, "rb") as file:
+        current = os.fstat(file.fileno())
+        if current.st_mtime_ns != stat_result.st_mtime_ns or current.st_size != stat_result.st_size:
+            raise FileNotFoundError(errno.ENOENT, "File changed while being served", str(path))
+        return file.read()
+
+class HotFileCache:
+    """
+    Byte-budgeted LRU of small, frequently served upload files held in memory,
+    together with the validator headers computed when they were loaded. A hit
+    costs no filesystem or database access.
+    """
+
+    def __init__(
+        self,
+        max_bytes: int = HOT_CACHE_MAX_BYTES,
+        max_file_bytes: int = HOT_CACHE_MAX_FILE_BYTES,
+        revalidate_seconds: float = HOT_CACHE_REVALIDATE_SECONDS
+    ):
+        self.max_bytes = max_bytes
+        self.max_file_bytes = max_file_bytes
+        self.revalidate_seconds = revalidate_seconds
+        self._entries: "OrderedDict[str, HotFile]" = OrderedDict()
+        self._total_bytes = 0
+        self.hits = 0
+        self.misses = 0
+
+    def accepts(self, size: int) -> bool:
+        return size <= self.max_file_bytes and size <= self.max_bytes
+
+    def get(self, filename: str) -> Optional[HotFile]:
+        entry = self._entries.get(filename)
+        if entry is not None and time.monotonic() - entry.checked > self.revalidate_seconds:
+            try:
+                stat_result = entry.path.stat()
+            except OSError:
+                stat_result = None
+            if stat_result is None or stat_result.st_mtime_ns != entry.mtime_ns:
+                self._remove(filename)
+                entry = None
+            else:
+                entry.checked = time.monotonic()
+
+        if entry is None:
+            self.misses += 1
+            return None
+        self.hits += 1
+        self._entries.move_to_end(filename)
+        return entry
+
+    async def load(self, path: Path, stat_result: os.stat_result, headers: dict) -> HotFile:
+        """
+        Read a file into the cache; the caller has checked accepts(). Raises
+        OSError when the file was deleted or replaced since stat_result was
+        taken, as the headers would no longer describe it.
+        """
+        body = await run_in_threadpool(read_unchanged, path, stat_result)
+        entry = HotFile(
+            path=path,
+            body=body,
+            headers=headers,
+            media_type=guess_type(path.name)[0] or "application/octet-stream",
+            last_modified=stat_result.st_mtime,
+            mtime_ns=stat_result.st_mtime_ns,
+            checked=time.monotonic()
+        )
+        self._remove(path.name)
+        self._entries[path.name] = entry
+        self._total_bytes += len(body)
+        while self._total_bytes > self.max_bytes:
+            _, evicted = self._entries.popitem(last=False)
+            self._total_bytes -= len(evicted.body)
+        return entry
+
+    def _remove(self, filename: str):
+        entry = self._entries.pop(filename, None)
+        if entry is not None:
+            self._total_bytes -= len(entry.body)
+
+    def discard(self, filename: str):
+        """Drop an upload and its derivatives"""
+        stem = Path(filename).stem
+        for name in [name for name in self._entries if name == filename or name.startswith(f"{stem}_w")]:
+            self._remove(name)
+
+    def stats(self) -> dict:
+        lookups = self.hits + self.misses
+        return {
+            "hits": self.hits,
+            "misses": self.misses,
+            "hitRate": self.hits / lookups if lookups else 0.0,
+            "entries": len(self._entries),
+            "bytes": self._total_bytes,
+            "maxBytes": self.max_bytes
+        }
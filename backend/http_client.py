@@ -0,0 +1,107 @@
+import os
+import random
+import asyncio
+import logging
+from typing import Awaitable, Callable, Dict, Optional
+import httpx
+
+logger = logging.getLogger(__name__)
+
+HTTP_TIMEOUT_SECONDS = float(os.environ.get('HTTP_TIMEOUT_SECONDS', '10'))
+HTTP_CONNECT_TIMEOUT_SECONDS = float(os.environ.get('HTTP_CONNECT_TIMEOUT_SECONDS', '3'))
+HTTP_MAX_CONNECTIONS = int(os.environ.get('HTTP_MAX_CONNECTIONS', '50'))
+# Requests in flight to any one API, so a slow host cannot take every connection
+HTTP_MAX_CONNECTIONS_PER_HOST = int(os.environ.get('HTTP_MAX_CONNECTIONS_PER_HOST', '8'))
+HTTP_RETRIES = int(os.environ.get('HTTP_RETRIES', '2'))
+HTTP_RETRY_BACKOFF_SECONDS = float(os.environ.get('HTTP_RETRY_BACKOFF_SECONDS', '0.5'))
+# Longest Retry-After honoured before giving up on a retry
+HTTP_MAX_RETRY_AFTER_SECONDS = 10.0
+
+# Worth another try: rate limited, or the upstream failed without handling the request
+RETRY_STATUSES = {429, 500, 502, 503, 504}
+
+class HTTPClient:
+    """
+    One pooled, keep-alive httpx client for every outbound API call, opened
+    and closed with the app. GETs are retried on connection errors, timeouts
+    and retryable statuses with exponential backoff and full jitter.
+    """
+
+    def __init__(
+        self,
+        timeout: float = HTTP_TIMEOUT_SECONDS,
+        connect_timeout: float = HTTP_CONNECT_TIMEOUT_SECONDS,
+        max_connections: int = HTTP_MAX_CONNECTIONS,
+        max_per_host: int = HTTP_MAX_CONNECTIONS_PER_HOST,
+        retries: int = HTTP_RETRIES,
+        backoff: float = HTTP_RETRY_BACKOFF_SECONDS,
+        transport: Optional[httpx.AsyncBaseTransport] = None
+    ):
+        self.timeout = httpx.Timeout(timeout, connect=connect_timeout)
+        self.limits = httpx.Limits(max_connections=max_connections, max_keepalive_connections=max_connections)
+        self.max_per_host = max_per_host
+        self.retries = retries
+        self.backoff = backoff
+        self.transport = transport
+        self._client: Optional[httpx.AsyncClient] = None
+        self._host_limits: Dict[str, asyncio.Semaphore] = {}
+
+    def start(self):
+        if self._client is None:
+            self._client = httpx.AsyncClient(timeout=self.timeout, limits=self.limits, transport=self.transport)
+
+    async def close(self):
+        if self._client is not None:
+            await self._client.aclose()
+            self._client = None
+
+    def _delay(self, attempt: int, retry_after: Optional[str] = None) -> float:
+        if retry_after is not None:
+            try:
+                return min(max(float(retry_after), 0.0), HTTP_MAX_RETRY_AFTER_SECONDS)
+            except ValueError:
+                pass
+        return random.uniform(0, self.backoff * 2 ** attempt)
+
+    async def get(
+        self,
+        url: str,
+        params: Optional[dict] = None,
+        retries: Optional[int] = None,
+        retry_allowed: Optional[Callable[[], Awaitable[bool]]] = None
+    ) -> httpx.Response:
+        """
+        GET with retries. retry_allowed is awaited before each retry, e.g. to
+        book quota, and stops retrying when it returns False. The last
+        response is returned whatever its status; the last error is raised
+        when no response came back.
+        """
+        # Started here too, so code outside the API process (CLI) can use it
+        self.start()
+        retries = self.retries if retries is None else retries
+        host = httpx.URL(url).host
+        semaphore = self._host_limits.setdefault(host, asyncio.Semaphore(self.max_per_host))
+
+        attempt = 0
+        while True:
+            try:
+                async with semaphore:
+                    response = await self._client.get(url, params=params)
+            except httpx.TransportError as e:
+                if attempt >= retries or (retry_allowed is not None and not await retry_allowed()):
+                    raise
+                delay = self._delay(attempt)
+                # Only the host: query strings carry access tokens
+                logger.warning(f"GET {host} failed ({type(e).__name__}), retrying in {delay:.1f}s")
+            else:
+                if response.status_code not in RETRY_STATUSES or attempt >= retries:
+                    return response
+                if retry_allowed is not None and not await retry_allowed():
+                    return response
+                delay = self._delay(attempt, response.headers.get("retry-after"))
+                logger.warning(f"GET {host} returned {response.status_code}, retrying in {delay:.1f}s")
+            await asyncio.sleep(delay)
+            attempt += 1
+
+# Shared by the API handlers and background refreshes
+http_client = HTTPClient()
@@ -0,0 +1,119 @@
+import os
+import asyncio
+from collections import OrderedDict
+from pathlib import Path
+from typing import Dict, Optional
+from fastapi import HTTPException
+from image_processing import DERIVATIVE_FORMATS, build_variant
+
+# On-the-fly resize limits; widths snap to a step so arbitrary query
+# values cannot fill the cache with near-identical variants
+RESIZE_MAX_WIDTH = int(os.environ.get('RESIZE_MAX_WIDTH', '3200'))
+RESIZE_WIDTH_STEP = int(os.environ.get('RESIZE_WIDTH_STEP', '40'))
+RESIZE_DEFAULT_QUALITY = int(os.environ.get('RESIZE_DEFAULT_QUALITY', '80'))
+# Requested qualities snap to the nearest of these levels
+RESIZE_QUALITIES = (40, 60, 70, 80, 90)
+RESIZE_CACHE_MAX_BYTES = int(os.environ.get('RESIZE_CACHE_MAX_MB', '512')) * 1024 * 1024
+
+FORMAT_ALIASES = {"jpg": "jpeg"}
+
+def normalize_resize_params(width: Optional[int], quality: Optional[int], fmt: Optional[str], source: Path):
+    """Validate query parameters and map them onto the cacheable set of variants"""
+    if width is not None:
+        if width < 1:
+            raise HTTPException(status_code=400, detail="Width must be positive")
+        width = min(RESIZE_MAX_WIDTH, -(-width // RESIZE_WIDTH_STEP) * RESIZE_WIDTH_STEP)
+    else:
+        width = RESIZE_MAX_WIDTH
+
+    if quality is None:
+        quality = RESIZE_DEFAULT_QUALITY
+    quality = min(RESIZE_QUALITIES, key=lambda step: (abs(step - quality), -step))
+
+    if fmt is None:
+        fmt = "webp" if source.suffix.lower() == ".webp" else "jpeg"
+    fmt = FORMAT_ALIASES.get(fmt.lower(), fmt.lower())
+    if fmt not in DERIVATIVE_FORMATS:
+        raise HTTPException(
+            status_code=400,
+            detail=f"Unsupported format. Allowed formats: {', '.join(DERIVATIVE_FORMATS)}"
+        )
+    return width, quality, fmt
+
+class ResizeCache:
+    """
+    Size-bounded, LRU-evicted disk cache of resized variants.
+
+    Concurrent requests for the same variant share a single encode. The LRU
+    index is per process and rebuilt from file mtimes on startup, so with
+    several workers the byte budget is enforced approximately.
+    """
+
+    def __init__(self, directory: Path, max_bytes: int = RESIZE_CACHE_MAX_BYTES):
+        self.directory = directory
+        self.max_bytes = max_bytes
+        self.directory.mkdir(exist_ok=True)
+        self._entries: "OrderedDict[str, int]" = OrderedDict()
+        self._total_bytes = 0
+        self._inflight: Dict[str, asyncio.Future] = {}
+        self._load_index()
+
+    def _load_index(self):
+        files = [p for p in self.directory.iterdir() if p.is_file() and not p.name.startswith(".")]
+        for path in sorted(files, key=lambda p: p.stat().st_mtime):
+            self._record(path.name, path.stat().st_size)
+
+    def _record(self, key: str, size: int):
+        self._total_bytes += size - self._entries.pop(key, 0)
+        self._entries[key] = size
+
+    def _evict(self):
+        while self._total_bytes > self.max_bytes and len(self._entries) > 1:
+            key, size = self._entries.popitem(last=False)
+            self._total_bytes -= size
+            (self.directory / key).unlink(missing_ok=True)
+
+    @staticmethod
+    def variant_key(source: Path, width: int, quality: int, fmt: str) -> str:
+        _, extension = DERIVATIVE_FORMATS[fmt]
+        return f"{source.stem}_r{width}_q{quality}{extension}"
+
+    async def get(self, source: Path, width: int, quality: int, fmt: str) -> Path:
+        """Return the cached variant, encoding it once if nobody has yet"""
+        key = self.variant_key(source, width, quality, fmt)
+        path = self.directory / key
+
+        if path.exists():
+            # Possibly encoded by another worker process
+            if key not in self._entries:
+                self._record(key, path.stat().st_size)
+            self._entries.move_to_end(key)
+            return path
+
+        # Single flight: the encode runs as one shared task, shielded so a
+        # requester that disconnects does not cancel it for everyone else
+        task = self._inflight.get(key)
+        if task is None:
+            task = asyncio.ensure_future(self._build(source, path, key, width, quality, fmt))
+            self._inflight[key] = task
+            task.add_done_callback(lambda done: self._finish(key, done))
+        return await asyncio.shield(task)
+
+    async def _build(self, source: Path, path: Path, key: str, width: int, quality: int, fmt: str) -> Path:
+        await build_variant(source, path, width, quality, fmt)
+        self._record(key, path.stat().st_size)
+        self._evict()
+        return path
+
+    def _finish(self, key: str, task: asyncio.Future):
+        del self._inflight[key]
+        if not task.cancelled():
+            task.exception()  # mark retrieved; waiters re-raise it themselves
+
+    def discard(self, filename: str):
+        """Drop every cached variant of an original, including those resized from its derivatives"""
+        stem = Path(filename).stem
+        for pattern in (f"{stem}_r*", f"{stem}_w*_r*"):
+            for path in self.directory.glob(pattern):
+                self._total_bytes -= self._entries.pop(path.name, 0)
+                path.unlink(missing_ok=True)
@@ -0,0 +1,109 @@
+from typing import List, Optional, Set
+from starlette.datastructures import Headers
+
+# Best first; JPEG is the universal fallback every browser decodes
+FORMAT_PREFERENCE = ("avif", "webp", "jpeg")
+FORMAT_MEDIA_TYPES = {"avif": "image/avif", "webp": "image/webp"}
+
+# Responsive image client hints, in their current (Sec-CH-) and legacy forms
+WIDTH_HINTS = ("sec-ch-width", "width")
+DPR_HINTS = ("sec-ch-dpr", "dpr")
+VIEWPORT_WIDTH_HINTS = ("sec-ch-viewport-width", "viewport-width")
+
+# Every request header a negotiated response depends on
+NEGOTIATION_VARY = "Accept, Sec-CH-Width, Width, Sec-CH-DPR, DPR, Sec-CH-Viewport-Width, Viewport-Width, Save-Data"
+# Asks browsers to send the hints on later requests
+ACCEPT_CH = "Sec-CH-Width, Sec-CH-DPR, Sec-CH-Viewport-Width, Width, DPR, Viewport-Width"
+
+def accepted_formats(accept: str) -> Set[str]:
+    """
+    Formats the client explicitly accepts. Wildcards do not count: browsers
+    that decode AVIF or WebP list them by name.
+    """
+    formats = {"jpeg"}
+    for part in accept.split(","):
+        media_type, *params = part.strip().split(";")
+        quality = 1.0
+        for param in params:
+            name, _, value = param.strip().partition("=")
+            if name == "q":
+                try:
+                    quality = float(value)
+                except ValueError:
+                    quality = 0.0
+        for fmt, candidate in FORMAT_MEDIA_TYPES.items():
+            if media_type.strip().lower() == candidate and quality > 0:
+                formats.add(fmt)
+    return formats
+
+def hint_value(headers: Headers, names: tuple) -> Optional[float]:
+    for name in names:
+        value = headers.get(name)
+        if value is None:
+            continue
+        try:
+            number = float(value.strip())
+        except ValueError:
+            continue
+        if number > 0:
+            return number
+    return None
+
+def save_data(headers: Headers) -> bool:
+    return headers.get("save-data", "").strip().lower() == "on"
+
+def target_width(headers: Headers) -> Optional[float]:
+    """
+    Physical pixels the image will be displayed at, from the client hints.
+    With Save-Data it is the CSS width instead (no high-DPR upgrade), or 0
+    for "as small as possible" when the layout width is unknown. None means
+    the request carries nothing to negotiate on.
+    """
+    dpr = hint_value(headers, DPR_HINTS) or 1.0
+    width = hint_value(headers, WIDTH_HINTS)
+    if width is None:
+        viewport_width = hint_value(headers, VIEWPORT_WIDTH_HINTS)
+        if viewport_width is not None:
+            width = viewport_width * dpr
+    if save_data(headers):
+        return width / dpr if width is not None else 0
+    return width
+
+def choose_variant(headers: Headers, original_width: Optional[int], derivatives: List[dict]) -> Optional[str]:
+    """
+    Pick the derivative to send instead of the original: the best format the
+    client accepts, at the smallest width covering the display size. Returns
+    None when the original itself should be sent.
+    """
+    width = target_width(headers)
+    format_only = width is None
+    if format_only:
+        # Without size hints only a full-size copy in a better format will do
+        if original_width is None:
+            return None
+        width = original_width
+    if not derivatives:
+        return None
+
+    accepted = accepted_formats(headers.get("accept", ""))
+    for fmt in FORMAT_PREFERENCE:
+        candidates = sorted(
+            (derivative for derivative in derivatives if derivative["format"] == fmt),
+            key=lambda derivative: derivative["width"]
+        )
+        if fmt in accepted and candidates:
+            break
+    else:
+        return None
+    if format_only and fmt == "jpeg":
+        return None
+
+    for candidate in candidates:
+        if candidate["width"] >= width:
+            return candidate["filename"]
+    # Wider than every derivative: only the original is sharp enough, unless
+    # the client asked to save data or a derivative is already full size
+    largest = candidates[-1]
+    if save_data(headers) or (original_width is not None and largest["width"] >= original_width):
+        return largest["filename"]
+    return None
@@ -0,0 +1,335 @@
+import os
+import io
+import math
+import base64
+import asyncio
+import hashlib
+from concurrent.futures import ProcessPoolExecutor
+from pathlib import Path
+from typing import Optional, Tuple
+from PIL import ExifTags, Image, ImageCms, ImageOps, features
+
+try:
+    import resource
+except ImportError:  # not available on Windows
+    resource = None
+
+# Responsive derivative settings
+DERIVATIVE_WIDTHS = sorted(
+    int(w) for w in os.environ.get('DERIVATIVE_WIDTHS', '480,960,1600').split(',') if w.strip()
+)
+DERIVATIVE_QUALITY = int(os.environ.get('DERIVATIVE_QUALITY', '80'))
+
+# format name -> (Pillow encoder, file extension)
+DERIVATIVE_FORMATS = {
+    "webp": ("WEBP", ".webp"),
+    "jpeg": ("JPEG", ".jpg"),
+}
+# AVIF is smaller again but several times slower to encode, so it is opt-in
+# (and needs a Pillow built with libavif)
+DERIVATIVE_AVIF = os.environ.get('DERIVATIVE_AVIF', 'false').lower() in ('1', 'true', 'yes')
+if DERIVATIVE_AVIF and features.check("avif"):
+    DERIVATIVE_FORMATS["avif"] = ("AVIF", ".avif")
+AVIF_ENCODER_SPEED = 8
+
+# Inline preview shown (blurred) by the frontend until the real image loads
+PLACEHOLDER_WIDTH = int(os.environ.get('PLACEHOLDER_WIDTH', '16'))
+PLACEHOLDER_QUALITY = 40
+
+IMAGE_WORKERS = int(os.environ.get('IMAGE_WORKERS', min(4, os.cpu_count() or 1)))
+# Memory an image worker may allocate on top of what it inherited at start,
+# so one huge upload fails with MemoryError instead of exhausting the host.
+# Workers run one job at a time, so this is a per-job cap. 0 disables it.
+IMAGE_JOB_MEMORY_MB = int(os.environ.get('IMAGE_JOB_MEMORY_MB', '1024'))
+# Let libjpeg decode at 1/2, 1/4 or 1/8 scale when only a smaller image is needed
+IMAGE_DRAFT_DECODE = os.environ.get('IMAGE_DRAFT_DECODE', 'true').lower() in ('1', 'true', 'yes')
+
+# EXIF orientations that swap width and height
+TRANSPOSED_ORIENTATIONS = (5, 6, 7, 8)
+# Metadata normalize_original drops, by Pillow's JPEG info keys
+STRIPPED_METADATA = ("exif", "xmp", "comment", "photoshop")
+
+_executor: Optional[ProcessPoolExecutor] = None
+
+def _address_space_bytes() -> int:
+    with open("/proc/self/statm") as f:
+        return int(f.read().split()[0]) * os.sysconf("SC_PAGE_SIZE")
+
+def limit_worker_memory(max_mb: int = IMAGE_JOB_MEMORY_MB):
+    """
+    Process pool initializer capping the worker's address space at its
+    current size plus the per-job budget. Forked workers inherit the server's
+    mappings, so a fixed limit would depend on how big the server was.
+    """
+    if resource is None or max_mb <= 0 or not os.path.exists("/proc/self/statm"):
+        return
+    limit = _address_space_bytes() + max_mb * 1024 * 1024
+    _, hard = resource.getrlimit(resource.RLIMIT_AS)
+    if hard != resource.RLIM_INFINITY:
+        limit = min(limit, hard)
+    resource.setrlimit(resource.RLIMIT_AS, (limit, hard))
+
+def create_executor(max_workers: int = IMAGE_WORKERS) -> ProcessPoolExecutor:
+    return ProcessPoolExecutor(max_workers=max_workers, initializer=limit_worker_memory)
+
+def get_executor() -> ProcessPoolExecutor:
+    """Return the shared process pool used for image encoding"""
+    global _executor
+    if _executor is None:
+        _executor = create_executor()
+    return _executor
+
+def shutdown_executor():
+    global _executor
+    if _executor is not None:
+        _executor.shutdown(wait=False, cancel_futures=True)
+        _executor = None
+
+def derivative_filename(stem: str, width: int, extension: str) -> str:
+    return f"{stem}_w{width}{extension}"
+
+def derivative_glob(stem: str) -> str:
+    """Glob pattern matching every derivative of an original"""
+    return f"{stem}_w*"
+
+def display_size(image: Image.Image) -> Tuple[int, int]:
+    """Size of an opened image once its EXIF orientation is applied"""
+    if image.getexif().get(ExifTags.Base.Orientation) in TRANSPOSED_ORIENTATIONS:
+        return image.height, image.width
+    return image.width, image.height
+
+def draft_for_width(image: Image.Image, width: int):
+    """
+    Ask the JPEG decoder for the smallest DCT scale that still yields an
+    image at least `width` wide (after rotation). Must be called before the
+    image is loaded; a no-op for other formats.
+    """
+    full_width, _ = display_size(image)
+    if not IMAGE_DRAFT_DECODE or width >= full_width:
+        return
+    factor = width / full_width
+    image.draft(None, (max(1, math.ceil(image.width * factor)), max(1, math.ceil(image.height * factor))))
+
+def _encode(image: Image.Image, path: Path, encoder: str, quality: int = DERIVATIVE_QUALITY):
+    if encoder == "JPEG":
+        image.save(path, encoder, quality=quality, optimize=True, progressive=True)
+    elif encoder == "AVIF":
+        image.save(path, encoder, quality=quality, speed=AVIF_ENCODER_SPEED)
+    else:
+        image.save(path, encoder, quality=quality, method=4)
+
+def placeholder_data_uri(image: Image.Image) -> str:
+    """Tiny JPEG preview of an image as a base64 data URI, a few hundred bytes"""
+    preview = image.copy()
+    preview.thumbnail((PLACEHOLDER_WIDTH, PLACEHOLDER_WIDTH))
+    buffer = io.BytesIO()
+    preview.save(buffer, "JPEG", quality=PLACEHOLDER_QUALITY)
+    return "data:image/jpeg;base64," + base64.b64encode(buffer.getvalue()).decode("ascii")
+
+def generate_derivatives(source_path: str, dest_dir: str) -> dict:
+    """
+    Resize and re-encode an original into every configured width and format,
+    and measure it for placeholders. Runs inside a worker process, so it only
+    takes and returns plain data.
+    """
+    source = Path(source_path)
+    dest = Path(dest_dir)
+    variants = []
+
+    with Image.open(source) as original:
+        full_width, full_height = display_size(original)
+        # Never upscale; an image narrower than every target gets one native-width set
+        widths = [w for w in DERIVATIVE_WIDTHS if w < full_width] or [full_width]
+        draft_for_width(original, widths[-1])
+
+        image = ImageOps.exif_transpose(original)
+        if image.mode not in ("RGB", "L"):
+            image = image.convert("RGB")
+
+        for width in widths:
+            height = max(1, round(full_height * width / full_width))
+            resized = image if image.size == (width, height) else image.resize((width, height), Image.LANCZOS)
+            for fmt, (encoder, extension) in DERIVATIVE_FORMATS.items():
+                filename = derivative_filename(source.stem, width, extension)
+                # Written under a temp name so a rebuild never exposes a partial file
+                temp = dest / f".{filename}.part"
+                _encode(resized, temp, encoder)
+                os.replace(temp, dest / filename)
+                variants.append({
+                    "filename": filename,
+                    "width": width,
+                    "format": fmt,
+                    "sha256": hashlib.sha256((dest / filename).read_bytes()).hexdigest()
+                })
+
+        return {
+            "width": full_width,
+            "height": full_height,
+            "placeholder": placeholder_data_uri(image),
+            "derivatives": variants
+        }
+
+async def build_derivatives(file_path: Path) -> dict:
+    """Generate derivatives for a saved original without blocking the event loop"""
+    loop = asyncio.get_running_loop()
+    return await loop.run_in_executor(
+        get_executor(), generate_derivatives, str(file_path), str(file_path.parent)
+    )
+
+def normalize_original(source_path: str, dest_path: str, quality: int) -> bool:
+    """
+    Re-encode a JPEG original as progressive JPEG with its orientation applied
+    and EXIF (including the embedded thumbnail), XMP and comments dropped.
+    Colour is converted to sRGB; a profile that cannot be converted is kept.
+    Returns whether any of that changed the image, i.e. whether the re-encode
+    is needed regardless of its size. Runs inside a worker process.
+    """
+    with Image.open(source_path) as original:
+        changed = any(key in original.info for key in STRIPPED_METADATA) or (
+            original.getexif().get(ExifTags.Base.Orientation, 1) != 1
+        )
+        icc_profile = original.info.get("icc_profile")
+        # In place: a full-resolution copy is the largest allocation here
+        ImageOps.exif_transpose(original, in_place=True)
+        image = original
+        if icc_profile and image.mode != "L":
+            try:
+                image = ImageCms.profileToProfile(
+                    image,
+                    ImageCms.ImageCmsProfile(io.BytesIO(icc_profile)),
+                    ImageCms.createProfile("sRGB"),
+                    outputMode="RGB"
+                )
+                icc_profile = None
+                changed = True
+            except ImageCms.PyCMSError:
+                pass
+        if image.mode not in ("RGB", "L"):
+            image = image.convert("RGB")
+            changed = True
+        image.info = {}
+
+        options = {"icc_profile": icc_profile} if icc_profile else {}
+        image.save(dest_path, "JPEG", quality=quality, optimize=True, progressive=True, **options)
+    return changed
+
+def recompress_upload(source_path: str, quality: int, reencode: bool) -> dict:
+    """
+    Backfill one stored original: re-encode it like a fresh JPEG upload when
+    that makes it smaller, swapping the file atomically, then regenerate its
+    derivatives. Runs inside a worker process.
+    """
+    source = Path(source_path)
+    before = source.stat().st_size
+    if reencode:
+        temp = source.with_name(f".{source.name}.backfill")
+        try:
+            normalize_original(source_path, str(temp), quality)
+            if temp.stat().st_size < before:
+                os.replace(temp, source)
+        finally:
+            temp.unlink(missing_ok=True)
+    after = source.stat().st_size
+    built = generate_derivatives(source_path, str(source.parent))
+    return {
+        **built,
+        "sha256": hashlib.sha256(source.read_bytes()).hexdigest(),
+        "bytesBefore": before,
+        "bytesAfter": after,
+        "bytesWritten": (after if after != before else 0) + sum(
+            (source.parent / derivative["filename"]).stat().st_size for derivative in built["derivatives"]
+        )
+    }
+
+async def build_normalized_original(source_path: Path, dest_path: Path, quality: int) -> bool:
+    loop = asyncio.get_running_loop()
+    return await loop.run_in_executor(
+        get_executor(), normalize_original, str(source_path), str(dest_path), quality
+    )
+
+DZI_TEMPLATE = """<?xml version="1.0" encoding="UTF-8"?>
+<Image xmlns="http://schemas.microsoft.com/deepzoom/2008" Format="{format}" Overlap="{overlap}" TileSize="{tile_size}">
+  <Size Width="{width}" Height="{height}"/>
+</Image>
+"""
+
+def generate_tile_pyramid(source_path: str, dest_dir: str, tile_size: int, overlap: int, quality: int) -> dict:
+    """
+    Cut an original into a Deep Zoom (DZI) pyramid: level N is the full
+    image, every level below it half the size, down to 1x1 at level 0.
+    Tiles go to dest_dir/<level>/<column>_<row>.jpg next to an image.dzi
+    descriptor. Runs inside a worker process.
+    """
+    dest = Path(dest_dir)
+    with Image.open(source_path) as original:
+        ImageOps.exif_transpose(original, in_place=True)
+        image = original if original.mode in ("RGB", "L") else original.convert("RGB")
+        width, height = image.size
+        max_level = math.ceil(math.log2(max(width, height)))
+
+        tiles = 0
+        for level in range(max_level, -1, -1):
+            scale = 2 ** (max_level - level)
+            size = (math.ceil(width / scale), math.ceil(height / scale))
+            # Each level is resampled from the one above, never from the original
+            if image.size != size:
+                image = image.resize(size, Image.LANCZOS)
+            level_dir = dest / str(level)
+            level_dir.mkdir(parents=True)
+            for column in range(math.ceil(size[0] / tile_size)):
+                for row in range(math.ceil(size[1] / tile_size)):
+                    box = (
+                        max(0, column * tile_size - overlap),
+                        max(0, row * tile_size - overlap),
+                        min(size[0], (column + 1) * tile_size + overlap),
+                        min(size[1], (row + 1) * tile_size + overlap)
+                    )
+                    image.crop(box).save(level_dir / f"{column}_{row}.jpg", "JPEG", quality=quality)
+                    tiles += 1
+
+    (dest / "image.dzi").write_text(DZI_TEMPLATE.format(
+        format="jpg", overlap=overlap, tile_size=tile_size, width=width, height=height
+    ))
+    return {
+        "width": width,
+        "height": height,
+        "tileSize": tile_size,
+        "overlap": overlap,
+        "format": "jpg",
+        "levels": max_level + 1,
+        "tileCount": tiles
+    }
+
+async def build_tile_pyramid(source_path: Path, dest_dir: Path, tile_size: int, overlap: int, quality: int) -> dict:
+    loop = asyncio.get_running_loop()
+    return await loop.run_in_executor(
+        get_executor(), generate_tile_pyramid, str(source_path), str(dest_dir), tile_size, overlap, quality
+    )
+
+def render_variant(source_path: str, dest_path: str, width: int, quality: int, fmt: str):
+    """
+    Encode a single resized copy of an original. Runs inside a worker process;
+    the result is written to a temp name and renamed so readers never see a
+    partial file.
+    """
+    encoder, _ = DERIVATIVE_FORMATS[fmt]
+    dest = Path(dest_path)
+    temp = dest.with_name(f".{dest.name}.part")
+
+    with Image.open(source_path) as original:
+        draft_for_width(original, width)
+        image = ImageOps.exif_transpose(original)
+        if image.mode not in ("RGB", "L"):
+            image = image.convert("RGB")
+        if width < image.width:
+            height = max(1, round(image.height * width / image.width))
+            image = image.resize((width, height), Image.LANCZOS)
+        _encode(image, temp, encoder, quality)
+
+    os.replace(temp, dest)
+
+async def build_variant(source_path: Path, dest_path: Path, width: int, quality: int, fmt: str):
+    loop = asyncio.get_running_loop()
+    await loop.run_in_executor(
+        get_executor(), render_variant, str(source_path), str(dest_path), width, quality, fmt
+    )
@@ -0,0 +1,83 @@
+import os
+import re
+import uuid
+import shutil
+import mimetypes
+from pathlib import Path
+from typing import List, Optional
+from starlette.concurrency import run_in_threadpool
+from file_upload import TILES_DIR, UPLOAD_DIR, deep_zoom_url, storage, tiles_name, upload_path
+from image_processing import build_tile_pyramid
+from upload_gc import ASSET_FIELDS, ASSET_LIST_FIELDS
+
+# 254 + 1 px overlap on each side keeps most tiles at 256 px, as viewers expect
+DEEPZOOM_TILE_SIZE = int(os.environ.get('DEEPZOOM_TILE_SIZE', '254'))
+DEEPZOOM_OVERLAP = int(os.environ.get('DEEPZOOM_OVERLAP', '1'))
+DEEPZOOM_QUALITY = int(os.environ.get('DEEPZOOM_QUALITY', '85'))
+
+DZI_FILENAME = "image.dzi"
+TILE_NAME_RE = re.compile(r"^\d+_\d+\.jpg$")
+UPLOAD_STEM_RE = re.compile(r"^[A-Za-z0-9_-]+$")
+
+mimetypes.add_type("application/xml", ".dzi")
+
+def tile_name(stem: str, level: int, tile: str) -> str:
+    return f"{TILES_DIR.name}/{stem}/{level}/{tile}"
+
+def descriptor_name(stem: str) -> str:
+    return f"{TILES_DIR.name}/{stem}/{DZI_FILENAME}"
+
+def _swap_in(built: Path, final: Path):
+    """Replace a tile directory in two renames; the old one is removed afterwards"""
+    old = final.with_name(f".{final.name}.{uuid.uuid4().hex}.old")
+    if final.exists():
+        os.replace(final, old)
+    os.replace(built, final)
+    shutil.rmtree(old, ignore_errors=True)
+
+def _stored_names(directory: Path, name: str) -> List[str]:
+    return [f"{name}/{path.relative_to(directory).as_posix()}" for path in directory.rglob("*") if path.is_file()]
+
+async def set_deep_zoom_url(db, file_url: str, dzi_url: Optional[str]):
+    """Point (or stop pointing) every asset of an upload at its pyramid"""
+    for collection, url_field, asset_field in ASSET_FIELDS:
+        await db[collection].update_many(
+            {url_field: file_url, asset_field: {"$ne": None}},
+            {"$set": {f"{asset_field}.deepZoomUrl": dzi_url}}
+        )
+    for collection, _, assets_field in ASSET_LIST_FIELDS:
+        await db[collection].update_many(
+            {f"{assets_field}.url": file_url},
+            {"$set": {f"{assets_field}.$.deepZoomUrl": dzi_url}}
+        )
+
+async def build_tiles(db, filename: str) -> dict:
+    """
+    Generate the Deep Zoom pyramid of a stored original. It is built in a
+    scratch directory and swapped in whole, so viewers never see a partial
+    pyramid. The caller has made sure the original is available locally.
+    """
+    TILES_DIR.mkdir(exist_ok=True)
+    building = TILES_DIR / f".{Path(filename).stem}.{uuid.uuid4().hex}.building"
+    name = tiles_name(filename)
+    try:
+        info = await build_tile_pyramid(
+            upload_path(filename), building, DEEPZOOM_TILE_SIZE, DEEPZOOM_OVERLAP, DEEPZOOM_QUALITY
+        )
+        await run_in_threadpool(_swap_in, building, UPLOAD_DIR / name)
+    finally:
+        await run_in_threadpool(shutil.rmtree, building, True)
+
+    await storage.publish(await run_in_threadpool(_stored_names, UPLOAD_DIR / name, name))
+    info["url"] = deep_zoom_url(filename)
+    await db.upload_refs.update_one({"filename": filename}, {"$set": {"tiles": info}})
+    await set_deep_zoom_url(db, f"/api/uploads/{filename}", info["url"])
+    return info
+
+async def remove_tiles(db, filename: str):
+    name = tiles_name(filename)
+    await set_deep_zoom_url(db, f"/api/uploads/{filename}", None)
+    await db.upload_refs.update_one({"filename": filename}, {"$unset": {"tiles": ""}})
+    await run_in_threadpool(shutil.rmtree, UPLOAD_DIR / name, True)
+    if storage.remote:
+        await storage.delete(await storage.list_prefix(f"{name}/"))
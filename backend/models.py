@@ -1,5 +1,5 @@
 from pydantic import BaseModel, Field
-from typing import List, Optional
+from typing import Dict, List, Optional
 from datetime import datetime
 import uuid
 
@@ -18,11 +18,42 @@ class SiteSettingsUpdate(BaseModel):
     email: Optional[str] = None
     address: Optional[str] = None
 
+# Responsive Image Derivatives
+class ImageVariant(BaseModel):
+    url: str
+    width: int
+    format: str
+
+class ImageAsset(BaseModel):
+    url: str
+    width: Optional[int] = None
+    height: Optional[int] = None
+    placeholder: Optional[str] = None  # tiny base64 data URI preview
+    deepZoomUrl: Optional[str] = None  # DZI descriptor, for zoomable images
+    variants: List[ImageVariant] = []
+
+class DeepZoomInfo(BaseModel):
+    url: str
+    width: int
+    height: int
+    tileSize: int
+    overlap: int
+    format: str
+    levels: int
+    tileCount: int
+
+class ImageUploadResult(BaseModel):
+    filename: str
+    success: bool
+    asset: Optional[ImageAsset] = None
+    error: Optional[str] = None
+
 # Hero Carousel Model
 class HeroCarouselItem(BaseModel):
     id: str = Field(default_factory=lambda: str(uuid.uuid4()))
     url: str
     alt: str
+    asset: Optional[ImageAsset] = None
     order: int = 0
     enabled: bool = True
     createdAt: datetime = Field(default_factory=datetime.utcnow)
@@ -43,8 +74,14 @@ class Wedding(BaseModel):
     date: str
     location: str
     images: List[str] = []
+    coverAsset: Optional[ImageAsset] = None
+    imageAssets: List[ImageAsset] = []
     createdAt: datetime = Field(default_factory=datetime.utcnow)
 
+class WeddingImagesBatchResult(BaseModel):
+    wedding: Wedding
+    results: List[ImageUploadResult]
+
 class WeddingCreate(BaseModel):
     brideName: str
     groomName: str
@@ -98,6 +135,12 @@ class Package(BaseModel):
     images: List[str] = []
     pricing: str
     order: int = 0
+    thumbnailAsset: Optional[ImageAsset] = None
+    imageAssets: List[ImageAsset] = []
+
+class PackageImagesBatchResult(BaseModel):
+    package: Package
+    results: List[ImageUploadResult]
 
 class PackageCreate(BaseModel):
     title: str
@@ -109,6 +152,69 @@ class PackageUpdate(BaseModel):
     description: Optional[str] = None
     pricing: Optional[str] = None
 
+# Resumable Upload Sessions
+class UploadSessionCreate(BaseModel):
+    filename: str
+    size: int
+    targetType: Optional[str] = None  # wedding, package
+    targetId: Optional[str] = None
+
+class UploadSession(BaseModel):
+    id: str = Field(default_factory=lambda: str(uuid.uuid4()))
+    filename: str
+    size: int
+    offset: int = 0
+    targetType: Optional[str] = None
+    targetId: Optional[str] = None
+    createdAt: datetime = Field(default_factory=datetime.utcnow)
+    updatedAt: datetime = Field(default_factory=datetime.utcnow)
+
+class UploadSessionResult(BaseModel):
+    asset: ImageAsset
+    targetType: Optional[str] = None
+    targetId: Optional[str] = None
+
+class DirectUploadCreate(BaseModel):
+    filename: str
+    size: int
+    targetType: Optional[str] = None  # wedding, package
+    targetId: Optional[str] = None
+
+class DirectUpload(BaseModel):
+    id: str
+    url: str
+    method: str = "PUT"
+    headers: Dict[str, str] = {}
+    expiresAt: datetime
+
+class UploadCacheStats(BaseModel):
+    hits: int
+    misses: int
+    hitRate: float
+    entries: int
+    bytes: int
+    maxBytes: int
+
+class DocumentCacheEntryStats(BaseModel):
+    hits: int
+    misses: int
+    hitRate: float
+    cached: bool
+
+class DocumentCacheStats(BaseModel):
+    hits: int
+    misses: int
+    hitRate: float
+    ttlSeconds: float
+    documents: Dict[str, DocumentCacheEntryStats]
+
+class UploadGCReport(BaseModel):
+    referenced: int
+    orphans: List[str]
+    deleted: int
+    bytesReclaimed: int
+    dryRun: bool
+
 # Contact Inquiry Model
 class ContactInquiry(BaseModel):
     id: str = Field(default_factory=lambda: str(uuid.uuid4()))
@@ -1,10 +1,15 @@
-from fastapi import FastAPI, APIRouter, UploadFile, File, Form, Depends, HTTPException
-from fastapi.responses import FileResponse
+from fastapi import FastAPI, APIRouter, UploadFile, File, Form, Depends, HTTPException, Request
+from fastapi.responses import RedirectResponse, Response
 from fastapi.staticfiles import StaticFiles
+from fastapi.encoders import jsonable_encoder
 from dotenv import load_dotenv
 from starlette.middleware.cors import CORSMiddleware
 from motor.motor_asyncio import AsyncIOMotorClient
 import os
+import stat
+import json
+import hashlib
+import asyncio
 import logging
 import uuid
 from pathlib import Path
@@ -14,20 +19,49 @@ from datetime import timedelta, datetime
 from models import (
     SiteSettings, SiteSettingsUpdate,
     HeroCarouselItem, HeroCarouselUpdate, HeroCarouselReorder,
-    Wedding, WeddingCreate, WeddingUpdate,
+    Wedding, WeddingCreate, WeddingUpdate, WeddingImagesBatchResult,
     Film, FilmUpdate,
     About, AboutUpdate, AboutFeaturesUpdate, AboutFeature,
-    Package, PackageCreate, PackageUpdate,
+    Package, PackageCreate, PackageUpdate, PackageImagesBatchResult,
     ContactInquiry, ContactInquiryCreate,
     AdminLogin, AdminToken, AdminChangeCredentials, AdminCredentialsResponse,
     FacebookSettings, FacebookSettingsCreate, FacebookSettingsUpdate,
     SocialMediaLinks, SocialMediaLinksUpdate,
     YouTubeSettings, YouTubeSettingsUpdate, YouTubeVideo,
-    SectionContent, SectionContentUpdate
+    SectionContent, SectionContentUpdate,
+    UploadSessionCreate, UploadSession, UploadSessionResult, UploadGCReport,
+    DirectUploadCreate, DirectUpload, UploadCacheStats, DeepZoomInfo, DocumentCacheStats
+)
+from file_upload import (
+    save_upload_file, save_image_upload, save_image_uploads, configure_upload_refs,
+    store_upload_file, build_image_asset, validate_image_filename, is_allowed_image, get_file_extension,
+    register_delete_hook, get_upload_digest, get_upload_variants, upload_path, storage, UPLOAD_DIR, UploadSizeLimitMiddleware,
+    MAX_FILES_PER_REQUEST
+)
+from file_responses import (
+    DEFAULT_CACHE_CONTROL, UPLOAD_OFFLOAD_MODE, quote_etag, stat_etag, etag_matches, is_not_modified, validator_headers, offload_response, UploadFileResponse
+)
+from image_cache import ResizeCache, normalize_resize_params
+from image_negotiation import ACCEPT_CH, NEGOTIATION_VARY, choose_variant
+from upload_layout import DERIVATIVE_SUFFIX_RE
+from hot_cache import HotFileCache
+from document_cache import DocumentCache
+from feed_cache import FACEBOOK_POSTS_FRESH_SECONDS, FACEBOOK_POSTS_STALE_SECONDS, FeedCache
+from youtube_feed import (
+    YOUTUBE_RETRY_AFTER, cached_youtube_videos, refresh_youtube_cache, run_periodic_youtube_refresh, youtube_feed_key
+)
+from upload_sessions import (
+    SESSION_TARGET_PREFIXES, UPLOAD_SESSION_TTL, append_chunk, remove_session_file,
+    session_file_path, session_expiry_cutoff, validate_session_size
+)
+from upload_gc import DeletionQueue, collect_orphans, run_periodic_collection
+from storage import INCOMING_PREFIX, content_type_for
+from image_processing import shutdown_executor
+from image_tiles import (
+    TILE_NAME_RE, UPLOAD_STEM_RE, build_tiles, descriptor_name, remove_tiles, tile_name
 )
-from file_upload import save_upload_file, delete_file, UPLOAD_DIR
 from auth import create_access_token, verify_token, hash_password, verify_password, DEFAULT_ADMIN_USERNAME, DEFAULT_ADMIN_PASSWORD
-import requests
+from http_client import http_client
 
 ROOT_DIR = Path(__file__).parent
 load_dotenv(ROOT_DIR / '.env')
@@ -36,6 +70,32 @@ load_dotenv(ROOT_DIR / '.env')
 mongo_url = os.environ['MONGO_URL']
 client = AsyncIOMotorClient(mongo_url)
 db = client[os.environ['DB_NAME']]
+configure_upload_refs(db.upload_refs)
+
+# Resized variants requested through /api/uploads/{filename}?w=
+resize_cache = ResizeCache(UPLOAD_DIR / ".cache")
+register_delete_hook(resize_cache.discard)
+
+# Hero images and the logo, kept in memory
+hot_cache = HotFileCache()
+register_delete_hook(hot_cache.discard)
+
+# Singleton CMS documents read on every page view; each admin write
+# invalidates its entry
+documents = DocumentCache()
+
+# Graph API posts, served from memory and refreshed in the background
+facebook_posts = FeedCache(FACEBOOK_POSTS_FRESH_SECONDS, FACEBOOK_POSTS_STALE_SECONDS)
+
+# Fire-and-forget refreshes, referenced until they finish
+background_tasks = set()
+
+# Channel id -> (started at, task) of the last refresh a public request
+# started because nothing was stored yet
+youtube_kickoffs = {}
+
+# Replaced and removed uploads are deleted off the request path
+upload_deletions = DeletionQueue()
 
 # Create the main app
 app = FastAPI()
@@ -127,8 +187,7 @@ async def change_admin_credentials(
 
 # ============ SITE SETTINGS ============
 
-@api_router.get("/settings", response_model=SiteSettings)
-async def get_settings():
+async def load_settings() -> dict:
     settings = await db.settings.find_one()
     if not settings:
         # Create default settings
@@ -141,7 +200,11 @@ async def get_settings():
         )
         await db.settings.insert_one(default_settings.dict())
         settings = default_settings.dict()
-    return SiteSettings(**settings)
+    return settings
+
+@api_router.get("/settings", response_model=SiteSettings)
+async def get_settings():
+    return SiteSettings(**await documents.get("settings", load_settings))
 
 @api_router.put("/settings", response_model=SiteSettings)
 async def update_settings(
@@ -154,6 +217,7 @@ async def update_settings(
     
     update_data = {k: v for k, v in settings_update.dict().items() if v is not None}
     await db.settings.update_one({"id": settings["id"]}, {"$set": update_data})
+    documents.invalidate("settings")
     
     updated_settings = await db.settings.find_one({"id": settings["id"]})
     return SiteSettings(**updated_settings)
@@ -167,16 +231,19 @@ async def upload_logo(
     if not settings:
         raise HTTPException(status_code=404, detail="Settings not found")
     
-    # Delete old logo if exists
-    if settings.get("logoUrl"):
-        delete_file(settings["logoUrl"])
-    
-    # Save new logo
+    # Save new logo, then drop the old one once nothing points at it
     logo_url = await save_upload_file(logo, "logo")
     await db.settings.update_one({"id": settings["id"]}, {"$set": {"logoUrl": logo_url}})
+    documents.invalidate("settings")
+    upload_deletions.enqueue(settings.get("logoUrl"))
     
     return {"logoUrl": logo_url}
 
+@api_router.get("/admin/documents/cache-stats", response_model=DocumentCacheStats)
+async def get_document_cache_stats(_: dict = Depends(verify_token)):
+    """Hit/miss counters of the singleton document cache in this worker"""
+    return documents.stats()
+
 # ============ HERO CAROUSEL ============
 
 @api_router.get("/hero-carousel", response_model=List[HeroCarouselItem])
@@ -195,15 +262,16 @@ async def create_hero_carousel(
     alt: str = Form(...),
     _: dict = Depends(verify_token)
 ):
-    image_url = await save_upload_file(image, "hero")
+    image_asset = await save_image_upload(image, "hero")
     
     # Get max order
     items = await db.hero_carousel.find().to_list(100)
     max_order = max([item.get("order", 0) for item in items], default=0)
     
     carousel_item = HeroCarouselItem(
-        url=image_url,
+        url=image_asset["url"],
         alt=alt,
+        asset=image_asset,
         order=max_order + 1
     )
     await db.hero_carousel.insert_one(carousel_item.dict())
@@ -234,8 +302,8 @@ async def delete_hero_carousel(
     if not item:
         raise HTTPException(status_code=404, detail="Item not found")
     
-    delete_file(item["url"])
     await db.hero_carousel.delete_one({"id": item_id})
+    upload_deletions.enqueue(item["url"])
     return {"message": "Item deleted successfully"}
 
 @api_router.put("/admin/hero-carousel/reorder")
@@ -250,6 +318,45 @@ async def reorder_hero_carousel(
         )
     return {"message": "Reordered successfully"}
 
+# ============ GALLERY IMAGES ============
+
+async def ingest_gallery_images(
+    collection,
+    doc_id: str,
+    images: List[UploadFile],
+    prefix: str,
+    allow_partial: bool
+) -> List[dict]:
+    """
+    Save gallery images concurrently and append them to the document in one
+    atomic update. Without allow_partial, any failure discards the whole batch.
+    """
+    if len(images) > MAX_FILES_PER_REQUEST:
+        raise HTTPException(
+            status_code=413,
+            detail=f"Too many files. Maximum is {MAX_FILES_PER_REQUEST} per request"
+        )
+    results = await save_image_uploads(images, prefix)
+    failed = [result for result in results if not result["success"]]
+    
+    if failed and not allow_partial:
+        upload_deletions.enqueue(*(result["asset"]["url"] for result in results if result["success"]))
+        raise HTTPException(
+            status_code=400,
+            detail=f"{failed[0]['filename']}: {failed[0]['error']}"
+        )
+    
+    assets = [result["asset"] for result in results if result["success"]]
+    if assets:
+        await collection.update_one(
+            {"id": doc_id},
+            {"$push": {
+                "images": {"$each": [asset["url"] for asset in assets]},
+                "imageAssets": {"$each": assets}
+            }}
+        )
+    return results
+
 # ============ WEDDINGS ============
 
 @api_router.get("/weddings", response_model=List[Wedding])
@@ -273,10 +380,11 @@ async def create_wedding(
     location: str = Form(...),
     _: dict = Depends(verify_token)
 ):
-    image_url = await save_upload_file(coverImage, "wedding")
+    cover_asset = await save_image_upload(coverImage, "wedding")
     
     wedding = Wedding(
-        coverImage=image_url,
+        coverImage=cover_asset["url"],
+        coverAsset=cover_asset,
         brideName=brideName,
         groomName=groomName,
         date=date,
@@ -309,10 +417,13 @@ async def update_wedding(
     if location:
         update_data["location"] = location
     if coverImage:
-        delete_file(wedding["coverImage"])
-        update_data["coverImage"] = await save_upload_file(coverImage, "wedding")
+        cover_asset = await save_image_upload(coverImage, "wedding")
+        update_data["coverImage"] = cover_asset["url"]
+        update_data["coverAsset"] = cover_asset
     
     await db.weddings.update_one({"id": wedding_id}, {"$set": update_data})
+    if coverImage:
+        upload_deletions.enqueue(wedding["coverImage"])
     updated_wedding = await db.weddings.find_one({"id": wedding_id})
     return Wedding(**updated_wedding)
 
@@ -325,10 +436,8 @@ async def delete_wedding(
     if not wedding:
         raise HTTPException(status_code=404, detail="Wedding not found")
     
-    delete_file(wedding["coverImage"])
-    for image_url in wedding.get("images", []):
-        delete_file(image_url)
     await db.weddings.delete_one({"id": wedding_id})
+    upload_deletions.enqueue(wedding["coverImage"], *wedding.get("images", []))
     return {"message": "Wedding deleted successfully"}
 
 @api_router.post("/admin/weddings/{wedding_id}/images", response_model=Wedding)
@@ -341,18 +450,25 @@ async def add_wedding_images(
     if not wedding:
         raise HTTPException(status_code=404, detail="Wedding not found")
     
-    image_urls = []
-    for image in images:
-        image_url = await save_upload_file(image, "wedding")
-        image_urls.append(image_url)
-    
-    current_images = wedding.get("images", [])
-    current_images.extend(image_urls)
-    
-    await db.weddings.update_one({"id": wedding_id}, {"$set": {"images": current_images}})
+    await ingest_gallery_images(db.weddings, wedding_id, images, "wedding", allow_partial=False)
     updated_wedding = await db.weddings.find_one({"id": wedding_id})
     return Wedding(**updated_wedding)
 
+@api_router.post("/admin/weddings/{wedding_id}/images/batch", response_model=WeddingImagesBatchResult)
+async def add_wedding_images_batch(
+    wedding_id: str,
+    images: List[UploadFile] = File(...),
+    _: dict = Depends(verify_token)
+):
+    """Add gallery images, keeping every file that succeeds and reporting per-file results"""
+    wedding = await db.weddings.find_one({"id": wedding_id})
+    if not wedding:
+        raise HTTPException(status_code=404, detail="Wedding not found")
+    
+    results = await ingest_gallery_images(db.weddings, wedding_id, images, "wedding", allow_partial=True)
+    updated_wedding = await db.weddings.find_one({"id": wedding_id})
+    return {"wedding": Wedding(**updated_wedding), "results": results}
+
 @api_router.delete("/admin/weddings/{wedding_id}/images/{image_index}")
 async def delete_wedding_image(
     wedding_id: str,
@@ -367,11 +483,14 @@ async def delete_wedding_image(
     if image_index < 0 or image_index >= len(images):
         raise HTTPException(status_code=404, detail="Image not found")
     
-    image_url = images[image_index]
-    delete_file(image_url)
-    images.pop(image_index)
+    image_url = images.pop(image_index)
+    image_assets = [asset for asset in wedding.get("imageAssets", []) if asset.get("url") != image_url]
     
-    await db.weddings.update_one({"id": wedding_id}, {"$set": {"images": images}})
+    await db.weddings.update_one(
+        {"id": wedding_id},
+        {"$set": {"images": images, "imageAssets": image_assets}}
+    )
+    upload_deletions.enqueue(image_url)
     return {"message": "Image deleted successfully"}
 
 # ============ FILMS ============
@@ -396,8 +515,7 @@ def get_youtube_thumbnail(video_id: str) -> str:
     # Use maxresdefault first, fallback to hqdefault
     return f"https://img.youtube.com/vi/{video_id}/maxresdefault.jpg"
 
-@api_router.get("/films/featured", response_model=Film)
-async def get_featured_film():
+async def load_featured_film() -> dict:
     film = await db.films.find_one({"isFeatured": True})
     if not film:
         # Create default film
@@ -409,7 +527,11 @@ async def get_featured_film():
         )
         await db.films.insert_one(default_film.dict())
         film = default_film.dict()
-    return Film(**film)
+    return film
+
+@api_router.get("/films/featured", response_model=Film)
+async def get_featured_film():
+    return Film(**await documents.get("featured_film", load_featured_film))
 
 @api_router.put("/admin/films/featured", response_model=Film)
 async def update_featured_film(
@@ -431,6 +553,7 @@ async def update_featured_film(
         {"id": film["id"]},
         {"$set": update_data}
     )
+    documents.invalidate("featured_film")
     
     updated_film = await db.films.find_one({"id": film["id"]})
     return Film(**updated_film)
@@ -443,8 +566,7 @@ DEFAULT_ABOUT_FEATURES = [
     {"title": "Expert Team", "description": "Years of experience with state-of-the-art equipment and creative storytelling"}
 ]
 
-@api_router.get("/about", response_model=About)
-async def get_about():
+async def load_about() -> dict:
     about = await db.about.find_one()
     if not about:
         # Create default about
@@ -462,7 +584,11 @@ async def get_about():
         about["features"] = DEFAULT_ABOUT_FEATURES
         await db.about.update_one({"id": about["id"]}, {"$set": {"features": DEFAULT_ABOUT_FEATURES}})
     
-    return About(**about)
+    return about
+
+@api_router.get("/about", response_model=About)
+async def get_about():
+    return About(**await documents.get("about", load_about))
 
 @api_router.put("/admin/about", response_model=About)
 async def update_about(
@@ -481,11 +607,12 @@ async def update_about(
     if bio:
         update_data["bio"] = bio
     if image:
-        if about.get("image") and about["image"].startswith("/api/uploads/"):
-            delete_file(about["image"])
         update_data["image"] = await save_upload_file(image, "about")
     
     await db.about.update_one({"id": about["id"]}, {"$set": update_data})
+    documents.invalidate("about")
+    if image:
+        upload_deletions.enqueue(about.get("image"))
     updated_about = await db.about.find_one({"id": about["id"]})
     
     # Ensure features exist
@@ -511,6 +638,7 @@ async def update_about_features(
         {"id": about["id"]},
         {"$set": {"features": features_dict}}
     )
+    documents.invalidate("about")
     
     updated_about = await db.about.find_one({"id": about["id"]})
     return About(**updated_about)
@@ -530,14 +658,15 @@ async def create_package(
     pricing: str = Form(...),
     _: dict = Depends(verify_token)
 ):
-    thumbnail_url = await save_upload_file(thumbnail, "package")
+    thumbnail_asset = await save_image_upload(thumbnail, "package")
     
     # Get max order
     packages = await db.packages.find().to_list(100)
     max_order = max([pkg.get("order", 0) for pkg in packages], default=0)
     
     package = Package(
-        thumbnail=thumbnail_url,
+        thumbnail=thumbnail_asset["url"],
+        thumbnailAsset=thumbnail_asset,
         title=title,
         description=description,
         pricing=pricing,
@@ -567,10 +696,13 @@ async def update_package(
     if pricing:
         update_data["pricing"] = pricing
     if thumbnail:
-        delete_file(package["thumbnail"])
-        update_data["thumbnail"] = await save_upload_file(thumbnail, "package")
+        thumbnail_asset = await save_image_upload(thumbnail, "package")
+        update_data["thumbnail"] = thumbnail_asset["url"]
+        update_data["thumbnailAsset"] = thumbnail_asset
     
     await db.packages.update_one({"id": package_id}, {"$set": update_data})
+    if thumbnail:
+        upload_deletions.enqueue(package["thumbnail"])
     updated_package = await db.packages.find_one({"id": package_id})
     return Package(**updated_package)
 
@@ -583,11 +715,8 @@ async def delete_package(
     if not package:
         raise HTTPException(status_code=404, detail="Package not found")
     
-    delete_file(package["thumbnail"])
-    for image_url in package.get("images", []):
-        delete_file(image_url)
-    
     await db.packages.delete_one({"id": package_id})
+    upload_deletions.enqueue(package["thumbnail"], *package.get("images", []))
     return {"message": "Package deleted successfully"}
 
 @api_router.post("/admin/packages/{package_id}/images", response_model=Package)
@@ -600,18 +729,25 @@ async def add_package_images(
     if not package:
         raise HTTPException(status_code=404, detail="Package not found")
     
-    image_urls = []
-    for image in images:
-        image_url = await save_upload_file(image, "package")
-        image_urls.append(image_url)
-    
-    current_images = package.get("images", [])
-    current_images.extend(image_urls)
-    
-    await db.packages.update_one({"id": package_id}, {"$set": {"images": current_images}})
+    await ingest_gallery_images(db.packages, package_id, images, "package", allow_partial=False)
     updated_package = await db.packages.find_one({"id": package_id})
     return Package(**updated_package)
 
+@api_router.post("/admin/packages/{package_id}/images/batch", response_model=PackageImagesBatchResult)
+async def add_package_images_batch(
+    package_id: str,
+    images: List[UploadFile] = File(...),
+    _: dict = Depends(verify_token)
+):
+    """Add package images, keeping every file that succeeds and reporting per-file results"""
+    package = await db.packages.find_one({"id": package_id})
+    if not package:
+        raise HTTPException(status_code=404, detail="Package not found")
+    
+    results = await ingest_gallery_images(db.packages, package_id, images, "package", allow_partial=True)
+    updated_package = await db.packages.find_one({"id": package_id})
+    return {"package": Package(**updated_package), "results": results}
+
 # ============ CONTACT ============
 
 @api_router.post("/contact", response_model=ContactInquiry)
@@ -627,9 +763,12 @@ async def get_contact_inquiries(_: dict = Depends(verify_token)):
 
 # ============ FACEBOOK INTEGRATION ============
 
+async def load_facebook_settings() -> Optional[dict]:
+    return await db.facebook_settings.find_one()
+
 @api_router.get("/facebook/settings")
 async def get_facebook_settings():
-    settings = await db.facebook_settings.find_one()
+    settings = await documents.get("facebook_settings", load_facebook_settings)
     if settings and settings.get('enabled'):
         # Return public data only (no access token)
         return {
@@ -639,63 +778,62 @@ async def get_facebook_settings():
         }
     return {"enabled": False}
 
-@api_router.get("/facebook/posts")
-async def get_facebook_posts():
-    """Fetch recent posts from Facebook page"""
-    settings = await db.facebook_settings.find_one()
-    
+def parse_facebook_posts(data: dict) -> List[dict]:
+    posts = []
+    for post in data.get('data', []):
+        post_data = {
+            'id': post.get('id'),
+            'message': post.get('message', ''),
+            'created_time': post.get('created_time'),
+            'image': post.get('full_picture'),
+            'link': post.get('permalink_url'),
+        }
+        
+        # Try to get better image from attachments
+        if post.get('attachments'):
+            attachments = post['attachments'].get('data', [])
+            if attachments:
+                media = attachments[0].get('media')
+                if media and media.get('image'):
+                    post_data['image'] = media['image'].get('src')
+        
+        posts.append(post_data)
+    return posts
+
+async def fetch_facebook_posts(page_id: str, access_token: str, posts_limit: int) -> List[dict]:
+    """Recent posts of a page from the Graph API; raises if they cannot be fetched"""
+    url = f"https://graph.facebook.com/v18.0/{page_id}/posts"
+    params = {
+        'fields': 'id,message,created_time,full_picture,permalink_url,attachments{media,description,url}',
+        'limit': posts_limit,
+        'access_token': access_token
+    }
+    response = await http_client.get(url, params=params)
+    if response.status_code != 200:
+        raise RuntimeError(f"Facebook API error: {response.text}")
+    return parse_facebook_posts(response.json())
+
+def facebook_posts_key(settings: Optional[dict]) -> Optional[tuple]:
+    """(page, token, limit) of the configured feed, or None when it is off"""
     if not settings or not settings.get('enabled'):
-        return []
-    
+        return None
     page_id = settings.get('pageId')
     access_token = settings.get('accessToken')
-    posts_limit = settings.get('postsLimit', 6)
-    
     if not page_id or not access_token:
+        return None
+    return page_id, access_token, settings.get('postsLimit', 6)
+
+async def load_facebook_posts(wait: bool = True) -> List[dict]:
+    settings = await documents.get("facebook_settings", load_facebook_settings)
+    key = facebook_posts_key(settings)
+    if key is None:
         return []
-    
-    try:
-        # Fetch posts from Facebook Graph API
-        url = f"https://graph.facebook.com/v18.0/{page_id}/posts"
-        params = {
-            'fields': 'id,message,created_time,full_picture,permalink_url,attachments{media,description,url}',
-            'limit': posts_limit,
-            'access_token': access_token
-        }
-        
-        response = requests.get(url, params=params, timeout=10)
-        
-        if response.status_code == 200:
-            data = response.json()
-            posts = []
-            
-            for post in data.get('data', []):
-                post_data = {
-                    'id': post.get('id'),
-                    'message': post.get('message', ''),
-                    'created_time': post.get('created_time'),
-                    'image': post.get('full_picture'),
-                    'link': post.get('permalink_url'),
-                }
-                
-                # Try to get better image from attachments
-                if post.get('attachments'):
-                    attachments = post['attachments'].get('data', [])
-                    if attachments:
-                        media = attachments[0].get('media')
-                        if media and media.get('image'):
-                            post_data['image'] = media['image'].get('src')
-                
-                posts.append(post_data)
-            
-            return posts
-        else:
-            logger.error(f"Facebook API error: {response.text}")
-            return []
-            
-    except Exception as e:
-        logger.error(f"Error fetching Facebook posts: {str(e)}")
-        return []
+    return await facebook_posts.get(key, lambda: fetch_facebook_posts(*key), fallback=[], wait=wait)
+
+@api_router.get("/facebook/posts")
+async def get_facebook_posts():
+    """Recent posts from the Facebook page, refreshed in the background"""
+    return await load_facebook_posts()
 
 @api_router.get("/admin/facebook/settings", response_model=FacebookSettings)
 async def get_facebook_settings_admin(_: dict = Depends(verify_token)):
@@ -709,6 +847,7 @@ async def get_facebook_settings_admin(_: dict = Depends(verify_token)):
             enabled=False
         )
         await db.facebook_settings.insert_one(default_settings.dict())
+        documents.invalidate("facebook_settings")
         settings = default_settings.dict()
     return FacebookSettings(**settings)
 
@@ -723,8 +862,15 @@ async def update_facebook_settings(
     
     update_data = {k: v for k, v in settings_update.dict().items() if v is not None}
     await db.facebook_settings.update_one({"id": settings["id"]}, {"$set": update_data})
+    documents.invalidate("facebook_settings")
     
     updated_settings = await db.facebook_settings.find_one({"id": settings["id"]})
+    key = facebook_posts_key(updated_settings)
+    if key != facebook_posts_key(settings):
+        # Another page or token: never show the old posts, fetch the new ones now
+        facebook_posts.invalidate()
+        if key is not None:
+            facebook_posts.refresh(key, lambda: fetch_facebook_posts(*key))
     return FacebookSettings(**updated_settings)
 
 @api_router.post("/admin/facebook/test")
@@ -740,7 +886,7 @@ async def test_facebook_connection(
             'access_token': settings.accessToken
         }
         
-        response = requests.get(url, params=params, timeout=10)
+        response = await http_client.get(url, params=params)
         
         if response.status_code == 200:
             data = response.json()
@@ -763,10 +909,13 @@ async def test_facebook_connection(
 
 # ============ SOCIAL MEDIA LINKS ============
 
+async def load_social_media_links() -> Optional[dict]:
+    return await db.social_media_links.find_one()
+
 @api_router.get("/social-media")
 async def get_social_media_links():
     """Get social media links for public display"""
-    links = await db.social_media_links.find_one()
+    links = await documents.get("social_media_links", load_social_media_links)
     if links and links.get('enabled'):
         # Return only non-empty links
         result = {}
@@ -793,6 +942,7 @@ async def get_social_media_links_admin(_: dict = Depends(verify_token)):
             enabled=True
         )
         await db.social_media_links.insert_one(default_links.dict())
+        documents.invalidate("social_media_links")
         links = default_links.dict()
     return SocialMediaLinks(**links)
 
@@ -807,25 +957,389 @@ async def update_social_media_links(
     
     update_data = {k: v for k, v in links_update.dict().items() if v is not None}
     await db.social_media_links.update_one({"id": links["id"]}, {"$set": update_data})
+    documents.invalidate("social_media_links")
     
     updated_links = await db.social_media_links.find_one({"id": links["id"]})
     return SocialMediaLinks(**updated_links)
 
 # ============ FILE SERVING ============
 
+async def upload_etag(filename: str, stat_result: os.stat_result) -> str:
+    """Strong validator recorded at upload time; legacy files fall back to stat"""
+    digest = await get_upload_digest(filename)
+    return quote_etag(digest) if digest else stat_etag(stat_result)
+
+async def warm_hot_cache(file_url: str):
+    """Load an upload into the hot cache ahead of the first request"""
+    if not file_url or not file_url.startswith("/api/uploads/"):
+        return
+    filename = file_url.split("/")[-1]
+    file_path = upload_path(filename)
+    try:
+        stat_result = file_path.stat()
+    except OSError:
+        return
+    if not stat.S_ISREG(stat_result.st_mode) or not hot_cache.accepts(stat_result.st_size):
+        return
+    etag = await upload_etag(filename, stat_result)
+    try:
+        await hot_cache.load(file_path, stat_result, validator_headers(etag, stat_result.st_mtime, filename))
+    except OSError:
+        return
+
+@api_router.get("/admin/uploads/cache-stats", response_model=UploadCacheStats)
+async def get_upload_cache_stats(_: dict = Depends(verify_token)):
+    """Hit/miss counters of the in-memory hot file cache"""
+    return hot_cache.stats()
+
 @api_router.get("/uploads/{filename}")
-async def serve_upload(filename: str):
-    file_path = UPLOAD_DIR / filename
-    if not file_path.exists():
+async def serve_upload(
+    request: Request,
+    filename: str,
+    w: Optional[int] = None,
+    q: Optional[int] = None,
+    fmt: Optional[str] = None
+):
+    # Any resize parameter switches to a cached, generated-on-demand variant
+    resize = w is not None or q is not None or fmt is not None
+    
+    # Originals with derivatives are negotiated: a derivative may be sent
+    # instead, chosen from Accept and the client hints, so caches must key
+    # on those headers
+    served_name = filename
+    negotiation_headers = {}
+    if not resize and not DERIVATIVE_SUFFIX_RE.search(Path(filename).stem):
+        original_width, derivatives = await get_upload_variants(filename)
+        if derivatives:
+            negotiation_headers = {"Vary": NEGOTIATION_VARY, "Accept-CH": ACCEPT_CH}
+            served_name = choose_variant(request.headers, original_width, derivatives) or filename
+    file_path = upload_path(served_name)
+    
+    # Small hot files are answered from memory; ranges and offloading bypass it
+    use_hot_cache = not resize and not UPLOAD_OFFLOAD_MODE and "range" not in request.headers
+    if use_hot_cache:
+        hot = hot_cache.get(served_name)
+        if hot is not None:
+            if is_not_modified(request.headers, hot.headers["ETag"], hot.last_modified):
+                return Response(status_code=304, headers={**hot.headers, **negotiation_headers})
+            return hot.response(negotiation_headers)
+    
+    # With object storage this node may not have a copy: originals are read
+    # straight from the bucket, resizes need the source locally
+    if storage.remote and not file_path.exists():
+        if not resize:
+            return RedirectResponse(storage.read_url(served_name), headers=negotiation_headers)
+        await storage.fetch(filename)
+    
+    try:
+        stat_result = file_path.stat()
+    except OSError:
+        stat_result = None
+    if stat_result is None or not stat.S_ISREG(stat_result.st_mode):
+        raise HTTPException(status_code=404, detail="File not found")
+    
+    etag = await upload_etag(served_name, stat_result)
+    if resize:
+        if not is_allowed_image(filename):
+            raise HTTPException(status_code=400, detail="Only images can be resized")
+        width, quality, image_format = normalize_resize_params(w, q, fmt, file_path)
+        etag = f'{etag[:-1]}-r{width}q{quality}{image_format}"'
+    
+    headers = validator_headers(etag, stat_result.st_mtime, served_name)
+    if is_not_modified(request.headers, etag, stat_result.st_mtime):
+        return Response(status_code=304, headers={**headers, **negotiation_headers})
+    
+    if resize:
+        try:
+            file_path = await resize_cache.get(file_path, width, quality, image_format)
+        except Exception as e:
+            logger.error(f"Failed to resize {filename}: {str(e)}")
+            raise HTTPException(status_code=422, detail="Image could not be resized")
+        stat_result = file_path.stat()
+    
+    offloaded = offload_response(file_path, UPLOAD_DIR, {**headers, **negotiation_headers})
+    if offloaded is not None:
+        return offloaded
+    if use_hot_cache and hot_cache.accepts(stat_result.st_size):
+        # Cached with its own validators only; the same file is also served
+        # under its own URL, without negotiation
+        try:
+            hot = await hot_cache.load(file_path, stat_result, headers)
+        except OSError:
+            # Deleted (or replaced) since it was looked up
+            raise HTTPException(status_code=404, detail="File not found")
+        return hot.response(negotiation_headers)
+    return UploadFileResponse(file_path, request.headers, stat_result, headers={**headers, **negotiation_headers})
+
+# ============ DEEP ZOOM TILES ============
+
+@api_router.post("/admin/uploads/{filename}/tiles", response_model=DeepZoomInfo)
+async def create_upload_tiles(
+    filename: str,
+    _: dict = Depends(verify_token)
+):
+    """Build the Deep Zoom pyramid of an uploaded image so viewers can load only visible tiles"""
+    if not is_allowed_image(filename):
+        raise HTTPException(status_code=400, detail="Only images can be tiled")
+    if not upload_path(filename).is_file() and not (storage.remote and await storage.fetch(filename)):
         raise HTTPException(status_code=404, detail="File not found")
-    return FileResponse(file_path)
+    try:
+        return await build_tiles(db, filename)
+    except Exception as e:
+        logger.error(f"Failed to tile {filename}: {str(e)}")
+        raise HTTPException(status_code=422, detail="Image could not be tiled")
+
+@api_router.delete("/admin/uploads/{filename}/tiles")
+async def delete_upload_tiles(
+    filename: str,
+    _: dict = Depends(verify_token)
+):
+    await remove_tiles(db, filename)
+    return {"message": "Tiles deleted successfully"}
+
+async def serve_tile_file(request: Request, name: str):
+    """
+    Serve a file of a tile pyramid with the same validators and offloading as
+    uploads. Rebuilding a pyramid rewrites its files in place, so none of them
+    are immutable.
+    """
+    file_path = UPLOAD_DIR / name
+    if storage.remote and not file_path.exists():
+        return RedirectResponse(storage.read_url(name))
+    
+    try:
+        stat_result = file_path.stat()
+    except OSError:
+        raise HTTPException(status_code=404, detail="File not found")
+    
+    etag = stat_etag(stat_result)
+    headers = {**validator_headers(etag, stat_result.st_mtime, name), "Cache-Control": DEFAULT_CACHE_CONTROL}
+    if is_not_modified(request.headers, etag, stat_result.st_mtime):
+        return Response(status_code=304, headers=headers)
+    
+    offloaded = offload_response(file_path, UPLOAD_DIR, headers)
+    if offloaded is not None:
+        return offloaded
+    return UploadFileResponse(file_path, request.headers, stat_result, headers=headers)
+
+@api_router.get("/tiles/{stem}.dzi")
+async def serve_tile_descriptor(request: Request, stem: str):
+    """DZI descriptor; tiles live under /api/tiles/{stem}_files/ as viewers expect"""
+    if not UPLOAD_STEM_RE.match(stem):
+        raise HTTPException(status_code=404, detail="File not found")
+    return await serve_tile_file(request, descriptor_name(stem))
+
+@api_router.get("/tiles/{stem}_files/{level}/{tile}")
+async def serve_tile(request: Request, stem: str, level: int, tile: str):
+    if not UPLOAD_STEM_RE.match(stem) or not TILE_NAME_RE.match(tile):
+        raise HTTPException(status_code=404, detail="File not found")
+    return await serve_tile_file(request, tile_name(stem, level, tile))
+
+# ============ RESUMABLE UPLOADS ============
+
+UPLOAD_OFFSET_HEADER = "Upload-Offset"
+
+def gallery_collection(target_type: str):
+    return {"wedding": db.weddings, "package": db.packages}[target_type]
+
+async def get_upload_session_or_404(session_id: str) -> dict:
+    session = await db.upload_sessions.find_one({"id": session_id})
+    if not session or session["updatedAt"] < session_expiry_cutoff():
+        raise HTTPException(status_code=404, detail="Upload session not found")
+    return session
+
+async def validate_upload_target(target_type: Optional[str], target_id: Optional[str]):
+    if target_type:
+        if target_type not in SESSION_TARGET_PREFIXES:
+            raise HTTPException(status_code=400, detail="Invalid upload target")
+        target = await gallery_collection(target_type).find_one({"id": target_id})
+        if not target:
+            raise HTTPException(status_code=404, detail="Upload target not found")
+
+async def attach_upload(target_type: Optional[str], target_id: Optional[str], image_asset: dict):
+    """Append a processed upload to its gallery, if it has one"""
+    if target_type:
+        await gallery_collection(target_type).update_one(
+            {"id": target_id},
+            {"$push": {"images": image_asset["url"], "imageAssets": image_asset}}
+        )
+
+async def purge_expired_upload_sessions():
+    expired = await db.upload_sessions.find({"updatedAt": {"$lt": session_expiry_cutoff()}}).to_list(1000)
+    for session in expired:
+        remove_session_file(session["id"])
+        await db.upload_sessions.delete_one({"id": session["id"]})
+
+@api_router.post("/admin/uploads/sessions", response_model=UploadSession)
+async def create_upload_session(
+    session_create: UploadSessionCreate,
+    _: dict = Depends(verify_token)
+):
+    """Start a resumable upload; chunks are then PUT with an Upload-Offset header"""
+    validate_image_filename(session_create.filename)
+    validate_session_size(session_create.size)
+    await validate_upload_target(session_create.targetType, session_create.targetId)
+    
+    await purge_expired_upload_sessions()
+    
+    session = UploadSession(**session_create.dict())
+    await db.upload_sessions.insert_one(session.dict())
+    return session
+
+@api_router.get("/admin/uploads/sessions/{session_id}", response_model=UploadSession)
+async def get_upload_session(
+    session_id: str,
+    _: dict = Depends(verify_token)
+):
+    """Report how many bytes the server has, so the client knows where to resume"""
+    session = await get_upload_session_or_404(session_id)
+    return UploadSession(**session)
+
+@api_router.put("/admin/uploads/sessions/{session_id}", response_model=UploadSession)
+async def upload_session_chunk(
+    session_id: str,
+    request: Request,
+    _: dict = Depends(verify_token)
+):
+    """Append the raw request body at the offset given in the Upload-Offset header"""
+    session = await get_upload_session_or_404(session_id)
+    
+    offset_header = request.headers.get(UPLOAD_OFFSET_HEADER, "")
+    if not offset_header.isdigit():
+        raise HTTPException(status_code=400, detail=f"{UPLOAD_OFFSET_HEADER} header is required")
+    
+    # Only one request writes a session at a time; the offset is committed
+    # only if nobody else moved it meanwhile
+    offset = await append_chunk(db.upload_sessions, session, int(offset_header), request.stream())
+    session.update({"offset": offset, "updatedAt": datetime.utcnow()})
+    return UploadSession(**session)
+
+@api_router.post("/admin/uploads/sessions/{session_id}/finalize", response_model=UploadSessionResult)
+async def finalize_upload_session(
+    session_id: str,
+    _: dict = Depends(verify_token)
+):
+    """Store a completed upload and attach it to its gallery, if it has one"""
+    session = await get_upload_session_or_404(session_id)
+    if session["offset"] != session["size"]:
+        raise HTTPException(
+            status_code=409,
+            detail=f"Upload incomplete: {session['offset']} of {session['size']} bytes received"
+        )
+    
+    # Claim the session first so a repeated finalize cannot store the file twice
+    result = await db.upload_sessions.delete_one({"id": session_id})
+    if result.deleted_count == 0:
+        raise HTTPException(status_code=404, detail="Upload session not found")
+    
+    target_type = session.get("targetType")
+    prefix = SESSION_TARGET_PREFIXES.get(target_type, "upload")
+    file_url = await store_upload_file(session_file_path(session_id), session["filename"], prefix)
+    image_asset = await build_image_asset(file_url)
+    await attach_upload(target_type, session.get("targetId"), image_asset)
+    
+    return {
+        "asset": image_asset,
+        "targetType": target_type,
+        "targetId": session.get("targetId")
+    }
+
+@api_router.delete("/admin/uploads/sessions/{session_id}")
+async def cancel_upload_session(
+    session_id: str,
+    _: dict = Depends(verify_token)
+):
+    session = await get_upload_session_or_404(session_id)
+    remove_session_file(session["id"])
+    await db.upload_sessions.delete_one({"id": session_id})
+    return {"message": "Upload session cancelled"}
+
+# ============ DIRECT UPLOADS ============
+
+@api_router.post("/admin/uploads/direct", response_model=DirectUpload)
+async def create_direct_upload(
+    upload_create: DirectUploadCreate,
+    _: dict = Depends(verify_token)
+):
+    """Presign a PUT so the browser sends the file straight to object storage"""
+    if not storage.supports_presigned_upload:
+        raise HTTPException(status_code=501, detail="Direct uploads require object storage")
+    validate_image_filename(upload_create.filename)
+    validate_session_size(upload_create.size)
+    await validate_upload_target(upload_create.targetType, upload_create.targetId)
+    
+    upload_id = str(uuid.uuid4())
+    name = f"{INCOMING_PREFIX}{upload_id}{get_file_extension(upload_create.filename)}"
+    presigned = storage.presigned_upload(name, content_type_for(upload_create.filename), upload_create.size)
+    await db.direct_uploads.insert_one({
+        "id": upload_id,
+        "name": name,
+        **upload_create.dict(),
+        "createdAt": datetime.utcnow()
+    })
+    return DirectUpload(id=upload_id, **presigned)
+
+@api_router.post("/admin/uploads/direct/{upload_id}/complete", response_model=UploadSessionResult)
+async def complete_direct_upload(
+    upload_id: str,
+    _: dict = Depends(verify_token)
+):
+    """Process a file the browser has PUT into storage and attach it to its gallery"""
+    upload = await db.direct_uploads.find_one({"id": upload_id})
+    if not upload:
+        raise HTTPException(status_code=404, detail="Direct upload not found")
+    
+    temp_path = UPLOAD_DIR / f".{upload_id}.part"
+    try:
+        await storage.download(upload["name"], temp_path)
+    except Exception:
+        raise HTTPException(status_code=409, detail="File has not been uploaded yet")
+    if temp_path.stat().st_size != upload["size"]:
+        temp_path.unlink(missing_ok=True)
+        raise HTTPException(status_code=400, detail="Uploaded file does not match the declared size")
+    
+    # Claim the upload so a repeated completion cannot store the file twice
+    result = await db.direct_uploads.delete_one({"id": upload_id})
+    if result.deleted_count == 0:
+        temp_path.unlink(missing_ok=True)
+        raise HTTPException(status_code=404, detail="Direct upload not found")
+    
+    target_type = upload.get("targetType")
+    prefix = SESSION_TARGET_PREFIXES.get(target_type, "upload")
+    file_url = await store_upload_file(temp_path, upload["filename"], prefix)
+    image_asset = await build_image_asset(file_url)
+    await storage.delete([upload["name"]])
+    await attach_upload(target_type, upload.get("targetId"), image_asset)
+    
+    return {
+        "asset": image_asset,
+        "targetType": target_type,
+        "targetId": upload.get("targetId")
+    }
+
+# ============ UPLOAD MAINTENANCE ============
+
+@api_router.post("/admin/uploads/gc", response_model=UploadGCReport)
+async def collect_orphaned_uploads(
+    dry_run: bool = False,
+    grace_minutes: Optional[int] = None,
+    _: dict = Depends(verify_token)
+):
+    """Delete uploaded files that no document references any more"""
+    await upload_deletions.join()
+    if grace_minutes is None:
+        return await collect_orphans(db, dry_run=dry_run)
+    return await collect_orphans(db, dry_run=dry_run, grace=max(0, grace_minutes) * 60)
 
 # ============ YOUTUBE STORIES ============
 
+async def load_youtube_settings() -> Optional[dict]:
+    return await db.youtube_settings.find_one()
+
 @api_router.get("/youtube/settings")
 async def get_youtube_settings_public():
     """Get YouTube settings for public display"""
-    settings = await db.youtube_settings.find_one()
+    settings = await documents.get("youtube_settings", load_youtube_settings)
     if settings and settings.get('enabled'):
         return {
             "enabled": True,
@@ -834,58 +1348,48 @@ async def get_youtube_settings_public():
         }
     return {"enabled": False}
 
+async def load_youtube_videos() -> Optional[List[dict]]:
+    settings = await documents.get("youtube_settings", load_youtube_settings)
+    return await cached_youtube_videos(db, settings)
+
+def start_youtube_refresh(force: bool = False) -> asyncio.Task:
+    """Refresh the stored videos without holding up the current request"""
+    async def refresh():
+        try:
+            if await refresh_youtube_cache(db, force=force):
+                documents.invalidate("youtube_videos")
+        except Exception as e:
+            logger.error(f"YouTube refresh failed: {e}")
+    task = asyncio.create_task(refresh())
+    background_tasks.add(task)
+    task.add_done_callback(background_tasks.discard)
+    return task
+
+async def kick_off_youtube_refresh():
+    """
+    First fetch of a channel with no stored videos. Started at most once per
+    retry interval per worker and never while the last one is still running,
+    so requests for an empty feed do not each cost a settings read and lease.
+    """
+    key = youtube_feed_key(await documents.get("youtube_settings", load_youtube_settings))
+    if key is None:
+        return
+    last = youtube_kickoffs.get(key[0])
+    if last is not None:
+        started_at, task = last
+        if not task.done() or datetime.utcnow() - started_at < YOUTUBE_RETRY_AFTER:
+            return
+    youtube_kickoffs[key[0]] = (datetime.utcnow(), start_youtube_refresh())
+
 @api_router.get("/youtube/videos", response_model=List[YouTubeVideo])
 async def get_youtube_videos():
-    """Fetch videos from YouTube channel"""
-    settings = await db.youtube_settings.find_one()
-    
-    if not settings or not settings.get('enabled'):
-        return []
-    
-    channel_id = settings.get('channel_id')
-    api_key = settings.get('api_key')
-    max_videos = settings.get('max_videos', 6)
-    
-    if not channel_id or not api_key:
-        return []
-    
-    try:
-        # Fetch videos from YouTube Data API
-        url = "https://www.googleapis.com/youtube/v3/search"
-        params = {
-            'part': 'snippet',
-            'channelId': channel_id,
-            'maxResults': max_videos,
-            'order': 'date',
-            'type': 'video',
-            'key': api_key
-        }
-        
-        response = requests.get(url, params=params, timeout=10)
-        
-        if response.status_code == 200:
-            data = response.json()
-            videos = []
-            
-            for item in data.get('items', []):
-                snippet = item.get('snippet', {})
-                video_data = YouTubeVideo(
-                    video_id=item['id']['videoId'],
-                    title=snippet.get('title', ''),
-                    description=snippet.get('description', ''),
-                    thumbnail=snippet.get('thumbnails', {}).get('high', {}).get('url', ''),
-                    published_at=snippet.get('publishedAt', '')
-                )
-                videos.append(video_data)
-            
-            return videos
-        else:
-            logger.error(f"YouTube API error: {response.text}")
-            return []
-            
-    except Exception as e:
-        logger.error(f"Error fetching YouTube videos: {str(e)}")
+    """Channel videos from the stored feed; the YouTube API is only called by refreshes"""
+    videos = await documents.get("youtube_videos", load_youtube_videos)
+    if videos is None:
+        # Nothing fetched for this channel yet
+        await kick_off_youtube_refresh()
         return []
+    return [YouTubeVideo(**video) for video in videos]
 
 @api_router.get("/admin/youtube/settings", response_model=YouTubeSettings)
 async def get_youtube_settings_admin(_: dict = Depends(verify_token)):
@@ -894,6 +1398,7 @@ async def get_youtube_settings_admin(_: dict = Depends(verify_token)):
         # Create default settings
         default_settings = YouTubeSettings()
         await db.youtube_settings.insert_one(default_settings.dict())
+        documents.invalidate("youtube_settings")
         settings = default_settings.dict()
     return YouTubeSettings(**settings)
 
@@ -911,8 +1416,13 @@ async def update_youtube_settings(
     
     update_data = {k: v for k, v in settings_update.dict().items() if v is not None}
     await db.youtube_settings.update_one({"id": settings["id"]}, {"$set": update_data})
+    documents.invalidate("youtube_settings")
+    documents.invalidate("youtube_videos")
     
     updated_settings = await db.youtube_settings.find_one({"id": settings["id"]})
+    key = youtube_feed_key(updated_settings)
+    if key is not None and key != youtube_feed_key(settings):
+        start_youtube_refresh(force=True)
     return YouTubeSettings(**updated_settings)
 
 @api_router.post("/admin/youtube/test")
@@ -930,7 +1440,7 @@ async def test_youtube_connection(
             'key': api_key
         }
         
-        response = requests.get(url, params=params, timeout=10)
+        response = await http_client.get(url, params=params)
         
         if response.status_code == 200:
             data = response.json()
@@ -966,10 +1476,14 @@ async def test_youtube_connection(
 
 # ============ SECTION CONTENT (CMS) ============
 
+async def load_section_content() -> dict:
+    """Every edited section in one entry, so unknown keys cannot grow the cache"""
+    return {content["section_key"]: content async for content in db.section_content.find({}, {"_id": 0})}
+
 @api_router.get("/sections/{section_key}")
 async def get_section_content(section_key: str):
     """Get content for a specific section"""
-    content = await db.section_content.find_one({"section_key": section_key})
+    content = (await documents.get("section_content", load_section_content)).get(section_key)
     if content:
         return {
             "section_key": content["section_key"],
@@ -1037,6 +1551,7 @@ async def update_section_content(
     else:
         update_data["id"] = str(uuid.uuid4())
         await db.section_content.insert_one(update_data)
+    documents.invalidate("section_content")
     
     updated_content = await db.section_content.find_one({"section_key": section_key})
     return {
@@ -1046,6 +1561,54 @@ async def update_section_content(
         "description": updated_content.get("description", "")
     }
 
+# ============ HOMEPAGE ============
+
+# Browsers may reuse the bundle briefly, then revalidate it with its ETag
+HOMEPAGE_CACHE_CONTROL = os.environ.get('HOMEPAGE_CACHE_CONTROL', 'public, max-age=60, stale-while-revalidate=300')
+HOMEPAGE_WEDDINGS = 6
+HOMEPAGE_SECTIONS = ("films", "contact")
+
+@api_router.get("/homepage")
+async def get_homepage(request: Request):
+    """Everything the public homepage renders, gathered concurrently in one response"""
+    (
+        settings, hero_carousel, weddings, featured_film, about, packages, social_media,
+        facebook_settings, facebook_posts, youtube_settings, youtube_videos, *sections
+    ) = await asyncio.gather(
+        get_settings(),
+        get_hero_carousel(),
+        get_weddings(HOMEPAGE_WEDDINGS),
+        get_featured_film(),
+        get_about(),
+        get_packages(),
+        get_social_media_links(),
+        get_facebook_settings(),
+        # Never held up by the Graph API: a cold feed is empty until fetched
+        load_facebook_posts(wait=False),
+        get_youtube_settings_public(),
+        get_youtube_videos(),
+        *(get_section_content(key) for key in HOMEPAGE_SECTIONS)
+    )
+    body = json.dumps(jsonable_encoder({
+        "settings": settings,
+        "heroCarousel": hero_carousel,
+        "weddings": weddings,
+        "featuredFilm": featured_film,
+        "about": about,
+        "packages": packages,
+        "sections": dict(zip(HOMEPAGE_SECTIONS, sections)),
+        "socialMedia": social_media,
+        "facebook": {"settings": facebook_settings, "posts": facebook_posts},
+        "youtube": {"settings": youtube_settings, "videos": youtube_videos}
+    }), separators=(",", ":")).encode()
+
+    etag = quote_etag(hashlib.sha256(body).hexdigest()[:32])
+    headers = {"ETag": etag, "Cache-Control": HOMEPAGE_CACHE_CONTROL}
+    if_none_match = request.headers.get("if-none-match")
+    if if_none_match is not None and etag_matches(if_none_match, etag):
+        return Response(status_code=304, headers=headers)
+    return Response(body, media_type="application/json", headers=headers)
+
 # ============ HEALTH CHECK ============
 
 @api_router.get("/")
@@ -1055,6 +1618,8 @@ async def root():
 # Include the router in the main app
 app.include_router(api_router)
 
+app.add_middleware(UploadSizeLimitMiddleware)
+
 app.add_middleware(
     CORSMiddleware,
     allow_credentials=True,
@@ -1063,6 +1628,65 @@ app.add_middleware(
     allow_headers=["*"],
 )
 
+@app.on_event("startup")
+async def create_upload_indexes():
+    await db.upload_refs.create_index("filename", unique=True)
+    await db.upload_refs.create_index("derivatives.filename")
+    await db.upload_sessions.create_index("id", unique=True)
+    await db.direct_uploads.create_index("id", unique=True)
+    # Abandoned direct uploads; objects left under .incoming/ need a bucket lifecycle rule
+    await db.direct_uploads.create_index(
+        "createdAt", expireAfterSeconds=int(UPLOAD_SESSION_TTL.total_seconds())
+    )
+    # One quota ledger entry per day; a week is kept for reference
+    await db.youtube_quota.create_index("createdAt", expireAfterSeconds=7 * 24 * 3600)
+
+@app.on_event("startup")
+async def start_upload_maintenance():
+    upload_deletions.start()
+    app.state.upload_gc_task = asyncio.create_task(run_periodic_collection(db))
+
+@app.on_event("startup")
+async def open_http_client():
+    http_client.start()
+
+@app.on_event("startup")
+async def start_youtube_refresh_schedule():
+    app.state.youtube_refresh_task = asyncio.create_task(
+        run_periodic_youtube_refresh(db, lambda: documents.invalidate("youtube_videos"))
+    )
+
+@app.on_event("startup")
+async def prewarm_hot_cache():
+    """Load the files every homepage visit asks for"""
+    try:
+        async for item in db.hero_carousel.find({"enabled": True}):
+            await warm_hot_cache(item["url"])
+            for variant in (item.get("asset") or {}).get("variants", []):
+                await warm_hot_cache(variant["url"])
+        settings = await db.settings.find_one()
+        if settings:
+            await warm_hot_cache(settings.get("logoUrl"))
+    except Exception as e:
+        logger.warning(f"Could not prewarm hot file cache: {e}")
+
+@app.on_event("shutdown")
+async def stop_upload_maintenance():
+    app.state.upload_gc_task.cancel()
+    await upload_deletions.stop()
+
+@app.on_event("shutdown")
+async def stop_youtube_refresh_schedule():
+    app.state.youtube_refresh_task.cancel()
+
+@app.on_event("shutdown")
+async def close_http_client():
+    await http_client.close()
+
 @app.on_event("shutdown")
 async def shutdown_db_client():
     client.close()
+
+@app.on_event("shutdown")
+async def shutdown_image_workers():
+    shutdown_executor()
@@ -0,0 +1,250 @@
+import os
+import shutil
+from dataclasses import dataclass
+from datetime import datetime, timedelta, timezone
+from mimetypes import guess_type
+from pathlib import Path
+from typing import Callable, Iterator, List, Optional
+from fastapi import HTTPException
+from starlette.concurrency import run_in_threadpool
+from upload_layout import iter_upload_files, resolve_path
+
+# "local" keeps uploads in UPLOAD_DIR only; "s3" stores them in an
+# S3-compatible bucket (AWS, MinIO, ...) and uses UPLOAD_DIR as a node-local
+# working copy
+STORAGE_BACKEND = os.environ.get('STORAGE_BACKEND', 'local').lower()
+
+S3_BUCKET = os.environ.get('S3_BUCKET', '')
+S3_PREFIX = os.environ.get('S3_PREFIX', 'uploads/')
+S3_ENDPOINT_URL = os.environ.get('S3_ENDPOINT_URL') or None
+S3_REGION = os.environ.get('S3_REGION') or None
+# Public (CDN or bucket) base URL; without one, reads get presigned URLs
+S3_PUBLIC_URL = os.environ.get('S3_PUBLIC_URL', '').rstrip('/')
+PRESIGN_EXPIRES = int(os.environ.get('STORAGE_PRESIGN_EXPIRES', '900'))
+
+# Keys under this prefix hold direct uploads that have not been processed yet
+INCOMING_PREFIX = ".incoming/"
+
+@dataclass
+class StoredFile:
+    name: str
+    size: int
+    modified: float
+
+def content_type_for(name: str) -> str:
+    return guess_type(name)[0] or "application/octet-stream"
+
+def local_path(root: Path, name: str) -> Path:
+    """Working copy of a stored name; plain upload names follow the layout"""
+    if "/" in name:
+        return root / name
+    return resolve_path(root, name)
+
+class LocalStorage:
+    """
+    Uploads live in UPLOAD_DIR itself, so the working copy is the stored copy:
+    publishing, listing and deleting objects are no-ops and reads are served
+    locally.
+    """
+
+    remote = False
+    supports_presigned_upload = False
+
+    def __init__(self, root: Path):
+        self.root = root
+
+    async def publish(self, names: List[str]):
+        pass
+
+    async def fetch(self, name: str) -> bool:
+        return local_path(self.root, name).is_file()
+
+    def _copy(self, name: str, dest: Path):
+        dest.parent.mkdir(parents=True, exist_ok=True)
+        temp = dest.with_name(f".{dest.name}.fetch")
+        try:
+            shutil.copyfile(local_path(self.root, name), temp)
+            os.replace(temp, dest)
+        finally:
+            temp.unlink(missing_ok=True)
+
+    async def download(self, name: str, dest: Path):
+        """Copy a stored file to a local path; FileNotFoundError if there is none"""
+        await run_in_threadpool(self._copy, name, dest)
+
+    async def delete(self, names: List[str]) -> int:
+        return 0
+
+    async def list_prefix(self, prefix: str) -> List[str]:
+        return []
+
+    def list_files(self) -> Iterator[StoredFile]:
+        """Stored uploads, skipping dotfiles and dot directories"""
+        for entry in iter_upload_files(self.root):
+            stat_result = entry.stat()
+            yield StoredFile(entry.name, stat_result.st_size, stat_result.st_mtime)
+
+    def modified(self, name: str) -> Optional[float]:
+        try:
+            return local_path(self.root, name).stat().st_mtime
+        except FileNotFoundError:
+            return None
+
+    def read_url(self, name: str) -> Optional[str]:
+        return None
+
+    def presigned_upload(self, name: str, content_type: str, size: int) -> dict:
+        # Browsers can only PUT straight to a bucket
+        raise HTTPException(status_code=501, detail="Direct uploads require object storage")
+
+class S3Storage:
+    """
+    Uploads stored as objects in an S3-compatible bucket. boto3 is blocking,
+    so every call runs in a worker thread.
+    """
+
+    remote = True
+    supports_presigned_upload = True
+
+    def __init__(
+        self,
+        root: Path,
+        bucket: str = S3_BUCKET,
+        prefix: str = S3_PREFIX,
+        client=None,
+        public_url: str = S3_PUBLIC_URL,
+        cache_control: Optional[Callable[[str], str]] = None
+    ):
+        if client is None:
+            import boto3
+            client = boto3.client("s3", endpoint_url=S3_ENDPOINT_URL, region_name=S3_REGION)
+        self.root = root
+        self.bucket = bucket
+        self.prefix = prefix
+        self.client = client
+        self.public_url = public_url
+        self.cache_control = cache_control
+
+    def key(self, name: str) -> str:
+        return f"{self.prefix}{name}"
+
+    def _upload(self, name: str):
+        extra_args = {"ContentType": content_type_for(name)}
+        if self.cache_control is not None:
+            extra_args["CacheControl"] = self.cache_control(Path(name).name)
+        self.client.upload_file(str(local_path(self.root, name)), self.bucket, self.key(name), ExtraArgs=extra_args)
+
+    async def publish(self, names: List[str]):
+        """Upload files from the working copy; local copies are kept as a cache"""
+        for name in names:
+            await run_in_threadpool(self._upload, name)
+
+    def _download(self, name: str, dest: Path):
+        dest.parent.mkdir(parents=True, exist_ok=True)
+        temp = dest.with_name(f".{dest.name}.fetch")
+        try:
+            self.client.download_file(self.bucket, self.key(name), str(temp))
+            os.replace(temp, dest)
+        finally:
+            temp.unlink(missing_ok=True)
+
+    async def download(self, name: str, dest: Path):
+        """Copy a stored object to a local path"""
+        await run_in_threadpool(self._download, name, dest)
+
+    async def fetch(self, name: str) -> bool:
+        """Make sure the working copy has a file, downloading it if needed"""
+        path = local_path(self.root, name)
+        if path.is_file():
+            return True
+        try:
+            await self.download(name, path)
+        except self.client.exceptions.ClientError:
+            return False
+        return True
+
+    def _delete(self, names: List[str]) -> int:
+        reclaimed = 0
+        objects = []
+        for name in names:
+            try:
+                head = self.client.head_object(Bucket=self.bucket, Key=self.key(name))
+            except self.client.exceptions.ClientError:
+                continue
+            reclaimed += head["ContentLength"]
+            objects.append({"Key": self.key(name)})
+        # delete_objects takes at most 1000 keys per call
+        for start in range(0, len(objects), 1000):
+            self.client.delete_objects(
+                Bucket=self.bucket,
+                Delete={"Objects": objects[start:start + 1000], "Quiet": True}
+            )
+        return reclaimed
+
+    async def delete(self, names: List[str]) -> int:
+        """Delete objects and return how many bytes they held"""
+        return await run_in_threadpool(self._delete, names)
+
+    def _list(self, prefix: str) -> Iterator[dict]:
+        paginator = self.client.get_paginator("list_objects_v2")
+        for page in paginator.paginate(Bucket=self.bucket, Prefix=self.key(prefix)):
+            yield from page.get("Contents", [])
+
+    async def list_prefix(self, prefix: str) -> List[str]:
+        return await run_in_threadpool(
+            lambda: [obj["Key"][len(self.prefix):] for obj in self._list(prefix)]
+        )
+
+    def list_files(self) -> Iterator[StoredFile]:
+        """Stored uploads, skipping keys under dot prefixes"""
+        for obj in self._list(""):
+            name = obj["Key"][len(self.prefix):]
+            if not name or name.startswith(".") or "/" in name:
+                continue
+            modified = obj["LastModified"]
+            if modified.tzinfo is None:
+                modified = modified.replace(tzinfo=timezone.utc)
+            yield StoredFile(name, obj["Size"], modified.timestamp())
+
+    def modified(self, name: str) -> Optional[float]:
+        try:
+            head = self.client.head_object(Bucket=self.bucket, Key=self.key(name))
+        except self.client.exceptions.ClientError:
+            return None
+        return head["LastModified"].timestamp()
+
+    def read_url(self, name: str) -> Optional[str]:
+        """Where browsers can fetch a stored file directly"""
+        if self.public_url:
+            return f"{self.public_url}/{self.key(name)}"
+        return self.client.generate_presigned_url(
+            "get_object",
+            Params={"Bucket": self.bucket, "Key": self.key(name)},
+            ExpiresIn=PRESIGN_EXPIRES
+        )
+
+    def presigned_upload(self, name: str, content_type: str, size: int) -> dict:
+        """A URL the browser can PUT the file to, bypassing the API"""
+        url = self.client.generate_presigned_url(
+            "put_object",
+            Params={
+                "Bucket": self.bucket,
+                "Key": self.key(name),
+                "ContentType": content_type,
+                "ContentLength": size
+            },
+            ExpiresIn=PRESIGN_EXPIRES
+        )
+        return {
+            "url": url,
+            "method": "PUT",
+            "headers": {"Content-Type": content_type},
+            "expiresAt": datetime.utcnow() + timedelta(seconds=PRESIGN_EXPIRES)
+        }
+
+def create_storage(root: Path, cache_control: Optional[Callable[[str], str]] = None):
+    if STORAGE_BACKEND == "s3":
+        if not S3_BUCKET:
+            raise RuntimeError("STORAGE_BACKEND=s3 requires S3_BUCKET")
+        return S3Storage(root, cache_control=cache_control)
+    return LocalStorage(root)
@@ -0,0 +1,165 @@
+import os
+import time
+import asyncio
+import logging
+from pathlib import Path
+from typing import Iterator, List, Optional, Set
+from starlette.concurrency import run_in_threadpool
+from file_upload import delete_file, purge_upload, storage
+from upload_layout import DERIVATIVE_SUFFIX_RE
+
+logger = logging.getLogger(__name__)
+
+UPLOAD_URL_PREFIX = "/api/uploads/"
+
+# Collections whose documents may point at uploaded files
+UPLOAD_REFERENCE_COLLECTIONS = ("weddings", "packages", "hero_carousel", "about", "settings")
+
+# (collection, URL field, ImageAsset field) for single images
+ASSET_FIELDS = (
+    ("hero_carousel", "url", "asset"),
+    ("weddings", "coverImage", "coverAsset"),
+    ("packages", "thumbnail", "thumbnailAsset"),
+)
+# (collection, URL list field, ImageAsset list field) for galleries
+ASSET_LIST_FIELDS = (
+    ("weddings", "images", "imageAssets"),
+    ("packages", "images", "imageAssets"),
+)
+
+UPLOAD_GC_INTERVAL = int(os.environ.get('UPLOAD_GC_INTERVAL_HOURS', '24')) * 3600
+# Files younger than this are never collected: an upload is written to disk
+# before the document that references it
+UPLOAD_GC_GRACE = int(os.environ.get('UPLOAD_GC_GRACE_MINUTES', '60')) * 60
+UPLOAD_GC_BATCH_SIZE = int(os.environ.get('UPLOAD_GC_BATCH_SIZE', '100'))
+
+def iter_upload_filenames(value) -> Iterator[str]:
+    """Yield the filename of every upload URL found anywhere in a document"""
+    if isinstance(value, str):
+        if value.startswith(UPLOAD_URL_PREFIX):
+            yield value[len(UPLOAD_URL_PREFIX):]
+    elif isinstance(value, dict):
+        for item in value.values():
+            yield from iter_upload_filenames(item)
+    elif isinstance(value, list):
+        for item in value:
+            yield from iter_upload_filenames(item)
+
+async def referenced_filenames(db) -> Set[str]:
+    filenames = set()
+    for name in UPLOAD_REFERENCE_COLLECTIONS:
+        async for document in db[name].find({}, {"_id": 0}):
+            filenames.update(iter_upload_filenames(document))
+    return filenames
+
+def is_referenced(filename: str, referenced: Set[str], referenced_stems: Set[str]) -> bool:
+    if filename in referenced:
+        return True
+    # Derivatives live as long as their original, listed or not
+    stem = Path(filename).stem
+    return DERIVATIVE_SUFFIX_RE.sub("", stem) in referenced_stems
+
+def find_orphans(referenced: Set[str], grace: int = UPLOAD_GC_GRACE) -> List[str]:
+    """
+    Unreferenced uploads in storage. Dotfiles and dot directories (caches,
+    partial uploads, archived originals) are never listed.
+    """
+    referenced_stems = {Path(name).stem for name in referenced}
+    cutoff = time.time() - grace
+    return [
+        stored.name for stored in storage.list_files()
+        if stored.modified <= cutoff and not is_referenced(stored.name, referenced, referenced_stems)
+    ]
+
+def _still_orphaned(name: str, grace: int) -> bool:
+    # Re-check right before deleting: identical content may have been
+    # re-uploaded onto a content-addressed name since the scan
+    modified = storage.modified(name)
+    return modified is not None and modified <= time.time() - grace
+
+async def collect_orphans(db, dry_run: bool = False, grace: int = UPLOAD_GC_GRACE) -> dict:
+    """
+    Cross-reference stored uploads with every upload URL in the database and
+    delete the files nothing points at, in batches. Returns what was found and
+    freed.
+    """
+    referenced = await referenced_filenames(db)
+    orphans = await run_in_threadpool(find_orphans, referenced, grace)
+    # Originals first, so their derivatives go with them
+    orphans.sort(key=lambda name: DERIVATIVE_SUFFIX_RE.search(Path(name).stem) is not None)
+
+    deleted = 0
+    reclaimed = 0
+    if not dry_run:
+        for start in range(0, len(orphans), UPLOAD_GC_BATCH_SIZE):
+            for name in orphans[start:start + UPLOAD_GC_BATCH_SIZE]:
+                if not await run_in_threadpool(_still_orphaned, name, grace):
+                    continue
+                reclaimed += await purge_upload(name)
+                deleted += 1
+            # Let request handlers run between batches
+            await asyncio.sleep(0)
+
+    return {
+        "referenced": len(referenced),
+        "orphans": orphans,
+        "deleted": deleted,
+        "bytesReclaimed": reclaimed,
+        "dryRun": dry_run
+    }
+
+async def run_periodic_collection(db, interval: int = UPLOAD_GC_INTERVAL):
+    while True:
+        await asyncio.sleep(interval)
+        try:
+            report = await collect_orphans(db)
+            logger.info(
+                f"Upload GC removed {report['deleted']} orphaned files, "
+                f"reclaimed {report['bytesReclaimed']} bytes"
+            )
+        except Exception as e:
+            logger.error(f"Upload GC failed: {e}")
+
+class DeletionQueue:
+    """
+    Deletes uploads in the background so request handlers never wait on disk
+    I/O. Anything still queued when the process dies is picked up later by
+    the orphan collector.
+    """
+
+    def __init__(self):
+        self._queue: asyncio.Queue = asyncio.Queue()
+        self._worker: Optional[asyncio.Task] = None
+
+    def enqueue(self, *file_urls: Optional[str]):
+        for file_url in file_urls:
+            if file_url:
+                self._queue.put_nowait(file_url)
+
+    def start(self):
+        if self._worker is None:
+            self._worker = asyncio.create_task(self._run())
+
+    async def _run(self):
+        while True:
+            file_url = await self._queue.get()
+            try:
+                await delete_file(file_url)
+            except Exception as e:
+                logger.error(f"Failed to delete {file_url}: {e}")
+            finally:
+                self._queue.task_done()
+
+    async def join(self):
+        await self._queue.join()
+
+    async def stop(self, timeout: float = 10):
+        """Finish queued deletions, within reason, then stop the worker"""
+        if self._worker is None:
+            return
+        try:
+            await asyncio.wait_for(self._queue.join(), timeout)
+        except asyncio.TimeoutError:
+            pass
+        self._worker.cancel()
+        self._worker = None
@@ -0,0 +1,158 @@
+import os
+import re
+import bisect
+import errno
+import shutil
+import hashlib
+from functools import lru_cache
+from pathlib import Path
+from typing import Iterator, List, Tuple
+
+# "flat" keeps every upload directly in its volume; "sharded" spreads them
+# over <volume>/ab/cd/ so no directory grows past a few hundred entries.
+# URLs never contain the shard, so switching layouts needs no DB changes.
+UPLOAD_LAYOUT = os.environ.get('UPLOAD_LAYOUT', 'flat').lower()
+SHARDED = UPLOAD_LAYOUT == "sharded"
+
+# Optional upload volumes, e.g. "/app/backend/uploads,/mnt/disk2/uploads=2".
+# Files are placed by consistent hashing over these roots (the optional
+# "=N" weight gives a volume N times the share); without any, UPLOAD_DIR is
+# the only volume. UPLOAD_DIR always holds caches, sessions and temp files.
+UPLOAD_VOLUMES = [
+    (Path(path.strip()), int(weight or 1))
+    for path, _, weight in (spec.partition("=") for spec in os.environ.get('UPLOAD_VOLUMES', '').split(","))
+    if path.strip()
+]
+RING_POINTS_PER_WEIGHT = 128
+
+DERIVATIVE_SUFFIX_RE = re.compile(r"_w\d+$")
+SHARD_DIR_RE = re.compile(r"^[0-9a-f]{2}$")
+
+def placement_key(filename: str) -> str:
+    """Derivatives place like their original, so they always share its directory"""
+    return DERIVATIVE_SUFFIX_RE.sub("", Path(filename).stem)
+
+def _hash(value: str) -> int:
+    return int(hashlib.sha256(value.encode()).hexdigest()[:16], 16)
+
+class HashRing:
+    """
+    Consistent-hash ring over upload volumes. Adding a volume only moves the
+    keys that now fall on its points, roughly its share of all files.
+    """
+
+    def __init__(self, volumes: List[Tuple[Path, int]]):
+        self.points = sorted(
+            (_hash(f"{root}#{index}"), root)
+            for root, weight in volumes
+            for index in range(weight * RING_POINTS_PER_WEIGHT)
+        )
+        self.hashes = [point for point, _ in self.points]
+
+    def root_for(self, filename: str) -> Path:
+        position = bisect.bisect(self.hashes, _hash(placement_key(filename))) % len(self.points)
+        return self.points[position][1]
+
+@lru_cache(maxsize=None)
+def _ring(volumes: Tuple[Tuple[Path, int], ...]) -> HashRing:
+    return HashRing(list(volumes))
+
+def volume_roots(root: Path) -> List[Path]:
+    return [path for path, _ in UPLOAD_VOLUMES] or [root]
+
+def volume_for(root: Path, filename: str) -> Path:
+    """Volume a file belongs on; computed from its name alone"""
+    if not UPLOAD_VOLUMES:
+        return root
+    return _ring(tuple(UPLOAD_VOLUMES)).root_for(filename)
+
+def shard_parts(filename: str) -> Tuple[str, str]:
+    digest = hashlib.sha256(placement_key(filename).encode()).hexdigest()
+    return digest[:2], digest[2:4]
+
+def flat_path(root: Path, filename: str) -> Path:
+    return root / filename
+
+def sharded_path(root: Path, filename: str) -> Path:
+    first, second = shard_parts(filename)
+    return root / first / second / filename
+
+def layout_path(root: Path, filename: str, sharded: bool = SHARDED) -> Path:
+    """Where a file goes inside one volume under a given layout"""
+    return sharded_path(root, filename) if sharded else flat_path(root, filename)
+
+def placement_path(root: Path, filename: str) -> Path:
+    """Where a new file is written: its volume, in the configured layout"""
+    return layout_path(volume_for(root, filename), filename)
+
+def resolve_path(root: Path, filename: str) -> Path:
+    """
+    Where an existing file lives. The placement is tried first; other layouts
+    and volumes are only searched on a miss, so files are found while a
+    migration or rebalance is still moving them.
+    """
+    preferred = placement_path(root, filename)
+    if preferred.exists():
+        return preferred
+    for volume in dict.fromkeys([*volume_roots(root), root]):
+        for sharded in (SHARDED, not SHARDED):
+            candidate = layout_path(volume, filename, sharded)
+            if candidate != preferred and candidate.exists():
+                return candidate
+    return preferred
+
+def relative_location(root: Path, path: Path) -> str:
+    """
+    Path of a file relative to its volume, prefixed with "v<index>/" when
+    several volumes are configured; files in UPLOAD_DIR itself (caches) are
+    relative to it
+    """
+    for index, volume in enumerate(volume_roots(root) if UPLOAD_VOLUMES else []):
+        if path.is_relative_to(volume):
+            return f"v{index}/{path.relative_to(volume).as_posix()}"
+    return path.relative_to(root).as_posix()
+
+def move_file(source: Path, dest: Path):
+    """Atomically place a file at dest, copying when it is on another device"""
+    dest.parent.mkdir(parents=True, exist_ok=True)
+    try:
+        os.replace(source, dest)
+        return
+    except OSError as e:
+        if e.errno != errno.EXDEV:
+            raise
+    temp = dest.with_name(f".{dest.name}.moving")
+    try:
+        shutil.copy2(source, temp)
+        os.replace(temp, dest)
+    finally:
+        temp.unlink(missing_ok=True)
+    source.unlink()
+
+def iter_layout_files(root: Path, sharded: bool) -> Iterator[os.DirEntry]:
+    """Regular files stored in one volume under one layout; dot entries are never included"""
+    if not root.is_dir():
+        return
+    if not sharded:
+        with os.scandir(root) as entries:
+            for entry in entries:
+                if not entry.name.startswith(".") and entry.is_file(follow_symlinks=False):
+                    yield entry
+        return
+    for first in sorted(os.listdir(root)):
+        if not SHARD_DIR_RE.match(first) or not (root / first).is_dir():
+            continue
+        for second in sorted(os.listdir(root / first)):
+            shard = root / first / second
+            if not SHARD_DIR_RE.match(second) or not shard.is_dir():
+                continue
+            with os.scandir(shard) as entries:
+                for entry in entries:
+                    if not entry.name.startswith(".") and entry.is_file(follow_symlinks=False):
+                        yield entry
+
+def iter_upload_files(root: Path) -> Iterator[os.DirEntry]:
+    """Every stored upload, in any volume and either layout"""
+    for volume in dict.fromkeys([*volume_roots(root), root]):
+        yield from iter_layout_files(volume, SHARDED)
+        yield from iter_layout_files(volume, not SHARDED)
@@ -0,0 +1,132 @@
+import os
+import uuid
+from datetime import datetime, timedelta
+from pathlib import Path
+from typing import AsyncIterator
+from fastapi import HTTPException
+from starlette.concurrency import run_in_threadpool
+from starlette.requests import ClientDisconnect
+from file_upload import UPLOAD_DIR, MAX_FILE_SIZE, file_too_large
+
+# Partial files of resumable uploads live next to the uploads they become,
+# so finalizing is a rename on the same filesystem
+UPLOAD_SESSION_DIR = UPLOAD_DIR / ".sessions"
+UPLOAD_SESSION_DIR.mkdir(exist_ok=True)
+
+UPLOAD_SESSION_TTL = timedelta(hours=int(os.environ.get('UPLOAD_SESSION_TTL_HOURS', '24')))
+# A chunk request holds its session for this long past the last bytes it
+# received; a stalled writer loses the session to a retry after that
+UPLOAD_SESSION_LEASE = timedelta(seconds=int(os.environ.get('UPLOAD_SESSION_LEASE_SECONDS', '30')))
+
+# Prefix of the stored file for each attach target
+SESSION_TARGET_PREFIXES = {
+    "wedding": "wedding",
+    "package": "package",
+}
+
+def validate_session_size(size: int):
+    if size <= 0:
+        raise HTTPException(status_code=400, detail="Upload size must be positive")
+    if size > MAX_FILE_SIZE:
+        raise file_too_large()
+
+def session_file_path(session_id: str) -> Path:
+    return UPLOAD_SESSION_DIR / f"{session_id}.part"
+
+def session_expiry_cutoff() -> datetime:
+    return datetime.utcnow() - UPLOAD_SESSION_TTL
+
+def _open_at_offset(path: Path, offset: int):
+    # Rewind to the acknowledged offset so a retried chunk overwrites
+    # whatever a dropped request left behind
+    f = open(path, "r+b" if path.exists() else "w+b")
+    f.seek(offset)
+    f.truncate()
+    return f
+
+async def claim_session_writer(sessions, session_id: str, offset: int) -> str:
+    """
+    Make the caller the only writer of a session at offset, across workers.
+    Returns the lease token; raises 409 for a stale offset or while another
+    request is writing.
+    """
+    now = datetime.utcnow()
+    token = str(uuid.uuid4())
+    claimed = await sessions.find_one_and_update(
+        {
+            "id": session_id,
+            "offset": offset,
+            "$or": [{"writerUntil": {"$exists": False}}, {"writerUntil": {"$lt": now}}]
+        },
+        {"$set": {"writer": token, "writerUntil": now + UPLOAD_SESSION_LEASE}}
+    )
+    if claimed is None:
+        session = await sessions.find_one({"id": session_id}) or {}
+        if session.get("offset", offset) != offset:
+            raise HTTPException(
+                status_code=409,
+                detail=f"Offset mismatch. Resume from {session['offset']}"
+            )
+        raise HTTPException(status_code=409, detail="Another chunk is being uploaded to this session")
+    return token
+
+async def renew_session_writer(sessions, session_id: str, token: str) -> bool:
+    result = await sessions.update_one(
+        {"id": session_id, "writer": token},
+        {"$set": {"writerUntil": datetime.utcnow() + UPLOAD_SESSION_LEASE}}
+    )
+    return result.matched_count == 1
+
+async def append_chunk(sessions, session: dict, offset: int, chunks: AsyncIterator[bytes]) -> int:
+    """
+    Stream a request body onto the session's partial file starting at offset,
+    holding the session's writer lease, and commit the new offset. Returns
+    the new offset; never lets the file grow past the declared size. Bytes
+    that arrived before a dropped connection are kept.
+    """
+    token = await claim_session_writer(sessions, session["id"], offset)
+    renewed_at = datetime.utcnow()
+    written = offset
+    committed = False
+    try:
+        buffer = await run_in_threadpool(_open_at_offset, session_file_path(session["id"]), offset)
+        try:
+            async for chunk in chunks:
+                written += len(chunk)
+                if written > session["size"]:
+                    raise HTTPException(
+                        status_code=400,
+                        detail="Chunk extends past the declared upload size"
+                    )
+                # Renewed well before it runs out, so a writer that stalled
+                # past its lease stops before touching the file again
+                if datetime.utcnow() - renewed_at > UPLOAD_SESSION_LEASE / 2:
+                    if not await renew_session_writer(sessions, session["id"], token):
+                        raise HTTPException(status_code=409, detail="Upload session was taken over by another request")
+                    renewed_at = datetime.utcnow()
+                await run_in_threadpool(buffer.write, chunk)
+        except ClientDisconnect:
+            pass
+        finally:
+            await run_in_threadpool(buffer.close)
+
+        result = await sessions.update_one(
+            {"id": session["id"], "writer": token, "offset": offset},
+            {
+                "$set": {"offset": written, "updatedAt": datetime.utcnow()},
+                "$unset": {"writer": "", "writerUntil": ""}
+            }
+        )
+        if result.matched_count == 0:
+            raise HTTPException(status_code=409, detail="Upload session was taken over by another request")
+        committed = True
+    finally:
+        if not committed:
+            await sessions.update_one(
+                {"id": session["id"], "writer": token},
+                {"$unset": {"writer": "", "writerUntil": ""}}
+            )
+    return written
+
+def remove_session_file(session_id: str):
+    session_file_path(session_id).unlink(missing_ok=True)
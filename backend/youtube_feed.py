@@ -0,0 +1,216 @@
+import os
+import asyncio
+import logging
+from datetime import datetime, timedelta
+from typing import Callable, List, Optional, Tuple
+from zoneinfo import ZoneInfo
+from pymongo.errors import DuplicateKeyError
+from http_client import http_client
+
+logger = logging.getLogger(__name__)
+
+YOUTUBE_API_URL = "https://www.googleapis.com/youtube/v3"
+YOUTUBE_REFRESH_INTERVAL = int(os.environ.get('YOUTUBE_REFRESH_MINUTES', '30')) * 60
+# Units this site may spend per day, out of the project's 10,000 default
+YOUTUBE_DAILY_QUOTA = int(os.environ.get('YOUTUBE_DAILY_QUOTA', '500'))
+# How long one worker holds a refresh before another may take it over
+YOUTUBE_REFRESH_LEASE = timedelta(minutes=2)
+# Wait after a failed refresh before any worker spends quota on another
+YOUTUBE_RETRY_AFTER = timedelta(minutes=5)
+
+# Units per call, from the YouTube Data API quota table
+QUOTA_COSTS = {"channels": 1, "playlistItems": 1, "search": 100}
+# Quota days start at midnight Pacific time
+QUOTA_TIMEZONE = ZoneInfo("America/Los_Angeles")
+# Entries playlistItems returns for videos that cannot be watched
+UNAVAILABLE_TITLES = {"Private video", "Deleted video"}
+
+class QuotaExhausted(Exception):
+    pass
+
+class YouTubeAPIError(Exception):
+    def __init__(self, status_code: int, message: str):
+        super().__init__(message)
+        self.status_code = status_code
+
+def quota_day(now: Optional[datetime] = None) -> str:
+    return (now or datetime.now(QUOTA_TIMEZONE)).astimezone(QUOTA_TIMEZONE).date().isoformat()
+
+async def reserve_quota(db, units: int) -> bool:
+    """Book units against today's budget, atomically across workers"""
+    if units > YOUTUBE_DAILY_QUOTA:
+        return False
+    try:
+        await db.youtube_quota.update_one(
+            {"_id": quota_day(), "used": {"$lte": YOUTUBE_DAILY_QUOTA - units}},
+            {"$inc": {"used": units}, "$setOnInsert": {"createdAt": datetime.utcnow()}},
+            upsert=True
+        )
+    except DuplicateKeyError:
+        # Today's entry exists but has no room left
+        return False
+    return True
+
+async def call_api(db, resource: str, params: dict) -> dict:
+    if not await reserve_quota(db, QUOTA_COSTS[resource]):
+        raise QuotaExhausted(f"Daily YouTube quota of {YOUTUBE_DAILY_QUOTA} units used up")
+    # Retries are booked too, and stop once the budget is spent
+    response = await http_client.get(
+        f"{YOUTUBE_API_URL}/{resource}",
+        params=params,
+        retry_allowed=lambda: reserve_quota(db, QUOTA_COSTS[resource])
+    )
+    if response.status_code != 200:
+        raise YouTubeAPIError(response.status_code, f"YouTube API error: {response.text}")
+    return response.json()
+
+def youtube_feed_key(settings: Optional[dict]) -> Optional[Tuple[str, str, int]]:
+    """(channel, API key, video count) of the configured feed, or None when it is off"""
+    if not settings or not settings.get('enabled'):
+        return None
+    channel_id = settings.get('channel_id')
+    api_key = settings.get('api_key')
+    if not channel_id or not api_key:
+        return None
+    return channel_id, api_key, settings.get('max_videos', 6)
+
+def video_from_snippet(video_id: str, snippet: dict, published_at: Optional[str] = None) -> dict:
+    return {
+        "video_id": video_id,
+        "title": snippet.get('title', ''),
+        "description": snippet.get('description', ''),
+        "thumbnail": snippet.get('thumbnails', {}).get('high', {}).get('url', ''),
+        "published_at": published_at or snippet.get('publishedAt', '')
+    }
+
+async def uploads_playlist_id(db, channel_id: str, api_key: str) -> Optional[str]:
+    data = await call_api(db, "channels", {'part': 'contentDetails', 'id': channel_id, 'key': api_key})
+    items = data.get('items', [])
+    if not items:
+        raise YouTubeAPIError(404, f"YouTube channel {channel_id} not found")
+    return items[0].get('contentDetails', {}).get('relatedPlaylists', {}).get('uploads')
+
+async def list_playlist_videos(db, playlist_id: str, api_key: str, max_videos: int) -> List[dict]:
+    """Newest uploads first, skipping private and deleted entries (1 unit)"""
+    data = await call_api(db, "playlistItems", {
+        'part': 'snippet,contentDetails',
+        'playlistId': playlist_id,
+        # A little headroom for entries that are filtered out
+        'maxResults': min(50, max_videos + 5),
+        'key': api_key
+    })
+    videos = []
+    for item in data.get('items', []):
+        snippet = item.get('snippet', {})
+        details = item.get('contentDetails', {})
+        if snippet.get('title') in UNAVAILABLE_TITLES or not details.get('videoId'):
+            continue
+        videos.append(video_from_snippet(details['videoId'], snippet, details.get('videoPublishedAt')))
+    return videos[:max_videos]
+
+async def search_channel_videos(db, channel_id: str, api_key: str, max_videos: int) -> List[dict]:
+    """Latest videos through search (100 units), for channels without an uploads playlist"""
+    data = await call_api(db, "search", {
+        'part': 'snippet',
+        'channelId': channel_id,
+        'maxResults': max_videos,
+        'order': 'date',
+        'type': 'video',
+        'key': api_key
+    })
+    return [video_from_snippet(item['id']['videoId'], item.get('snippet', {})) for item in data.get('items', [])]
+
+async def fetch_channel_videos(db, key: Tuple[str, str, int], playlist_id: Optional[str]) -> Tuple[List[dict], Optional[str]]:
+    channel_id, api_key, max_videos = key
+    if playlist_id is None:
+        playlist_id = await uploads_playlist_id(db, channel_id, api_key)
+    if playlist_id is not None:
+        try:
+            return await list_playlist_videos(db, playlist_id, api_key, max_videos), playlist_id
+        except YouTubeAPIError as e:
+            if e.status_code != 404:
+                raise
+            playlist_id = None
+    return await search_channel_videos(db, channel_id, api_key, max_videos), playlist_id
+
+async def claim_refresh(db, channel_id: str, force: bool) -> bool:
+    """
+    Take the refresh of a channel's cache unless it is still fresh, another
+    worker is refreshing it or the last attempt failed recently. Forced
+    refreshes (settings just changed) always go ahead.
+    """
+    now = datetime.utcnow()
+    claimable = {"_id": channel_id}
+    if not force:
+        cutoff = now - timedelta(seconds=YOUTUBE_REFRESH_INTERVAL)
+        claimable["$and"] = [
+            {"$or": [{"claimedUntil": {"$exists": False}}, {"claimedUntil": {"$lt": now}}]},
+            {"$or": [{"fetchedAt": {"$exists": False}}, {"fetchedAt": {"$lt": cutoff}}]}
+        ]
+    try:
+        await db.youtube_cache.update_one(
+            claimable,
+            {"$set": {"claimedUntil": now + YOUTUBE_REFRESH_LEASE}},
+            upsert=True
+        )
+    except DuplicateKeyError:
+        return False
+    return True
+
+async def refresh_youtube_cache(db, force: bool = False) -> bool:
+    """
+    Fetch the configured channel's latest videos into youtube_cache, unless
+    the cached list is younger than the refresh interval. A failed refresh
+    keeps the last good list. Returns whether new videos were stored.
+    """
+    key = youtube_feed_key(await db.youtube_settings.find_one())
+    if key is None or not await claim_refresh(db, key[0], force):
+        return False
+
+    cached = await db.youtube_cache.find_one({"_id": key[0]}) or {}
+    # The uploads playlist never changes, so it is looked up once per channel
+    try:
+        videos, playlist_id = await fetch_channel_videos(db, key, cached.get("uploadsPlaylistId"))
+    except Exception as e:
+        logger.error(f"YouTube refresh failed: {e}")
+        await db.youtube_cache.update_one(
+            {"_id": key[0]},
+            {"$set": {
+                "lastError": str(e),
+                "lastErrorAt": datetime.utcnow(),
+                "claimedUntil": datetime.utcnow() + YOUTUBE_RETRY_AFTER
+            }}
+        )
+        return False
+
+    await db.youtube_cache.update_one(
+        {"_id": key[0]},
+        {
+            "$set": {
+                "videos": videos,
+                "uploadsPlaylistId": playlist_id,
+                "fetchedAt": datetime.utcnow()
+            },
+            "$unset": {"claimedUntil": "", "lastError": "", "lastErrorAt": ""}
+        }
+    )
+    return True
+
+async def cached_youtube_videos(db, settings: Optional[dict]) -> Optional[List[dict]]:
+    """The stored videos of the configured channel; None until a refresh has run"""
+    key = youtube_feed_key(settings)
+    if key is None:
+        return []
+    cached = await db.youtube_cache.find_one({"_id": key[0]}, {"videos": 1})
+    if not cached or "videos" not in cached:
+        return None
+    return cached["videos"][:key[2]]
+
+async def run_periodic_youtube_refresh(db, on_refresh: Callable[[], None], interval: int = YOUTUBE_REFRESH_INTERVAL):
+    while True:
+        try:
+            if await refresh_youtube_cache(db):
+                on_refresh()
+        except Exception as e:
+            logger.error(f"YouTube refresh failed: {e}")
+        await asyncio.sleep(interval)
@@ -40,7 +40,7 @@ import ProtectedRoute from "./components/ProtectedRoute";
 const HomePage = () => {
   return (
     <>
-      <Navigation />
+      <Navigation onHomepage />
       <main>
         <section id="home">
           <HeroCarousel />
@@ -62,7 +62,7 @@ const HomePage = () => {
         <FacebookSection />
         <ContactSection />
       </main>
-      <Footer />
+      <Footer onHomepage />
     </>
   );
 };
@@ -1,9 +1,8 @@
 import React, { useState, useEffect } from 'react';
 import { Award, Heart, Camera, Star, Sparkles, Users } from 'lucide-react';
-import axios from 'axios';
+import { fetchHomepage } from '../lib/homepage';
 
 const BACKEND_URL = process.env.REACT_APP_BACKEND_URL;
-const API = `${BACKEND_URL}/api`;
 
 // Icon mapping for feature points
 const iconMap = {
@@ -24,8 +23,8 @@ const AboutSection = () => {
 
   const fetchAbout = async () => {
     try {
-      const response = await axios.get(`${API}/about`);
-      setAbout(response.data);
+      const homepage = await fetchHomepage();
+      setAbout(homepage.about);
     } catch (error) {
       console.error('Failed to load about:', error);
     }
@@ -1,6 +1,7 @@
 import React, { useState, useEffect } from 'react';
 import { Mail, Phone, MapPin, Send } from 'lucide-react';
 import axios from 'axios';
+import { fetchHomepage } from '../lib/homepage';
 import { toast } from 'sonner';
 
 const BACKEND_URL = process.env.REACT_APP_BACKEND_URL;
@@ -27,16 +28,14 @@ const ContactSection = () => {
 
   const fetchData = async () => {
     try {
-      const [settingsRes, contentRes] = await Promise.all([
-        axios.get(`${API}/settings`),
-        axios.get(`${API}/sections/contact`)
-      ]);
-      setSettings(settingsRes.data);
-      if (contentRes.data) {
+      const homepage = await fetchHomepage();
+      const content = homepage.sections.contact;
+      setSettings(homepage.settings);
+      if (content) {
         setSectionContent(prev => ({
           ...prev,
-          title: contentRes.data.title || prev.title,
-          subtitle: contentRes.data.subtitle || prev.subtitle
+          title: content.title || prev.title,
+          subtitle: content.subtitle || prev.subtitle
         }));
       }
     } catch (error) {
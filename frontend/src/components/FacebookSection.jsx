@@ -1,9 +1,6 @@
 import React, { useState, useEffect } from 'react';
 import { ExternalLink, ThumbsUp, Loader } from 'lucide-react';
-import axios from 'axios';
-
-const BACKEND_URL = process.env.REACT_APP_BACKEND_URL;
-const API = `${BACKEND_URL}/api`;
+import { fetchHomepage } from '../lib/homepage';
 
 const FacebookSection = () => {
   const [posts, setPosts] = useState([]);
@@ -16,14 +13,11 @@ const FacebookSection = () => {
 
   const fetchFacebookData = async () => {
     try {
-      // Fetch settings first
-      const settingsResponse = await axios.get(`${API}/facebook/settings`);
-      setSettings(settingsResponse.data);
+      const { facebook } = await fetchHomepage();
+      setSettings(facebook.settings);
 
-      if (settingsResponse.data.enabled) {
-        // Fetch posts
-        const postsResponse = await axios.get(`${API}/facebook/posts`);
-        setPosts(postsResponse.data);
+      if (facebook.settings.enabled) {
+        setPosts(facebook.posts);
       }
     } catch (error) {
       console.error('Failed to load Facebook data:', error);
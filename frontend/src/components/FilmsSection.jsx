@@ -1,9 +1,6 @@
 import React, { useState, useEffect } from 'react';
 import { Play } from 'lucide-react';
-import axios from 'axios';
-
-const BACKEND_URL = process.env.REACT_APP_BACKEND_URL;
-const API = `${BACKEND_URL}/api`;
+import { fetchHomepage } from '../lib/homepage';
 
 const FilmsSection = () => {
   const [isPlaying, setIsPlaying] = useState(false);
@@ -20,17 +17,15 @@ const FilmsSection = () => {
 
   const fetchData = async () => {
     try {
-      const [filmRes, contentRes] = await Promise.all([
-        axios.get(`${API}/films/featured`),
-        axios.get(`${API}/sections/films`)
-      ]);
-      setFilm(filmRes.data);
-      if (contentRes.data) {
+      const homepage = await fetchHomepage();
+      const content = homepage.sections.films;
+      setFilm(homepage.featuredFilm);
+      if (content) {
         setSectionContent(prev => ({
           ...prev,
-          title: contentRes.data.title || prev.title,
-          subtitle: contentRes.data.subtitle || prev.subtitle,
-          description: contentRes.data.description || prev.description
+          title: content.title || prev.title,
+          subtitle: content.subtitle || prev.subtitle,
+          description: content.description || prev.description
         }));
       }
     } catch (error) {
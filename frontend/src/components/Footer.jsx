@@ -1,11 +1,8 @@
 import React, { useState, useEffect } from 'react';
 import { Instagram, Facebook, Mail, Phone, MapPin, Heart } from 'lucide-react';
-import axios from 'axios';
+import { fetchSiteSettings } from '../lib/homepage';
 
-const BACKEND_URL = process.env.REACT_APP_BACKEND_URL;
-const API = `${BACKEND_URL}/api`;
-
-const Footer = () => {
+const Footer = ({ onHomepage = false }) => {
   const [settings, setSettings] = useState(null);
 
   useEffect(() => {
@@ -14,8 +11,7 @@ const Footer = () => {
 
   const fetchSettings = async () => {
     try {
-      const response = await axios.get(`${API}/settings`);
-      setSettings(response.data);
+      setSettings(await fetchSiteSettings(onHomepage));
     } catch (error) {
       console.error('Failed to load settings:', error);
     }
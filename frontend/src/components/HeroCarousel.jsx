@@ -1,9 +1,8 @@
 import React, { useState, useEffect, useCallback, useRef } from 'react';
 import { ChevronLeft, ChevronRight } from 'lucide-react';
-import axios from 'axios';
+import { fetchHomepage } from '../lib/homepage';
 
 const BACKEND_URL = process.env.REACT_APP_BACKEND_URL;
-const API = `${BACKEND_URL}/api`;
 
 const HeroCarousel = () => {
   const [currentIndex, setCurrentIndex] = useState(0);
@@ -40,8 +39,8 @@ const HeroCarousel = () => {
 
   const fetchImages = async () => {
     try {
-      const response = await axios.get(`${API}/hero-carousel`);
-      setImages(response.data);
+      const homepage = await fetchHomepage();
+      setImages(homepage.heroCarousel);
     } catch (error) {
       console.error('Failed to load carousel images:', error);
     } finally {
@@ -1,11 +1,10 @@
 import React, { useState, useEffect } from 'react';
 import { Menu, X } from 'lucide-react';
-import axios from 'axios';
+import { fetchSiteSettings } from '../lib/homepage';
 
 const BACKEND_URL = process.env.REACT_APP_BACKEND_URL;
-const API = `${BACKEND_URL}/api`;
 
-const Navigation = () => {
+const Navigation = ({ onHomepage = false }) => {
   const [isScrolled, setIsScrolled] = useState(false);
   const [isMobileMenuOpen, setIsMobileMenuOpen] = useState(false);
   const [settings, setSettings] = useState(null);
@@ -25,8 +24,7 @@ const Navigation = () => {
 
   const fetchSettings = async () => {
     try {
-      const response = await axios.get(`${API}/settings`);
-      setSettings(response.data);
+      setSettings(await fetchSiteSettings(onHomepage));
     } catch (error) {
       console.error('Failed to load settings:', error);
     }
@@ -1,9 +1,8 @@
 import React, { useState, useEffect } from 'react';
 import { X } from 'lucide-react';
-import axios from 'axios';
+import { fetchHomepage } from '../lib/homepage';
 
 const BACKEND_URL = process.env.REACT_APP_BACKEND_URL;
-const API = `${BACKEND_URL}/api`;
 
 const PackageModal = ({ package: pkg, isOpen, onClose }) => {
   if (!isOpen) return null;
@@ -65,8 +64,8 @@ const PackagesSection = () => {
 
   const fetchPackages = async () => {
     try {
-      const response = await axios.get(`${API}/packages`);
-      setPackages(response.data);
+      const homepage = await fetchHomepage();
+      setPackages(homepage.packages);
     } catch (error) {
       console.error('Failed to load packages:', error);
     }
@@ -1,10 +1,9 @@
 import React, { useState, useEffect } from 'react';
 import { useNavigate } from 'react-router-dom';
 import { ArrowRight } from 'lucide-react';
-import axios from 'axios';
+import { fetchHomepage } from '../lib/homepage';
 
 const BACKEND_URL = process.env.REACT_APP_BACKEND_URL;
-const API = `${BACKEND_URL}/api`;
 
 const RecentWeddings = () => {
   const navigate = useNavigate();
@@ -17,8 +16,8 @@ const RecentWeddings = () => {
 
   const fetchWeddings = async () => {
     try {
-      const response = await axios.get(`${API}/weddings?limit=6`);
-      setWeddings(response.data);
+      const homepage = await fetchHomepage();
+      setWeddings(homepage.weddings);
     } catch (error) {
       console.error('Failed to load weddings:', error);
     } finally {
@@ -1,9 +1,6 @@
 import React, { useState, useEffect } from 'react';
 import { Facebook, Instagram, Youtube, Twitter, Linkedin, Share2 } from 'lucide-react';
-import axios from 'axios';
-
-const BACKEND_URL = process.env.REACT_APP_BACKEND_URL;
-const API = `${BACKEND_URL}/api`;
+import { fetchHomepage } from '../lib/homepage';
 
 const SocialMediaSection = () => {
   const [links, setLinks] = useState({});
@@ -15,8 +12,8 @@ const SocialMediaSection = () => {
 
   const fetchLinks = async () => {
     try {
-      const response = await axios.get(`${API}/social-media`);
-      setLinks(response.data);
+      const homepage = await fetchHomepage();
+      setLinks(homepage.socialMedia);
     } catch (error) {
       console.error('Failed to load social media links:', error);
     } finally {
@@ -1,9 +1,6 @@
 import React, { useState, useEffect } from 'react';
 import { Play, ExternalLink, Loader } from 'lucide-react';
-import axios from 'axios';
-
-const BACKEND_URL = process.env.REACT_APP_BACKEND_URL;
-const API = `${BACKEND_URL}/api`;
+import { fetchHomepage } from '../lib/homepage';
 
 const YouTubeSection = () => {
   const [videos, setVideos] = useState([]);
@@ -17,14 +14,11 @@ const YouTubeSection = () => {
 
   const fetchYouTubeData = async () => {
     try {
-      // Fetch settings first
-      const settingsResponse = await axios.get(`${API}/youtube/settings`);
-      setSettings(settingsResponse.data);
+      const { youtube } = await fetchHomepage();
+      setSettings(youtube.settings);
 
-      if (settingsResponse.data.enabled) {
-        // Fetch videos
-        const videosResponse = await axios.get(`${API}/youtube/videos`);
-        setVideos(videosResponse.data);
+      if (youtube.settings.enabled) {
+        setVideos(youtube.videos);
       }
     } catch (error) {
       console.error('Failed to load YouTube data:', error);
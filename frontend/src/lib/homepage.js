@@ -0,0 +1,35 @@
+import axios from 'axios';
+
+const BACKEND_URL = process.env.REACT_APP_BACKEND_URL;
+const API = `${BACKEND_URL}/api`;
+
+// How long sections mounting later (e.g. after navigating back) reuse the
+// last response before fetching again, so admin edits show up without a reload
+const HOMEPAGE_TTL_MS = 30 * 1000;
+
+// Every homepage section comes from one /api/homepage response; components
+// share the request instead of each calling its own endpoint
+let homepageRequest = null;
+let homepageRequestedAt = 0;
+
+export const fetchHomepage = () => {
+  if (!homepageRequest || Date.now() - homepageRequestedAt > HOMEPAGE_TTL_MS) {
+    homepageRequestedAt = Date.now();
+    const request = axios.get(`${API}/homepage`).then((response) => response.data);
+    // Let a later mount retry after a failure
+    request.catch(() => {
+      if (homepageRequest === request) homepageRequest = null;
+    });
+    homepageRequest = request;
+  }
+  return homepageRequest;
+};
+
+// Site settings for the navigation and footer: taken from the homepage
+// bundle on the homepage, fetched on their own everywhere else
+export const fetchSiteSettings = (onHomepage) => {
+  if (onHomepage) {
+    return fetchHomepage().then((homepage) => homepage.settings);
+  }
+  return axios.get(`${API}/settings`).then((response) => response.data);
+};
@@ -0,0 +1,87 @@
+"""
+Photography Portfolio Feed Cache Tests
+Tests for: stale-while-revalidate caching of external feeds
+"""
+import sys
+import asyncio
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent / "backend"))
+
+from feed_cache import FeedCache  # noqa: E402
+
+
+class CountingFetch:
+    """Feed stub returning the number of the call, after a short delay"""
+
+    def __init__(self, fail=False):
+        self.calls = 0
+        self.fail = fail
+
+    async def __call__(self):
+        self.calls += 1
+        call = self.calls
+        await asyncio.sleep(0.01)
+        if self.fail:
+            raise RuntimeError("feed down")
+        return call
+
+
+class TestFeedCache:
+    """Fresh, stale and failed feed lookups"""
+
+    def test_concurrent_misses_share_one_fetch(self):
+        async def scenario():
+            cache = FeedCache(fresh_seconds=60, stale_seconds=60)
+            fetch = CountingFetch()
+            results = await asyncio.gather(*(cache.get("page", fetch) for _ in range(20)))
+            assert results == [1] * 20
+            assert await cache.get("page", fetch) == 1
+            assert fetch.calls == 1
+        asyncio.run(scenario())
+        print("✓ Twenty concurrent misses made one fetch")
+
+    def test_stale_entry_is_served_while_refreshing(self):
+        async def scenario():
+            cache = FeedCache(fresh_seconds=0, stale_seconds=60)
+            fetch = CountingFetch()
+            assert await cache.get("page", fetch) == 1
+            # Stale: answered at once from memory, refreshed behind the caller
+            assert await cache.get("page", fetch) == 1
+            await asyncio.sleep(0.05)
+            assert await cache.get("page", fetch) == 2
+        asyncio.run(scenario())
+        print("✓ Stale posts served while the refresh runs")
+
+    def test_cold_entry_without_waiting_returns_fallback(self):
+        async def scenario():
+            cache = FeedCache(fresh_seconds=60, stale_seconds=60)
+            fetch = CountingFetch()
+            assert await cache.get("page", fetch, fallback=[], wait=False) == []
+            await asyncio.sleep(0.05)
+            assert await cache.get("page", fetch, fallback=[], wait=False) == 1
+            assert fetch.calls == 1
+        asyncio.run(scenario())
+        print("✓ Cold feed answered with the fallback, fetched in the background")
+
+    def test_invalidate_drops_in_flight_results(self):
+        async def scenario():
+            cache = FeedCache(fresh_seconds=60, stale_seconds=60)
+            old_fetch = CountingFetch()
+            cache.refresh("page", old_fetch)
+            cache.invalidate()
+            await asyncio.sleep(0.05)
+            assert await cache.get("page", CountingFetch()) == 1
+            assert old_fetch.calls == 1
+        asyncio.run(scenario())
+        print("✓ A fetch for replaced settings is not cached")
+
+    def test_failures_fall_back_and_back_off(self):
+        async def scenario():
+            cache = FeedCache(fresh_seconds=60, stale_seconds=60, retry_seconds=60)
+            fetch = CountingFetch(fail=True)
+            assert await cache.get("page", fetch, fallback=[]) == []
+            assert await cache.get("page", fetch, fallback=[]) == []
+            assert fetch.calls == 1
+        asyncio.run(scenario())
+        print("✓ A failing feed returns the fallback without hammering the API")
@@ -0,0 +1,102 @@
+"""
+Photography Portfolio HTTP Client Tests
+Tests for: retries with jitter and per-host limits of outbound API calls
+"""
+import asyncio
+import sys
+from pathlib import Path
+
+import pytest
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent / "backend"))
+
+httpx = pytest.importorskip("httpx")
+
+from http_client import HTTPClient  # noqa: E402
+
+
+def run_with(handler, scenario, **options):
+    """Run scenario(client) against a client whose requests go to handler"""
+    async def main():
+        client = HTTPClient(backoff=0.001, transport=httpx.MockTransport(handler), **options)
+        try:
+            return await scenario(client)
+        finally:
+            await client.close()
+    return asyncio.run(main())
+
+
+class TestHTTPClient:
+    """Outbound GETs through the shared client"""
+
+    def test_retryable_status_is_retried(self):
+        statuses = [503, 429, 200]
+
+        def handler(request):
+            return httpx.Response(statuses.pop(0), headers={"Retry-After": "0"}, json={})
+
+        response = run_with(handler, lambda client: client.get("https://graph.example/posts"), retries=2)
+        assert response.status_code == 200
+        assert statuses == []
+        print("✓ 503 and 429 retried until the call succeeded")
+
+    def test_client_errors_and_exhausted_retries_return_the_response(self):
+        calls = []
+
+        def handler(request):
+            calls.append(request.url.path)
+            return httpx.Response(404 if request.url.path == "/missing" else 502, json={})
+
+        async def scenario(client):
+            assert (await client.get("https://graph.example/missing")).status_code == 404
+            assert (await client.get("https://graph.example/down")).status_code == 502
+        run_with(handler, scenario, retries=2)
+        assert calls == ["/missing", "/down", "/down", "/down"]
+        print("✓ 404 returned at once, 502 returned after the last retry")
+
+    def test_retry_allowed_can_stop_retries(self):
+        calls = []
+
+        def handler(request):
+            calls.append(1)
+            return httpx.Response(500, json={})
+
+        async def refuse():
+            return False
+
+        response = run_with(handler, lambda client: client.get("https://api.example/x", retry_allowed=refuse), retries=3)
+        assert response.status_code == 500
+        assert len(calls) == 1
+        print("✓ Retries stop when the caller's budget refuses them")
+
+    def test_connection_errors_raise_after_retries(self):
+        calls = []
+
+        def handler(request):
+            calls.append(1)
+            raise httpx.ConnectError("connection refused", request=request)
+
+        with pytest.raises(httpx.ConnectError):
+            run_with(handler, lambda client: client.get("https://api.example/x"), retries=2)
+        assert len(calls) == 3
+        print("✓ Connection errors retried, then raised")
+
+    def test_concurrency_is_limited_per_host(self):
+        in_flight = {"slow.example": 0, "fast.example": 0}
+        peak = {"slow.example": 0, "fast.example": 0}
+
+        async def handler(request):
+            host = request.url.host
+            in_flight[host] += 1
+            peak[host] = max(peak[host], in_flight[host])
+            await asyncio.sleep(0.01)
+            in_flight[host] -= 1
+            return httpx.Response(200, json={})
+
+        async def scenario(client):
+            await asyncio.gather(*(
+                client.get(f"https://{host}/x") for host in ("slow.example", "fast.example") for _ in range(10)
+            ))
+        run_with(handler, scenario, max_per_host=3)
+        assert peak == {"slow.example": 3, "fast.example": 3}
+        print("✓ At most 3 requests in flight per host")
@@ -0,0 +1,42 @@
+"""
+Photography Portfolio Resize Cache Tests
+Tests for: parameter snapping and invalidation of resized variants
+"""
+import sys
+from pathlib import Path
+
+import pytest
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent / "backend"))
+
+pytest.importorskip("PIL")
+
+from image_cache import ResizeCache, normalize_resize_params  # noqa: E402
+
+
+class TestResizeCache:
+    """Variant keys and their lifetime"""
+
+    def test_parameters_snap_to_cacheable_values(self):
+        source = Path("photo.jpg")
+        assert normalize_resize_params(401, 71, None, source) == (440, 70, "jpeg")
+        assert normalize_resize_params(None, 100, "webp", source) == (3200, 90, "webp")
+        print("✓ Width and quality snapped to the cached steps")
+
+    def test_discard_drops_variants_of_derivatives(self, tmp_path):
+        cache = ResizeCache(tmp_path / "cache")
+        source = Path("photo.jpg")
+        kept = cache.directory / ResizeCache.variant_key(Path("other.jpg"), 400, 80, "jpeg")
+        dropped = [
+            cache.directory / ResizeCache.variant_key(source, 400, 80, "jpeg"),
+            cache.directory / ResizeCache.variant_key(Path("photo_w960.webp"), 400, 80, "webp"),
+        ]
+        for path in [kept, *dropped]:
+            path.write_bytes(b"variant")
+        cache = ResizeCache(cache.directory)
+
+        cache.discard(source.name)
+        assert [path.exists() for path in dropped] == [False, False]
+        assert kept.exists()
+        assert cache._total_bytes == len(b"variant")
+        print("✓ Variants resized from the original and its derivatives removed")
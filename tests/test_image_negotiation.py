@@ -0,0 +1,57 @@
+"""
+Photography Portfolio Image Negotiation Tests
+Tests for: derivative choice from Accept, client hints and Save-Data
+"""
+import sys
+from pathlib import Path
+
+from starlette.datastructures import Headers
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent / "backend"))
+
+from image_negotiation import accepted_formats, choose_variant  # noqa: E402
+
+DERIVATIVES = [
+    {"filename": f"photo_w{width}.{ext}", "width": width, "format": fmt}
+    for width in (640, 960, 1600)
+    for fmt, ext in (("webp", "webp"), ("jpeg", "jpg"))
+]
+BROWSER_ACCEPT = "image/avif,image/webp,image/apng,image/*,*/*;q=0.8"
+
+
+def choose(original_width=2400, derivatives=DERIVATIVES, **headers):
+    headers = Headers({name.replace("_", "-"): value for name, value in headers.items()})
+    return choose_variant(headers, original_width, derivatives)
+
+
+class TestAcceptedFormats:
+    """Formats a client can decode"""
+
+    def test_wildcards_and_zero_quality_do_not_count(self):
+        assert accepted_formats("*/*") == {"jpeg"}
+        assert accepted_formats("image/webp;q=0, image/*") == {"jpeg"}
+        assert accepted_formats(BROWSER_ACCEPT) == {"jpeg", "webp", "avif"}
+        print("✓ Only explicitly accepted formats are used")
+
+
+class TestChooseVariant:
+    """Derivative sent for an original's URL"""
+
+    def test_no_hints_keeps_the_original(self):
+        assert choose(accept=BROWSER_ACCEPT) is None
+        assert choose(original_width=1600, accept=BROWSER_ACCEPT) == "photo_w1600.webp"
+        assert choose(original_width=1600, accept="*/*") is None
+        print("✓ Without size hints only a full-size better format replaces the original")
+
+    def test_width_hint_picks_the_smallest_covering_derivative(self):
+        assert choose(accept=BROWSER_ACCEPT, sec_ch_width="700") == "photo_w960.webp"
+        assert choose(accept="*/*", sec_ch_width="700") == "photo_w960.jpg"
+        assert choose(accept=BROWSER_ACCEPT, sec_ch_viewport_width="500", sec_ch_dpr="2") == "photo_w1600.webp"
+        assert choose(accept=BROWSER_ACCEPT, sec_ch_width="2000") is None
+        print("✓ Width and viewport hints choose the derivative size")
+
+    def test_save_data_prefers_smaller_images(self):
+        assert choose(accept=BROWSER_ACCEPT, save_data="on") == "photo_w640.webp"
+        assert choose(accept=BROWSER_ACCEPT, sec_ch_width="1400", sec_ch_dpr="2", save_data="on") == "photo_w960.webp"
+        assert choose(accept=BROWSER_ACCEPT, sec_ch_width="3000", save_data="on") == "photo_w1600.webp"
+        print("✓ Save-Data drops the DPR upgrade and never falls back to the original")
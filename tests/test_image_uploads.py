@@ -0,0 +1,662 @@
+"""
+Photography Portfolio Image Upload Tests
+Tests for: Responsive image derivatives, upload size limits, batch gallery ingest,
+resumable chunked uploads, on-the-fly resizing, conditional GET caching,
+byte-range requests, placeholders, JPEG ingest normalization,
+orphan collection, hot file cache, deep zoom tile pyramids,
+Accept / client hint negotiation
+"""
+import io
+import time
+from concurrent.futures import ThreadPoolExecutor
+import pytest
+import requests
+import os
+from PIL import Image
+
+BASE_URL = os.environ.get('REACT_APP_BACKEND_URL', '').rstrip('/')
+
+# Test credentials
+ADMIN_USERNAME = "admin"
+ADMIN_PASSWORD = "admin123"
+
+
+def make_jpeg(width=2000, height=1200, color=(180, 40, 40)):
+    """Create an in-memory JPEG test image"""
+    buffer = io.BytesIO()
+    Image.new("RGB", (width, height), color).save(buffer, "JPEG", quality=90)
+    buffer.seek(0)
+    return buffer
+
+
+@pytest.fixture
+def auth_token():
+    """Get authentication token"""
+    response = requests.post(f"{BASE_URL}/api/admin/login", json={
+        "username": ADMIN_USERNAME,
+        "password": ADMIN_PASSWORD
+    })
+    if response.status_code == 200:
+        return response.json()["access_token"]
+    pytest.skip("Authentication failed")
+
+
+class TestImageDerivatives:
+    """Responsive derivative generation tests"""
+
+    def test_hero_upload_generates_derivatives(self, auth_token):
+        """Test hero carousel upload records resized WebP and JPEG variants"""
+        headers = {"Authorization": f"Bearer {auth_token}"}
+        response = requests.post(
+            f"{BASE_URL}/api/admin/hero-carousel",
+            headers=headers,
+            files={"image": ("hero.jpg", make_jpeg(), "image/jpeg")},
+            data={"alt": "TEST derivative hero"}
+        )
+        assert response.status_code == 200
+        data = response.json()
+        try:
+            variants = data["asset"]["variants"]
+            assert data["asset"]["url"] == data["url"]
+            assert {v["format"] for v in variants} == {"webp", "jpeg"}
+            assert all(v["width"] < 2000 for v in variants)
+
+            # Every variant must be servable
+            for variant in variants:
+                variant_response = requests.get(f"{BASE_URL}{variant['url']}")
+                assert variant_response.status_code == 200
+            print(f"✓ Hero upload produced {len(variants)} derivatives")
+        finally:
+            requests.delete(f"{BASE_URL}/api/admin/hero-carousel/{data['id']}", headers=headers)
+
+    def test_upload_records_dimensions_and_placeholder(self, auth_token):
+        """Test uploads carry intrinsic size and an inline preview for instant rendering"""
+        headers = {"Authorization": f"Bearer {auth_token}"}
+        response = requests.post(
+            f"{BASE_URL}/api/admin/hero-carousel",
+            headers=headers,
+            files={"image": ("hero.jpg", make_jpeg(1200, 800), "image/jpeg")},
+            data={"alt": "TEST placeholder hero"}
+        )
+        assert response.status_code == 200
+        data = response.json()
+        try:
+            asset = data["asset"]
+            assert (asset["width"], asset["height"]) == (1200, 800)
+            assert asset["placeholder"].startswith("data:image/jpeg;base64,")
+            assert len(asset["placeholder"]) < 2000
+            print(f"✓ Placeholder is {len(asset['placeholder'])} bytes")
+        finally:
+            requests.delete(f"{BASE_URL}/api/admin/hero-carousel/{data['id']}", headers=headers)
+
+    def test_jpeg_original_is_normalized(self, auth_token):
+        """Test JPEG originals lose EXIF, get rotated upright and are stored progressive"""
+        headers = {"Authorization": f"Bearer {auth_token}"}
+        exif = Image.Exif()
+        exif[0x0112] = 6  # Orientation: rotate 90 CW
+        exif[0x010F] = "TEST camera"
+        buffer = io.BytesIO()
+        Image.new("RGB", (600, 400), (20, 90, 160)).save(buffer, "JPEG", exif=exif)
+        buffer.seek(0)
+
+        response = requests.post(
+            f"{BASE_URL}/api/admin/hero-carousel",
+            headers=headers,
+            files={"image": ("camera.jpg", buffer, "image/jpeg")},
+            data={"alt": "TEST normalized hero"}
+        )
+        assert response.status_code == 200
+        data = response.json()
+        try:
+            stored = Image.open(io.BytesIO(requests.get(f"{BASE_URL}{data['url']}").content))
+            assert stored.size == (400, 600)
+            assert not stored.getexif()
+            assert stored.info.get("progressive") or stored.info.get("progression")
+            print("✓ Original stored upright, progressive and without EXIF")
+        finally:
+            requests.delete(f"{BASE_URL}/api/admin/hero-carousel/{data['id']}", headers=headers)
+
+    def test_clean_jpeg_is_kept_when_reencode_is_larger(self, auth_token):
+        """Test a JPEG with nothing to normalize is stored as uploaded unless re-encoding shrinks it"""
+        headers = {"Authorization": f"Bearer {auth_token}"}
+        buffer = io.BytesIO()
+        Image.effect_noise((600, 400), 64).convert("RGB").save(buffer, "JPEG", quality=30)
+        uploaded = buffer.getvalue()
+        buffer.seek(0)
+
+        response = requests.post(
+            f"{BASE_URL}/api/admin/hero-carousel",
+            headers=headers,
+            files={"image": ("clean.jpg", buffer, "image/jpeg")},
+            data={"alt": "TEST clean hero"}
+        )
+        assert response.status_code == 200
+        data = response.json()
+        try:
+            assert requests.get(f"{BASE_URL}{data['url']}").content == uploaded
+            print("✓ Low-quality JPEG without metadata stored byte for byte")
+        finally:
+            requests.delete(f"{BASE_URL}/api/admin/hero-carousel/{data['id']}", headers=headers)
+
+    def test_small_image_is_not_upscaled(self, auth_token):
+        """Test images narrower than every target width keep their native width"""
+        headers = {"Authorization": f"Bearer {auth_token}"}
+        response = requests.post(
+            f"{BASE_URL}/api/admin/hero-carousel",
+            headers=headers,
+            files={"image": ("small.jpg", make_jpeg(320, 200), "image/jpeg")},
+            data={"alt": "TEST small hero"}
+        )
+        assert response.status_code == 200
+        data = response.json()
+        try:
+            widths = {v["width"] for v in data["asset"]["variants"]}
+            assert widths == {320}
+            print(f"✓ Small image kept native width")
+        finally:
+            requests.delete(f"{BASE_URL}/api/admin/hero-carousel/{data['id']}", headers=headers)
+
+    def test_invalid_image_rejected(self, auth_token):
+        """Test corrupt image bytes are rejected instead of stored"""
+        response = requests.post(
+            f"{BASE_URL}/api/admin/hero-carousel",
+            headers={"Authorization": f"Bearer {auth_token}"},
+            files={"image": ("broken.jpg", io.BytesIO(b"not an image"), "image/jpeg")},
+            data={"alt": "TEST broken hero"}
+        )
+        assert response.status_code == 400
+        print(f"✓ Corrupt image rejected: {response.json()['detail']}")
+
+
+class TestUploadLimits:
+    """Upload size enforcement tests"""
+
+    def test_oversize_upload_rejected(self, auth_token):
+        """Test uploads above MAX_FILE_SIZE are rejected with 413"""
+        oversize = io.BytesIO(b"\xff" * (11 * 1024 * 1024))
+        response = requests.post(
+            f"{BASE_URL}/api/admin/hero-carousel",
+            headers={"Authorization": f"Bearer {auth_token}"},
+            files={"image": ("huge.jpg", oversize, "image/jpeg")},
+            data={"alt": "TEST oversize hero"}
+        )
+        assert response.status_code == 413
+        print(f"✓ Oversize upload rejected: {response.json()['detail']}")
+
+
+class TestBatchGalleryIngest:
+    """Concurrent multi-image gallery upload tests"""
+
+    @pytest.fixture
+    def wedding(self, auth_token):
+        """Create a throwaway wedding"""
+        headers = {"Authorization": f"Bearer {auth_token}"}
+        response = requests.post(
+            f"{BASE_URL}/api/admin/weddings",
+            headers=headers,
+            files={"coverImage": ("cover.jpg", make_jpeg(), "image/jpeg")},
+            data={
+                "brideName": "TEST Bride",
+                "groomName": "TEST Groom",
+                "date": "2024-01-01",
+                "location": "Kolkata"
+            }
+        )
+        assert response.status_code == 200
+        wedding = response.json()
+        yield wedding
+        requests.delete(f"{BASE_URL}/api/admin/weddings/{wedding['id']}", headers=headers)
+
+    def test_batch_reports_per_file_results(self, auth_token, wedding):
+        """Test one bad file does not fail the rest of the batch"""
+        response = requests.post(
+            f"{BASE_URL}/api/admin/weddings/{wedding['id']}/images/batch",
+            headers={"Authorization": f"Bearer {auth_token}"},
+            files=[
+                ("images", ("one.jpg", make_jpeg(800, 600), "image/jpeg")),
+                ("images", ("broken.jpg", io.BytesIO(b"not an image"), "image/jpeg")),
+                ("images", ("two.jpg", make_jpeg(800, 600, (20, 20, 200)), "image/jpeg")),
+            ]
+        )
+        assert response.status_code == 200
+        data = response.json()
+        assert [r["success"] for r in data["results"]] == [True, False, True]
+        assert data["results"][1]["error"]
+        assert len(data["wedding"]["images"]) == 2
+        assert len(data["wedding"]["imageAssets"]) == 2
+        print(f"✓ Batch kept 2 of 3 files")
+
+    def test_plain_upload_is_all_or_nothing(self, auth_token, wedding):
+        """Test the classic gallery endpoint rejects the batch when any file fails"""
+        response = requests.post(
+            f"{BASE_URL}/api/admin/weddings/{wedding['id']}/images",
+            headers={"Authorization": f"Bearer {auth_token}"},
+            files=[
+                ("images", ("one.jpg", make_jpeg(800, 600), "image/jpeg")),
+                ("images", ("broken.jpg", io.BytesIO(b"not an image"), "image/jpeg")),
+            ]
+        )
+        assert response.status_code == 400
+        wedding_after = requests.get(f"{BASE_URL}/api/weddings/{wedding['id']}").json()
+        assert wedding_after["images"] == []
+        print(f"✓ Failed batch left gallery untouched")
+
+    def test_too_many_files_rejected(self, auth_token, wedding):
+        """Test a batch over the per-request file limit is refused before ingest"""
+        response = requests.post(
+            f"{BASE_URL}/api/admin/weddings/{wedding['id']}/images/batch",
+            headers={"Authorization": f"Bearer {auth_token}"},
+            files=[("images", (f"tiny{i}.jpg", io.BytesIO(b"x"), "image/jpeg")) for i in range(51)]
+        )
+        assert response.status_code == 413
+        wedding_after = requests.get(f"{BASE_URL}/api/weddings/{wedding['id']}").json()
+        assert wedding_after["images"] == []
+        print(f"✓ 51-file batch rejected")
+
+
+class TestResumableUploads:
+    """Resumable chunked upload protocol tests"""
+
+    def test_chunked_upload_resume_and_finalize(self, auth_token):
+        """Test a file uploaded in chunks can be resumed and finalized"""
+        headers = {"Authorization": f"Bearer {auth_token}"}
+        payload = make_jpeg(1200, 800).getvalue()
+
+        response = requests.post(
+            f"{BASE_URL}/api/admin/uploads/sessions",
+            headers=headers,
+            json={"filename": "resumable.jpg", "size": len(payload)}
+        )
+        assert response.status_code == 200
+        session_id = response.json()["id"]
+
+        first = requests.put(
+            f"{BASE_URL}/api/admin/uploads/sessions/{session_id}",
+            headers={**headers, "Upload-Offset": "0"},
+            data=payload[:4096]
+        )
+        assert first.status_code == 200
+        assert first.json()["offset"] == 4096
+
+        # A stale offset is refused and the server reports where to resume
+        stale = requests.put(
+            f"{BASE_URL}/api/admin/uploads/sessions/{session_id}",
+            headers={**headers, "Upload-Offset": "0"},
+            data=payload[:4096]
+        )
+        assert stale.status_code == 409
+
+        status = requests.get(f"{BASE_URL}/api/admin/uploads/sessions/{session_id}", headers=headers)
+        offset = status.json()["offset"]
+        assert offset == 4096
+
+        early = requests.post(f"{BASE_URL}/api/admin/uploads/sessions/{session_id}/finalize", headers=headers)
+        assert early.status_code == 409
+
+        rest = requests.put(
+            f"{BASE_URL}/api/admin/uploads/sessions/{session_id}",
+            headers={**headers, "Upload-Offset": str(offset)},
+            data=payload[offset:]
+        )
+        assert rest.json()["offset"] == len(payload)
+
+        final = requests.post(f"{BASE_URL}/api/admin/uploads/sessions/{session_id}/finalize", headers=headers)
+        assert final.status_code == 200
+        asset = final.json()["asset"]
+        stored = requests.get(f"{BASE_URL}{asset['url']}")
+        assert stored.status_code == 200
+        assert Image.open(io.BytesIO(stored.content)).size == (1200, 800)
+        assert asset["variants"]
+        print(f"✓ Resumable upload stored at {asset['url']}")
+
+
+    def test_overlapping_chunks_are_serialized(self, auth_token):
+        """Test a second PUT is refused while another request is writing the session"""
+        headers = {"Authorization": f"Bearer {auth_token}"}
+        payload = make_jpeg(1200, 800).getvalue()
+        half = len(payload) // 2
+
+        response = requests.post(
+            f"{BASE_URL}/api/admin/uploads/sessions",
+            headers=headers,
+            json={"filename": "overlap.jpg", "size": len(payload)}
+        )
+        session_id = response.json()["id"]
+        url = f"{BASE_URL}/api/admin/uploads/sessions/{session_id}"
+
+        def slow_body():
+            yield payload[:half]
+            time.sleep(1)
+            yield payload[half:]
+
+        with ThreadPoolExecutor(max_workers=1) as pool:
+            slow = pool.submit(requests.put, url, headers={**headers, "Upload-Offset": "0"}, data=slow_body())
+            time.sleep(0.3)
+            retry = requests.put(url, headers={**headers, "Upload-Offset": "0"}, data=payload)
+            assert retry.status_code == 409
+            assert slow.result().status_code == 200
+            assert slow.result().json()["offset"] == len(payload)
+
+        # The finished writer moved the offset on, so the same retry is now stale
+        stale = requests.put(url, headers={**headers, "Upload-Offset": "0"}, data=payload[:half])
+        assert stale.status_code == 409
+        assert requests.get(url, headers=headers).json()["offset"] == len(payload)
+
+        final = requests.post(f"{url}/finalize", headers=headers)
+        assert final.status_code == 200
+        assert Image.open(io.BytesIO(requests.get(f"{BASE_URL}{final.json()['asset']['url']}").content)).size == (1200, 800)
+        print("✓ Overlapping chunk refused, session completed by the first writer")
+
+class TestOnTheFlyResize:
+    """Query-parameter driven resize tests"""
+
+    def test_resize_query_parameters(self, auth_token):
+        """Test width/quality/format parameters return a resized variant"""
+        headers = {"Authorization": f"Bearer {auth_token}"}
+        response = requests.post(
+            f"{BASE_URL}/api/admin/hero-carousel",
+            headers=headers,
+            files={"image": ("hero.jpg", make_jpeg(), "image/jpeg")},
+            data={"alt": "TEST resize hero"}
+        )
+        assert response.status_code == 200
+        item = response.json()
+        try:
+            resized = requests.get(f"{BASE_URL}{item['url']}?w=400&q=70&fmt=webp")
+            assert resized.status_code == 200
+            assert resized.headers["content-type"] == "image/webp"
+            assert Image.open(io.BytesIO(resized.content)).width == 400
+
+            # Repeated requests are served from the cache
+            again = requests.get(f"{BASE_URL}{item['url']}?w=400&q=70&fmt=webp")
+            assert again.content == resized.content
+
+            invalid = requests.get(f"{BASE_URL}{item['url']}?fmt=gif")
+            assert invalid.status_code == 400
+            print(f"✓ Resized variant served ({len(resized.content)} bytes)")
+        finally:
+            requests.delete(f"{BASE_URL}/api/admin/hero-carousel/{item['id']}", headers=headers)
+
+
+class TestConditionalCaching:
+    """ETag / Last-Modified validator and Cache-Control tests"""
+
+    def test_uploads_are_immutable_with_validators(self, auth_token):
+        """Test uploads carry a strong ETag, immutable caching, and honor conditional requests"""
+        headers = {"Authorization": f"Bearer {auth_token}"}
+        response = requests.post(
+            f"{BASE_URL}/api/admin/hero-carousel",
+            headers=headers,
+            files={"image": ("hero.jpg", make_jpeg(), "image/jpeg")},
+            data={"alt": "TEST caching hero"}
+        )
+        assert response.status_code == 200
+        item = response.json()
+        try:
+            first = requests.get(f"{BASE_URL}{item['url']}")
+            etag = first.headers["etag"]
+            assert not etag.startswith("W/")
+            assert "immutable" in first.headers["cache-control"]
+
+            cached = requests.get(f"{BASE_URL}{item['url']}", headers={"If-None-Match": etag})
+            assert cached.status_code == 304
+            assert cached.content == b""
+
+            since = requests.get(
+                f"{BASE_URL}{item['url']}",
+                headers={"If-Modified-Since": first.headers["last-modified"]}
+            )
+            assert since.status_code == 304
+
+            changed = requests.get(f"{BASE_URL}{item['url']}", headers={"If-None-Match": '"other"'})
+            assert changed.status_code == 200
+            print(f"✓ Conditional GET returned 304 for {etag}")
+        finally:
+            requests.delete(f"{BASE_URL}/api/admin/hero-carousel/{item['id']}", headers=headers)
+
+
+class TestRangeRequests:
+    """HTTP Range (206) support tests"""
+
+    def test_partial_content(self, auth_token):
+        """Test byte ranges return 206 with the requested slice"""
+        headers = {"Authorization": f"Bearer {auth_token}"}
+        response = requests.post(
+            f"{BASE_URL}/api/admin/hero-carousel",
+            headers=headers,
+            files={"image": ("hero.jpg", make_jpeg(), "image/jpeg")},
+            data={"alt": "TEST range hero"}
+        )
+        assert response.status_code == 200
+        item = response.json()
+        try:
+            full = requests.get(f"{BASE_URL}{item['url']}")
+            assert full.headers["accept-ranges"] == "bytes"
+            size = len(full.content)
+
+            partial = requests.get(f"{BASE_URL}{item['url']}", headers={"Range": "bytes=100-199"})
+            assert partial.status_code == 206
+            assert partial.headers["content-range"] == f"bytes 100-199/{size}"
+            assert partial.content == full.content[100:200]
+
+            resumed = requests.get(f"{BASE_URL}{item['url']}", headers={"Range": f"bytes={size - 10}-"})
+            assert resumed.content == full.content[-10:]
+
+            unsatisfiable = requests.get(f"{BASE_URL}{item['url']}", headers={"Range": f"bytes={size}-"})
+            assert unsatisfiable.status_code == 416
+
+            stale = requests.get(
+                f"{BASE_URL}{item['url']}",
+                headers={"Range": "bytes=0-9", "If-Range": '"stale"'}
+            )
+            assert stale.status_code == 200
+            print(f"✓ Range requests served from {size} byte file")
+        finally:
+            requests.delete(f"{BASE_URL}/api/admin/hero-carousel/{item['id']}", headers=headers)
+
+
+class TestOrphanCollection:
+    """Orphaned upload garbage collection tests"""
+
+    def test_unreferenced_upload_is_collected(self, auth_token):
+        """Test files no document points at are reclaimed while referenced ones stay"""
+        headers = {"Authorization": f"Bearer {auth_token}"}
+        payload = make_jpeg(800, 600).getvalue()
+
+        # A finalized session without a target leaves a file nothing references
+        session = requests.post(
+            f"{BASE_URL}/api/admin/uploads/sessions",
+            headers=headers,
+            json={"filename": "orphan.jpg", "size": len(payload)}
+        ).json()
+        requests.put(
+            f"{BASE_URL}/api/admin/uploads/sessions/{session['id']}",
+            headers={**headers, "Upload-Offset": "0"},
+            data=payload
+        )
+        orphan = requests.post(
+            f"{BASE_URL}/api/admin/uploads/sessions/{session['id']}/finalize",
+            headers=headers
+        ).json()["asset"]
+        orphan_name = orphan["url"].split("/")[-1]
+
+        hero = requests.post(
+            f"{BASE_URL}/api/admin/hero-carousel",
+            headers=headers,
+            files={"image": ("hero.jpg", make_jpeg(), "image/jpeg")},
+            data={"alt": "TEST referenced hero"}
+        ).json()
+        try:
+            # Freshly written files are protected by the grace period
+            report = requests.post(f"{BASE_URL}/api/admin/uploads/gc?dry_run=true", headers=headers).json()
+            assert orphan_name not in report["orphans"]
+
+            dry = requests.post(
+                f"{BASE_URL}/api/admin/uploads/gc?dry_run=true&grace_minutes=0", headers=headers
+            ).json()
+            assert orphan_name in dry["orphans"]
+            assert dry["deleted"] == 0
+
+            report = requests.post(f"{BASE_URL}/api/admin/uploads/gc?grace_minutes=0", headers=headers).json()
+            assert report["deleted"] >= 1
+            assert report["bytesReclaimed"] > 0
+            assert requests.get(f"{BASE_URL}{orphan['url']}").status_code == 404
+            for variant in orphan["variants"]:
+                assert requests.get(f"{BASE_URL}{variant['url']}").status_code == 404
+
+            assert requests.get(f"{BASE_URL}{hero['url']}").status_code == 200
+            for variant in hero["asset"]["variants"]:
+                assert requests.get(f"{BASE_URL}{variant['url']}").status_code == 200
+            print(f"✓ Collected {report['deleted']} orphans, {report['bytesReclaimed']} bytes")
+        finally:
+            requests.delete(f"{BASE_URL}/api/admin/hero-carousel/{hero['id']}", headers=headers)
+
+
+class TestHotFileCache:
+    """In-memory hot file cache tests"""
+
+    def test_repeat_requests_hit_memory_until_deleted(self, auth_token):
+        """Test repeated downloads are counted as hits and deletion invalidates them"""
+        headers = {"Authorization": f"Bearer {auth_token}"}
+        response = requests.post(
+            f"{BASE_URL}/api/admin/hero-carousel",
+            headers=headers,
+            files={"image": ("hero.jpg", make_jpeg(800, 600), "image/jpeg")},
+            data={"alt": "TEST hot cache hero"}
+        )
+        assert response.status_code == 200
+        item = response.json()
+
+        before = requests.get(f"{BASE_URL}/api/admin/uploads/cache-stats", headers=headers).json()
+        first = requests.get(f"{BASE_URL}{item['url']}")
+        second = requests.get(f"{BASE_URL}{item['url']}")
+        assert first.status_code == second.status_code == 200
+        assert first.content == second.content
+        assert first.headers["etag"] == second.headers["etag"]
+
+        revalidated = requests.get(f"{BASE_URL}{item['url']}", headers={"If-None-Match": first.headers["etag"]})
+        assert revalidated.status_code == 304
+
+        after = requests.get(f"{BASE_URL}/api/admin/uploads/cache-stats", headers=headers).json()
+        assert after["hits"] >= before["hits"] + 2
+        assert after["bytes"] > 0
+
+        requests.delete(f"{BASE_URL}/api/admin/hero-carousel/{item['id']}", headers=headers)
+        status = None
+        for _ in range(20):
+            status = requests.get(f"{BASE_URL}{item['url']}").status_code
+            if status == 404:
+                break
+            time.sleep(0.25)
+        assert status == 404
+        print(f"✓ Hot cache hits {after['hits']}, hit rate {after['hitRate']:.2f}")
+
+
+class TestDeepZoomTiles:
+    """Deep Zoom tile pyramid tests"""
+
+    def test_pyramid_build_serve_and_delete(self, auth_token):
+        """Test a wedding cover can be tiled, tiles are cacheable, and tiles go with the upload"""
+        headers = {"Authorization": f"Bearer {auth_token}"}
+        response = requests.post(
+            f"{BASE_URL}/api/admin/weddings",
+            headers=headers,
+            files={"coverImage": ("cover.jpg", make_jpeg(1000, 600), "image/jpeg")},
+            data={
+                "brideName": "TEST Bride",
+                "groomName": "TEST Groom",
+                "date": "2024-01-01",
+                "location": "Kolkata"
+            }
+        )
+        assert response.status_code == 200
+        wedding = response.json()
+        filename = wedding["coverImage"].split("/")[-1]
+        try:
+            response = requests.post(f"{BASE_URL}/api/admin/uploads/{filename}/tiles", headers=headers)
+            assert response.status_code == 200
+            info = response.json()
+            # 1000 px wide: levels 0..10, the top one 4 x 3 tiles of 254 px
+            assert (info["width"], info["height"], info["levels"]) == (1000, 600, 11)
+
+            wedding_after = requests.get(f"{BASE_URL}/api/weddings/{wedding['id']}").json()
+            assert wedding_after["coverAsset"]["deepZoomUrl"] == info["url"]
+
+            descriptor = requests.get(f"{BASE_URL}{info['url']}")
+            assert descriptor.status_code == 200
+            assert 'TileSize="254"' in descriptor.text and 'Width="1000"' in descriptor.text
+
+            tiles_url = info["url"][:-len(".dzi")] + "_files"
+            corner = requests.get(f"{BASE_URL}{tiles_url}/10/3_2.jpg")
+            assert corner.status_code == 200
+            assert Image.open(io.BytesIO(corner.content)).size == (1000 - 762 + 1, 600 - 508 + 1)
+            # Rebuilds rewrite tiles at the same URLs
+            assert "immutable" not in corner.headers["cache-control"]
+            revalidated = requests.get(
+                f"{BASE_URL}{tiles_url}/10/3_2.jpg", headers={"If-None-Match": corner.headers["etag"]}
+            )
+            assert revalidated.status_code == 304
+            assert requests.get(f"{BASE_URL}{tiles_url}/10/4_0.jpg").status_code == 404
+            assert requests.get(f"{BASE_URL}{tiles_url}/0/0_0.jpg").status_code == 200
+        finally:
+            requests.delete(f"{BASE_URL}/api/admin/weddings/{wedding['id']}", headers=headers)
+
+        status = None
+        for _ in range(20):
+            status = requests.get(f"{BASE_URL}{info['url']}").status_code
+            if status == 404:
+                break
+            time.sleep(0.25)
+        assert status == 404
+        print(f"✓ Built {info['tileCount']} tiles over {info['levels']} levels")
+
+
+class TestContentNegotiation:
+    """Accept and client hint driven variant selection tests"""
+
+    def test_original_url_serves_best_variant(self, auth_token):
+        """Test the original URL picks format and width from Accept, Width, DPR and Save-Data"""
+        headers = {"Authorization": f"Bearer {auth_token}"}
+        response = requests.post(
+            f"{BASE_URL}/api/admin/hero-carousel",
+            headers=headers,
+            files={"image": ("hero.jpg", make_jpeg(2000, 1200), "image/jpeg")},
+            data={"alt": "TEST negotiation hero"}
+        )
+        assert response.status_code == 200
+        item = response.json()
+        url = f"{BASE_URL}{item['url']}"
+        try:
+            plain = requests.get(url, headers={"Accept": "*/*"})
+            assert plain.status_code == 200
+            assert plain.headers["content-type"] == "image/jpeg"
+            assert Image.open(io.BytesIO(plain.content)).width == 2000
+            assert "Accept" in plain.headers["vary"] and "Width" in plain.headers["vary"]
+            assert "Sec-CH-DPR" in plain.headers["accept-ch"]
+
+            hinted = requests.get(url, headers={"Accept": "image/webp,*/*", "Sec-CH-Width": "700"})
+            assert hinted.headers["content-type"] == "image/webp"
+            assert Image.open(io.BytesIO(hinted.content)).width == 960
+            assert hinted.headers["etag"] != plain.headers["etag"]
+
+            revalidated = requests.get(
+                url,
+                headers={"Accept": "image/webp,*/*", "Sec-CH-Width": "700", "If-None-Match": hinted.headers["etag"]}
+            )
+            assert revalidated.status_code == 304
+            assert "Accept" in revalidated.headers["vary"]
+
+            retina = requests.get(url, headers={"Accept": "image/jpeg", "Width": "1800", "DPR": "2"})
+            assert Image.open(io.BytesIO(retina.content)).width == 2000
+
+            save_data = requests.get(
+                url, headers={"Accept": "image/webp", "Width": "1800", "DPR": "2", "Save-Data": "on"}
+            )
+            assert Image.open(io.BytesIO(save_data.content)).width == 960
+            assert len(save_data.content) < len(plain.content)
+
+            derivative = requests.get(f"{BASE_URL}{item['asset']['variants'][0]['url']}")
+            assert "vary" not in derivative.headers
+            print(f"✓ Negotiated {len(plain.content)} -> {len(save_data.content)} bytes with Save-Data")
+        finally:
+            requests.delete(f"{BASE_URL}/api/admin/hero-carousel/{item['id']}", headers=headers)
@@ -1,6 +1,7 @@
 """
 Photography Portfolio Backend API Tests
-Tests for: Admin authentication, credential change, YouTube settings, Section content CMS, Social media links
+Tests for: Admin authentication, credential change, YouTube settings, Section content CMS, Social media links,
+cached singleton documents, homepage bundle
 """
 import pytest
 import requests
@@ -450,5 +451,79 @@ class TestProtectedEndpoints:
         print(f"✓ Admin social media endpoint protected")
 
 
+class TestDocumentCache:
+    """Singleton documents served from memory and invalidated on write"""
+    
+    @pytest.fixture
+    def auth_token(self):
+        """Get authentication token"""
+        response = requests.post(f"{BASE_URL}/api/admin/login", json={
+            "username": ADMIN_USERNAME,
+            "password": ADMIN_PASSWORD
+        })
+        if response.status_code == 200:
+            return response.json()["access_token"]
+        pytest.skip("Authentication failed")
+    
+    def test_writes_are_visible_on_next_read(self, auth_token):
+        """Test repeat reads hit the cache and an update is never served stale"""
+        headers = {"Authorization": f"Bearer {auth_token}"}
+        original = requests.get(f"{BASE_URL}/api/settings").json()
+        before = requests.get(f"{BASE_URL}/api/admin/documents/cache-stats", headers=headers).json()
+        for _ in range(3):
+            assert requests.get(f"{BASE_URL}/api/settings").status_code == 200
+        after = requests.get(f"{BASE_URL}/api/admin/documents/cache-stats", headers=headers).json()
+        assert after["documents"]["settings"]["hits"] >= before.get("documents", {}).get("settings", {}).get("hits", 0) + 3
+        assert 0 < after["hitRate"] <= 1
+        
+        try:
+            response = requests.put(f"{BASE_URL}/api/settings", headers=headers, json={"phone": "+91 00000 00000"})
+            assert response.status_code == 200
+            assert requests.get(f"{BASE_URL}/api/settings").json()["phone"] == "+91 00000 00000"
+        finally:
+            requests.put(f"{BASE_URL}/api/settings", headers=headers, json={"phone": original["phone"]})
+        assert requests.get(f"{BASE_URL}/api/settings").json()["phone"] == original["phone"]
+        print(f"✓ Settings served from memory (hit rate {after['hitRate']:.0%}) and refreshed on update")
+    
+    def test_stats_require_auth(self):
+        """Test cache stats endpoint requires auth"""
+        response = requests.get(f"{BASE_URL}/api/admin/documents/cache-stats")
+        assert response.status_code in [401, 403]
+        print(f"✓ Document cache stats protected")
+
+
+class TestHomepageBundle:
+    """Aggregated homepage endpoint"""
+    
+    def test_bundle_matches_individual_endpoints(self):
+        """Test the bundle carries what the separate public endpoints return"""
+        response = requests.get(f"{BASE_URL}/api/homepage")
+        assert response.status_code == 200
+        data = response.json()
+        for key in ["settings", "heroCarousel", "weddings", "featuredFilm", "about", "packages",
+                    "sections", "socialMedia", "facebook", "youtube"]:
+            assert key in data
+        assert data["settings"] == requests.get(f"{BASE_URL}/api/settings").json()
+        assert data["sections"]["films"] == requests.get(f"{BASE_URL}/api/sections/films").json()
+        assert data["sections"]["contact"] == requests.get(f"{BASE_URL}/api/sections/contact").json()
+        assert len(data["weddings"]) <= 6
+        print(f"✓ Homepage bundle returns {len(data)} sections in one response")
+    
+    def test_bundle_revalidates_with_etag(self):
+        """Test the bundle has one ETag and answers 304 while unchanged"""
+        response = requests.get(f"{BASE_URL}/api/homepage")
+        etag = response.headers["ETag"]
+        assert "max-age" in response.headers["Cache-Control"]
+        
+        response = requests.get(f"{BASE_URL}/api/homepage", headers={"If-None-Match": etag})
+        assert response.status_code == 304
+        assert response.headers["ETag"] == etag
+        assert response.content == b""
+        
+        response = requests.get(f"{BASE_URL}/api/homepage", headers={"If-None-Match": '"stale"'})
+        assert response.status_code == 200
+        print(f"✓ Homepage bundle revalidated with ETag {etag}")
+
+
 if __name__ == "__main__":
     pytest.main([__file__, "-v", "--tb=short"])
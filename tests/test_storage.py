@@ -0,0 +1,107 @@
+"""
+Photography Portfolio Storage Backend Tests
+Tests for: S3-compatible upload storage against a mocked bucket (moto),
+local storage backend
+"""
+import asyncio
+import os
+import sys
+from pathlib import Path
+
+import pytest
+import requests
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent / "backend"))
+
+boto3 = pytest.importorskip("boto3")
+moto = pytest.importorskip("moto")
+
+from fastapi import HTTPException  # noqa: E402
+from storage import LocalStorage, S3Storage, local_path  # noqa: E402
+from upload_layout import layout_path  # noqa: E402
+
+BUCKET = "test-uploads"
+
+
+def write_upload(root, name, data):
+    """Place a file in the working copy the way the upload pipeline would"""
+    path = layout_path(root, name)
+    path.parent.mkdir(parents=True, exist_ok=True)
+    path.write_bytes(data)
+
+
+@pytest.fixture
+def s3_storage(tmp_path):
+    """S3Storage over a mocked bucket, with tmp_path as the working copy"""
+    os.environ.setdefault("AWS_ACCESS_KEY_ID", "testing")
+    os.environ.setdefault("AWS_SECRET_ACCESS_KEY", "testing")
+    with moto.mock_aws():
+        client = boto3.client("s3", region_name="us-east-1")
+        client.create_bucket(Bucket=BUCKET)
+        yield S3Storage(tmp_path, bucket=BUCKET, prefix="uploads/", client=client, public_url="")
+
+
+class TestS3Storage:
+    """Object storage backend tests"""
+
+    def test_publish_fetch_and_delete(self, s3_storage, tmp_path):
+        """Test published files can be fetched on another node and deleted"""
+        write_upload(tmp_path, "hero_1.jpg", b"original")
+        write_upload(tmp_path, "hero_1_w480.jpg", b"derivative")
+        asyncio.run(s3_storage.publish(["hero_1.jpg", "hero_1_w480.jpg"]))
+
+        # A node without a working copy downloads on demand
+        local_path(tmp_path, "hero_1.jpg").unlink()
+        assert asyncio.run(s3_storage.fetch("hero_1.jpg"))
+        assert local_path(tmp_path, "hero_1.jpg").read_bytes() == b"original"
+        assert not asyncio.run(s3_storage.fetch("missing.jpg"))
+
+        assert sorted(stored.name for stored in s3_storage.list_files()) == ["hero_1.jpg", "hero_1_w480.jpg"]
+        assert asyncio.run(s3_storage.list_prefix("hero_1_w")) == ["hero_1_w480.jpg"]
+
+        reclaimed = asyncio.run(s3_storage.delete(["hero_1.jpg", "hero_1_w480.jpg", "missing.jpg"]))
+        assert reclaimed == len(b"original") + len(b"derivative")
+        assert list(s3_storage.list_files()) == []
+        print("✓ Publish, fetch, list and delete round-trip through the bucket")
+
+    def test_dot_prefixes_are_not_listed(self, s3_storage, tmp_path):
+        """Test incoming direct uploads and archived originals are hidden from listings"""
+        (tmp_path / ".originals").mkdir()
+        (tmp_path / ".originals" / "a.jpg").write_bytes(b"archived")
+        write_upload(tmp_path, "a.jpg", b"stored")
+        asyncio.run(s3_storage.publish([".originals/a.jpg", "a.jpg"]))
+        assert [stored.name for stored in s3_storage.list_files()] == ["a.jpg"]
+        print("✓ Dot prefixes skipped")
+
+    def test_presigned_put(self, s3_storage, tmp_path):
+        """Test a presigned PUT lets a client upload without the API"""
+        presigned = s3_storage.presigned_upload(".incoming/abc.jpg", "image/jpeg", 5)
+        assert presigned["method"] == "PUT"
+        response = requests.put(presigned["url"], data=b"bytes", headers=presigned["headers"])
+        assert response.status_code == 200
+
+        asyncio.run(s3_storage.download(".incoming/abc.jpg", tmp_path / "incoming.part"))
+        assert (tmp_path / "incoming.part").read_bytes() == b"bytes"
+        print("✓ Presigned PUT stored the object")
+
+
+class TestLocalStorage:
+    """Local storage backend tests"""
+
+    def test_download_copies_within_root(self, tmp_path):
+        """Test a stored file is copied to a local path and a missing one raises"""
+        storage = LocalStorage(tmp_path)
+        write_upload(tmp_path, "hero_1.jpg", b"original")
+        asyncio.run(storage.download("hero_1.jpg", tmp_path / "copy.part"))
+        assert (tmp_path / "copy.part").read_bytes() == b"original"
+        with pytest.raises(FileNotFoundError):
+            asyncio.run(storage.download("missing.jpg", tmp_path / "missing.part"))
+        assert not (tmp_path / "missing.part").exists()
+        print("✓ Local download copied the stored file")
+
+    def test_presigned_upload_is_unsupported(self, tmp_path):
+        """Test direct uploads are refused with 501 without object storage"""
+        with pytest.raises(HTTPException) as error:
+            LocalStorage(tmp_path).presigned_upload(".incoming/abc.jpg", "image/jpeg", 5)
+        assert error.value.status_code == 501
+        print("✓ Presigned upload refused")
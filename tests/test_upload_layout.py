@@ -0,0 +1,39 @@
+"""
+Photography Portfolio Upload Layout Tests
+Tests for: consistent-hash placement of uploads over several volumes
+"""
+import sys
+import uuid
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent / "backend"))
+
+from upload_layout import HashRing  # noqa: E402
+
+
+class TestHashRing:
+    """Volume placement from the filename alone"""
+
+    def test_derivatives_share_the_original_volume(self):
+        ring = HashRing([(Path("/a"), 1), (Path("/b"), 1), (Path("/c"), 1)])
+        for _ in range(200):
+            stem = str(uuid.uuid4())
+            assert ring.root_for(f"{stem}_w640.webp") == ring.root_for(f"{stem}.jpg")
+        print("✓ Derivatives are placed with their original")
+
+    def test_adding_a_volume_moves_only_its_share(self):
+        names = [f"{uuid.uuid4()}.jpg" for _ in range(5000)]
+        before = HashRing([(Path("/a"), 1), (Path("/b"), 1)])
+        after = HashRing([(Path("/a"), 1), (Path("/b"), 1), (Path("/c"), 1)])
+
+        moved = [name for name in names if before.root_for(name) != after.root_for(name)]
+        assert all(after.root_for(name) == Path("/c") for name in moved)
+        assert 0.25 < len(moved) / len(names) < 0.42
+        print(f"✓ Adding a third volume moved {len(moved) / len(names):.0%} of files")
+
+    def test_weights_scale_the_share(self):
+        names = [f"{uuid.uuid4()}.jpg" for _ in range(5000)]
+        ring = HashRing([(Path("/a"), 1), (Path("/b"), 3)])
+        share = sum(ring.root_for(name) == Path("/b") for name in names) / len(names)
+        assert 0.65 < share < 0.85
+        print(f"✓ A weight-3 volume holds {share:.0%} of files")
@@ -0,0 +1,110 @@
+"""
+Photography Portfolio YouTube Feed Tests
+Tests for: quota-aware refreshes of the stored channel videos
+"""
+import asyncio
+import sys
+from pathlib import Path
+
+import pytest
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent / "backend"))
+
+httpx = pytest.importorskip("httpx")
+mongomock_motor = pytest.importorskip("mongomock_motor")
+
+import youtube_feed  # noqa: E402
+from http_client import HTTPClient  # noqa: E402
+from youtube_feed import cached_youtube_videos, quota_day, refresh_youtube_cache  # noqa: E402
+
+SETTINGS = {"id": "yt", "channel_id": "UCchannel", "api_key": "key", "max_videos": 2, "enabled": True}
+
+
+class FakeYouTube:
+    """Answers the Data API calls the feed makes and records them"""
+
+    def __init__(self):
+        self.calls = []
+        self.down = False
+
+    def handle(self, request):
+        resource = request.url.path.rsplit("/", 1)[-1]
+        self.calls.append(resource)
+        if self.down:
+            return httpx.Response(500, json={"error": {"message": "backend error"}})
+        if resource == "channels":
+            return httpx.Response(200, json={"items": [{"contentDetails": {"relatedPlaylists": {"uploads": "UUchannel"}}}]})
+        if resource == "playlistItems":
+            return httpx.Response(200, json={"items": [
+                {"snippet": {"title": "Private video"}, "contentDetails": {"videoId": "hidden"}},
+                {"snippet": {"title": "Wedding film", "thumbnails": {"high": {"url": "https://i/1.jpg"}}},
+                 "contentDetails": {"videoId": "v1", "videoPublishedAt": "2026-01-02T00:00:00Z"}},
+                {"snippet": {"title": "Teaser"}, "contentDetails": {"videoId": "v2"}},
+                {"snippet": {"title": "Older film"}, "contentDetails": {"videoId": "v3"}},
+            ]})
+        return httpx.Response(200, json={"items": []})
+
+
+@pytest.fixture
+def youtube(monkeypatch):
+    fake = FakeYouTube()
+    client = HTTPClient(retries=0, transport=httpx.MockTransport(fake.handle))
+    monkeypatch.setattr(youtube_feed, "http_client", client)
+    return fake
+
+
+@pytest.fixture
+def db():
+    database = mongomock_motor.AsyncMongoMockClient()["youtube_feed_test"]
+    asyncio.run(database.youtube_settings.insert_one(dict(SETTINGS)))
+    return database
+
+
+async def quota_used(db):
+    ledger = await db.youtube_quota.find_one({"_id": quota_day()})
+    return ledger["used"] if ledger else 0
+
+
+class TestYouTubeFeed:
+    """Stored videos, refresh schedule and quota budget"""
+
+    def test_refresh_lists_the_uploads_playlist(self, db, youtube):
+        async def scenario():
+            assert await cached_youtube_videos(db, SETTINGS) is None
+            assert await refresh_youtube_cache(db)
+            videos = await cached_youtube_videos(db, SETTINGS)
+            assert [video["video_id"] for video in videos] == ["v1", "v2"]
+            assert videos[0]["published_at"] == "2026-01-02T00:00:00Z"
+            # Still fresh: no call at all; forced: the playlist id is remembered
+            assert not await refresh_youtube_cache(db)
+            assert await refresh_youtube_cache(db, force=True)
+            assert await quota_used(db) == 3
+        asyncio.run(scenario())
+        assert youtube.calls == ["channels", "playlistItems", "playlistItems"]
+        assert "search" not in youtube.calls
+        print("✓ Videos listed through playlistItems for 3 quota units, no search")
+
+    def test_failed_refresh_keeps_last_good_videos(self, db, youtube):
+        async def scenario():
+            assert await refresh_youtube_cache(db)
+            youtube.down = True
+            assert not await refresh_youtube_cache(db, force=True)
+            assert [video["video_id"] for video in await cached_youtube_videos(db, SETTINGS)] == ["v1", "v2"]
+            cached = await db.youtube_cache.find_one({"_id": "UCchannel"})
+            assert "backend error" in cached["lastError"]
+            # Backed off: the next scheduled refresh does not retry yet
+            youtube.down = False
+            await db.youtube_cache.update_one({"_id": "UCchannel"}, {"$unset": {"fetchedAt": ""}})
+            assert not await refresh_youtube_cache(db)
+        asyncio.run(scenario())
+        print("✓ API failure keeps serving the last good videos")
+
+    def test_daily_budget_is_never_exceeded(self, db, youtube, monkeypatch):
+        monkeypatch.setattr(youtube_feed, "YOUTUBE_DAILY_QUOTA", 1)
+
+        async def scenario():
+            assert not await refresh_youtube_cache(db)
+            assert await quota_used(db) == 1
+        asyncio.run(scenario())
+        assert youtube.calls == ["channels"]
+        print("✓ Calls beyond the daily quota budget are not made")